@@ -1,13 +1,31 @@
+import time
+
+# 서버 시작 시간 측정 (이 모듈 import부터)
+_import_started = time.time()
+
 import os
+import sys
 import uuid
 import json
-import time
 import threading
-import torch
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify, send_from_directory, Response
-from werkzeug.utils import secure_filename
-from transcribe import load_whisper_model, transcribe_audio, get_audio_duration
+# torch/transformers(transcribe.py, diarization.py)는 추론할 때 처음 불러옴 - 웹 프로세스는 ML 라이브러리 없이 시작
+from devices import CPU_BACKENDS, GPU_BACKENDS, cuda_available, dtype_name, effective_backend, get_device
+from audio import SAMPLE_RATE, load_audio, audio_duration, decoded_path, discard_decoded
+from vad import remap_timestamps
+from jobs import JobQueue, JobStore
+from cache import ResultCache, UploadIndex, hash_stream, make_cache_key
+from models import ModelRegistry
+from notes_store import NotesStore
+from search_index import SearchIndex
+from uploads import ChunkedUploads
+from metrics import Registry, MetricsSpool, render as render_metrics
+from summarize import LLMClient, LLMError, Summarizer
+from streaming import PCM_FORMATS, StreamingTranscriber, WavRecorder, pcm_to_float, run_blocking, in_gevent_worker
+from speakers import SpeakerIndex, relabel
+from pipeline import skip_silence, diarize, assign_speakers, safe_upload_name
 
 # .env 파일 로드
 load_dotenv()
@@ -18,6 +36,36 @@ app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 최대 100MB
 
 ALLOWED_EXTENSIONS = {'mp3', 'wav', 'ogg', 'm4a', 'flac'}
 
+# 변환 언어 (Whisper generate_kwargs)
+TRANSCRIBE_LANGUAGE = "korean"
+
+# 변환 결과 캐시 (같은 오디오 + 같은 설정이면 재사용)
+CACHE_FOLDER = 'cache'
+result_cache = ResultCache(CACHE_FOLDER, int(os.getenv('RESULT_CACHE_MAX_MB', '1024')) * 1024 * 1024)
+upload_index = UploadIndex(os.path.join(CACHE_FOLDER, 'uploads.sqlite3'), app.config['UPLOAD_FOLDER'])
+
+# 메트릭 (/metrics, Prometheus 텍스트 형식)
+metrics = Registry()
+stage_seconds = metrics.histogram('jj_stage_seconds', '단계별 소요 시간 (초)', ['stage'])
+realtime_factor = metrics.histogram(
+    'jj_realtime_factor', '음성 인식 시간 / 오디오 길이', ['model', 'device', 'backend'],
+    buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5)
+)
+audio_seconds_total = metrics.counter('jj_audio_seconds_total', '변환한 오디오 길이 합계 (초)', ['model', 'device'])
+inference_seconds_total = metrics.counter('jj_inference_seconds_total', '음성 인식 소요 시간 합계 (초)', ['model', 'device'])
+jobs_finished_total = metrics.counter('jj_jobs_finished_total', '끝난 작업 수', ['kind', 'status'])
+upload_bytes_total = metrics.counter('jj_upload_bytes_total', '받은 업로드 크기 합계 (bytes)')
+decode_total = metrics.counter('jj_decode_total', '오디오 디코딩 횟수 (predecoded: 업로드 중 미리 디코딩)', ['source'])
+cache_lookups_total = metrics.counter('jj_cache_lookups_total', '캐시 조회 수', ['cache', 'result'])
+startup_seconds = metrics.gauge('jj_startup_seconds', '서버 시작 단계별 소요 시간 (초)', ['phase'])
+
+# 프로세스별 스냅샷 공유 폴더 (웹/추론 워커 프로세스가 나뉜 운영 모드에서 사용)
+metrics_spool = MetricsSpool(
+    os.getenv('METRICS_DIR', os.path.join(CACHE_FOLDER, 'metrics')),
+    metrics,
+    interval=float(os.getenv('METRICS_SPOOL_INTERVAL', '5'))
+)
+
 # 사용 가능한 모델 목록
 AVAILABLE_MODELS = [
     {"id": "openai/whisper-tiny", "name": "Tiny (가장 빠름, 낮은 품질)"},
@@ -29,78 +77,182 @@ AVAILABLE_MODELS = [
 
 # 전역 설정
 class TranscriptionConfig:
+    KEYS = (
+        "model_id", "device_mode", "cpu_backend", "gpu_backend", "enable_diarization", "enable_batching",
+        "parallel_diarization", "split_on_speaker_change", "enable_vad", "hf_token"
+    )
+
     def __init__(self):
         self.model_id = "openai/whisper-base"
         self.device_mode = "auto"  # auto, cuda, cpu
+        self.cpu_backend = "torch"  # torch, int8, onnx (CPU에서만 적용)
+        self.gpu_backend = os.getenv('GPU_BACKEND', 'torch')  # torch, sdpa, compiled, speculative (GPU에서만 적용)
         self.enable_diarization = True
+        self.enable_batching = True  # 여러 작업의 윈도우를 모아 배치 추론
+        self.parallel_diarization = True  # 화자 분리를 음성 인식과 동시에 실행
+        self.split_on_speaker_change = False  # 청크 안에서 화자가 바뀌면 청크 분할
+        self.enable_vad = True  # 무음 구간을 건너뛰고 음성 구간만 Whisper에 전달
         self.hf_token = os.getenv('HF_TOKEN', '')
+        self.store = None  # JobStore (attach 후 설정 변경을 모든 프로세스가 공유)
 
     def to_dict(self):
         return {
             "model_id": self.model_id,
             "device_mode": self.device_mode,
+            "cpu_backend": self.cpu_backend,
+            "gpu_backend": self.gpu_backend,
             "enable_diarization": self.enable_diarization,
+            "enable_batching": self.enable_batching,
+            "parallel_diarization": self.parallel_diarization,
+            "split_on_speaker_change": self.split_on_speaker_change,
+            "enable_vad": self.enable_vad,
             "hf_token": "****" if self.hf_token else ""
         }
 
+    def job_options(self):
+        """작업에 함께 저장하는 처리 옵션 (토큰은 저장하지 않음)"""
+        return {
+            "enable_diarization": self.enable_diarization,
+            "enable_batching": self.enable_batching,
+            "parallel_diarization": self.parallel_diarization,
+            "split_on_speaker_change": self.split_on_speaker_change,
+            "enable_vad": self.enable_vad
+        }
+
+    def attach(self, store):
+        """설정 저장소 연결 - 여러 웹 프로세스와 추론 워커가 같은 설정을 사용"""
+        self.store = store
+        self.sync()
+
+    def sync(self):
+        """다른 프로세스에서 바꾼 설정 반영"""
+        if self.store is not None:
+            self._apply(self.store.settings())
+
     def update(self, data):
-        if "model_id" in data:
-            self.model_id = data["model_id"]
-        if "device_mode" in data:
-            self.device_mode = data["device_mode"]
-        if "enable_diarization" in data:
-            self.enable_diarization = data["enable_diarization"]
-        if "hf_token" in data and data["hf_token"] != "****":
-            self.hf_token = data["hf_token"]
+        changes = self._apply(data)
+        if self.store is not None and changes:
+            self.store.save_settings(changes)
+
+    def _apply(self, data):
+        """설정 항목 반영 - 바뀐 항목 반환"""
+        changes = {key: data[key] for key in self.KEYS if key in data}
+        if changes.get("hf_token") == "****":
+            del changes["hf_token"]
+        for key, value in changes.items():
+            setattr(self, key, value)
+        return changes
 
 config = TranscriptionConfig()
 
-# 모델은 첫 요청 시 로드 (lazy loading)
-whisper_pipe = None
-current_model_id = None
-current_device_mode = None
+# 작업 실행 위치 (inline: 이 프로세스의 워커 스레드, worker: 별도 추론 워커 프로세스 - worker.py)
+JOB_RUNNER = os.getenv('JOB_RUNNER', 'inline')
 
-# 작업 상태 저장
-job_status = {}
+# 모델 리로드는 대기 중인 변환 작업보다 먼저 처리
+RELOAD_PRIORITY = 100
 
-# 모델 로드 잠금
-model_lock = threading.Lock()
+# 작업 상태 + 진행 이벤트 저장소 (재시작 후에도 유지, 여러 웹 프로세스가 공유)
+job_store = JobStore(
+    os.getenv('JOBS_DB', os.path.join(CACHE_FOLDER, 'jobs.sqlite3')),
+    ttl_seconds=float(os.getenv('JOB_TTL_HOURS', '24')) * 3600,
+    max_jobs=int(os.getenv('JOB_MAX_STORED', '1000'))
+)
+# 설정 화면에서 바꾼 설정은 작업 저장소에 저장 (모든 웹 프로세스와 추론 워커가 공유)
+config.attach(job_store)
 
+# 배치 엔진 설정
+WHISPER_BATCH_SIZE = int(os.getenv('WHISPER_BATCH_SIZE', '8'))
+WHISPER_BATCH_WAIT_MS = int(os.getenv('WHISPER_BATCH_WAIT_MS', '50'))
 
-def get_whisper_pipe(force_reload=False):
-    global whisper_pipe, current_model_id, current_device_mode
 
-    with model_lock:
-        need_reload = (
-            force_reload or
-            whisper_pipe is None or
-            current_model_id != config.model_id or
-            current_device_mode != config.device_mode
-        )
+def load_whisper_entry(model_id, device_mode, backend):
+    """레지스트리용 로더 - 파이프라인과 배치 엔진을 함께 생성"""
+    from transcribe import load_whisper_model, WhisperBatcher
+
+    # backend는 이미 장치에 맞게 정해진 값 - CPU/GPU 어느 쪽이든 그대로 적용
+    pipe = load_whisper_model(model_id, device_mode, cpu_backend=backend, gpu_backend=backend, warmup_batch_size=WHISPER_BATCH_SIZE)
+    return pipe, WhisperBatcher(pipe, WHISPER_BATCH_SIZE, WHISPER_BATCH_WAIT_MS)
+
+
+def default_model_budgets():
+    """장치별 상주 모델 메모리 예산 (bytes) - 기본은 GPU 메모리의 70%, CPU 4GB"""
+    import torch
+
+    budgets = {'cpu': int(os.getenv('MODEL_BUDGET_CPU_MB', '4096')) * 1024 * 1024}
+    if torch.cuda.is_available():
+        total = torch.cuda.get_device_properties(0).total_memory
+        budgets['cuda'] = int(os.getenv('MODEL_BUDGET_GPU_MB', str(int(total * 0.7) // (1024 * 1024)))) * 1024 * 1024
+    return budgets
+
+
+# 여러 Whisper 모델을 상주시키고 작업별로 선택 (메모리 예산은 첫 모델을 로드할 때 계산)
+model_registry = ModelRegistry(load_whisper_entry, default_model_budgets)
+
+
+# 서버 시작 후 백그라운드 준비
+#   off: 첫 작업 때 모델 로드 (ML 라이브러리도 그때 불러옴)
+#   load: 기본 모델 미리 로드
+#   full: load + 짧은 더미 추론 (CUDA 커널/할당자 준비) + 화자 분리 파이프라인 로드
+MODEL_WARMUP = os.getenv('MODEL_WARMUP', 'load')
+
+# 시작 단계별 소요 시간 (/api/queue, jj_startup_seconds)
+startup = {'warmup': MODEL_WARMUP, 'warmup_state': 'pending' if MODEL_WARMUP != 'off' else 'off', 'timings': {}}
+
 
-        if need_reload:
-            # 기존 모델 해제
-            if whisper_pipe is not None:
-                print(f"기존 모델 해제 중... ({current_model_id})")
-                del whisper_pipe
-                whisper_pipe = None
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
-                print("GPU 메모리 정리 완료")
+def _startup_phase(phase, started):
+    seconds = round(time.time() - started, 2)
+    startup['timings'][phase] = seconds
+    startup_seconds.set(seconds, phase=phase)
+    return seconds
 
-            print(f"Whisper 모델 로딩 중... ({config.model_id}, device={config.device_mode})")
-            whisper_pipe = load_whisper_model(config.model_id, config.device_mode)
-            current_model_id = config.model_id
-            current_device_mode = config.device_mode
-            print("모델 로딩 완료!")
 
-        return whisper_pipe
+def warm_up():
+    """서버가 요청을 받기 시작한 뒤 백그라운드에서 실행 (첫 요청 대기 제거)"""
+    if MODEL_WARMUP == 'off':
+        return
+
+    startup['warmup_state'] = 'running'
+    try:
+        # 모델 로드 (torch/transformers import 포함)
+        started = time.time()
+        backend = effective_backend(config.device_mode, config.cpu_backend, config.gpu_backend)
+        with model_registry.use(config.model_id, config.device_mode, backend) as model:
+            print(f"[Startup] Model loaded in {_startup_phase('model_load', started)}s")
+
+            if MODEL_WARMUP == 'full':
+                import numpy as np
+                from transcribe import transcribe_audio
+
+                # 1초 약한 잡음 - 첫 실제 작업이 커널 컴파일/메모리 할당을 기다리지 않도록
+                started = time.time()
+                noise = np.random.default_rng(0).normal(0, 0.01, SAMPLE_RATE).astype(np.float32)
+                transcribe_audio(model.pipe, noise, TRANSCRIBE_LANGUAGE)
+                print(f"[Startup] Warm-up inference in {_startup_phase('warmup_inference', started)}s")
+
+        if MODEL_WARMUP == 'full' and config.enable_diarization and config.hf_token:
+            from diarization import load_diarization_pipeline
+
+            started = time.time()
+            load_diarization_pipeline(config.hf_token)
+            print(f"[Startup] Diarization pipeline loaded in {_startup_phase('diarization_load', started)}s")
+
+        startup['warmup_state'] = 'ready'
+    except Exception as e:
+        startup['warmup_state'] = 'error'
+        print(f"[Models] 기본 모델 미리 로드 실패: {e}")
 
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+@app.before_request
+def sync_config():
+    """다른 웹 프로세스에서 바꾼 설정 반영 (정적 파일 요청 제외)"""
+    if request.path.startswith(('/api/', '/ws/')):
+        config.sync()
+
+
 @app.route('/')
 def index():
     return send_from_directory('static', 'index.html')
@@ -113,8 +265,11 @@ def get_config():
         "success": True,
         "config": config.to_dict(),
         "available_models": AVAILABLE_MODELS,
-        "cuda_available": torch.cuda.is_available(),
-        "current_device": current_device_mode or config.device_mode
+        "cuda_available": cuda_available(),
+        "current_device": config.device_mode,
+        "resident_models": model_registry.stats(),
+        "streaming_available": Sock is not None and (STREAM_SERVING or bool(STREAM_URL)),
+        "stream_url": STREAM_URL
     })
 
 
@@ -134,9 +289,15 @@ def update_config():
     if "device_mode" in data:
         if data["device_mode"] not in ["auto", "cuda", "cpu"]:
             return jsonify({"success": False, "error": "유효하지 않은 장치 모드입니다"}), 400
-        if data["device_mode"] == "cuda" and not torch.cuda.is_available():
+        if data["device_mode"] == "cuda" and not cuda_available():
             return jsonify({"success": False, "error": "CUDA를 사용할 수 없습니다"}), 400
 
+    if "cpu_backend" in data and data["cpu_backend"] not in CPU_BACKENDS:
+        return jsonify({"success": False, "error": "유효하지 않은 CPU 백엔드입니다"}), 400
+
+    if "gpu_backend" in data and data["gpu_backend"] not in GPU_BACKENDS:
+        return jsonify({"success": False, "error": "유효하지 않은 GPU 백엔드입니다"}), 400
+
     config.update(data)
 
     return jsonify({
@@ -148,37 +309,112 @@ def update_config():
 
 @app.route('/api/reload-model', methods=['GET', 'POST'])
 def reload_model():
-    """모델 강제 리로드"""
-    def generate():
-        yield f"data: {json.dumps({'stage': 'start', 'message': '모델 리로드 시작...'})}\n\n"
-
-        try:
-            yield f"data: {json.dumps({'stage': 'unloading', 'message': '기존 모델 해제 중...'})}\n\n"
-
-            get_whisper_pipe(force_reload=True)
-
-            yield f"data: {json.dumps({'stage': 'complete', 'message': '모델 리로드 완료!'})}\n\n"
-        except Exception as e:
-            yield f"data: {json.dumps({'stage': 'error', 'message': str(e)})}\n\n"
-
-    return Response(generate(), mimetype='text/event-stream')
+    """모델 강제 리로드 - 추론 워커에서 작업으로 실행하고 진행 상황은 SSE로 전송"""
+    job_id = uuid.uuid4().hex
+    device = job_device(config.device_mode)
+    job_store.create(job_id, {
+        'kind': 'reload',
+        'status': 'queued',
+        'model_id': config.model_id,
+        'device_mode': config.device_mode,
+        'backend': effective_backend(config.device_mode, config.cpu_backend, config.gpu_backend),
+        'device': device,
+        'priority': RELOAD_PRIORITY
+    })
+    job_store.publish(job_id, {'stage': 'start', 'message': '모델 리로드 시작...'})
+    dispatch_job(job_id, device, RELOAD_PRIORITY)
+
+    return Response(stream_job_events(job_id, 0), mimetype='text/event-stream')
+
+
+def result_cache_key(audio_hash, model_id, device_mode, backend):
+    """작업 설정 기준 결과 캐시 키"""
+    return make_cache_key(
+        audio=audio_hash,
+        model_id=model_id,
+        dtype=f'torch.{dtype_name(get_device(device_mode))}',  # str(torch dtype)과 같은 값 (기존 캐시 키 유지)
+        backend=backend,
+        language=TRANSCRIBE_LANGUAGE,
+        diarization=bool(config.enable_diarization and config.hf_token),
+        split_on_speaker_change=config.split_on_speaker_change,
+        vad=config.enable_vad
+    )
+
+
+def job_settings(source):
+    """요청의 작업 설정 검증 (없으면 현재 설정 사용) - (설정, 오류 메시지)"""
+    model_id = source.get('model_id') or config.model_id
+    device_mode = source.get('device_mode') or config.device_mode
+    if model_id not in [m["id"] for m in AVAILABLE_MODELS]:
+        return None, '유효하지 않은 모델입니다'
+    if device_mode not in ["auto", "cuda", "cpu"] or (device_mode == "cuda" and not cuda_available()):
+        return None, '유효하지 않은 장치 모드입니다'
+
+    # 작업 큐 우선순위 (클수록 먼저 처리)
+    try:
+        priority = int(source.get('priority', 0))
+    except (TypeError, ValueError):
+        priority = 0
+
+    return {'model_id': model_id, 'device_mode': device_mode, 'priority': priority}, None
+
+
+def store_upload(tmp_path, filename, audio_hash):
+    """받은 파일을 업로드 폴더로 옮김 (같은 내용의 파일이 있으면 재사용) - 최종 파일명 반환"""
+    filename, reused = upload_index.store(tmp_path, filename, audio_hash)
+    cache_lookups_total.inc(cache='upload', result='hit' if reused else 'miss')
+    if reused:
+        print(f"[Upload] Duplicate upload, reusing {filename}")
+    return filename
+
+
+def start_job(filename, audio_hash, settings):
+    """변환 작업 등록 (같은 결과가 캐시에 있으면 바로 완료) - 응답 데이터 반환"""
+    model_id, device_mode, priority = settings['model_id'], settings['device_mode'], settings['priority']
+    backend = effective_backend(device_mode, config.cpu_backend, config.gpu_backend)
+    device = job_device(device_mode)
+
+    job_id = uuid.uuid4().hex
+    cache_key = result_cache_key(audio_hash, model_id, device_mode, backend)
+    job_store.create(job_id, {
+        'status': 'queued',
+        'progress': 0,
+        'message': '파일 업로드 완료',
+        'filepath': os.path.join(app.config['UPLOAD_FOLDER'], filename),
+        'filename': filename,
+        'model_id': model_id,
+        'device_mode': device_mode,
+        'backend': backend,
+        'device': device,
+        'priority': priority,
+        'cache_key': cache_key,
+        'options': config.job_options()
+    })
 
+    # 캐시에 같은 결과가 있으면 바로 완료
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        print(f"[Cache] Hit for {filename}")
+        # 캐시 이후 등록된 화자가 있을 수 있으므로 저장된 화자 벡터로 이름만 다시 붙임
+        cached = relabel(cached, speaker_index)
+        job_store.publish(
+            job_id,
+            {'stage': 'complete', 'progress': 100, 'message': f"변환 완료! (캐시, {len(cached['chunks'])}개 청크)", 'result': cached, 'cached': True},
+            status='complete', result=cached
+        )
+        return {'success': True, 'job_id': job_id, 'filename': filename, 'cached': True}
 
-def get_unique_filename(folder, filename):
-    """중복 파일명 처리 - 파일명(1), 파일명(2) 형식으로 변경"""
-    base, ext = os.path.splitext(filename)
-    counter = 1
-    new_filename = filename
+    waiting = max(job_store.queued_count(device) - 1, 0)
+    job_store.publish(job_id, {'stage': 'queued', 'progress': 0, 'message': f'대기 중... (앞에 {waiting}개 작업)' if waiting else '작업 시작 대기 중...'})
 
-    while os.path.exists(os.path.join(folder, new_filename)):
-        new_filename = f"{base}({counter}){ext}"
-        counter += 1
+    dispatch_job(job_id, device, priority)
 
-    return new_filename
+    return {'success': True, 'job_id': job_id, 'filename': filename}
 
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
+    """한 번의 요청으로 업로드 (작은 파일용 - 큰 파일은 /upload/init 분할 업로드)"""
     if 'audio' not in request.files:
         return jsonify({'success': False, 'error': '파일이 없습니다'}), 400
 
@@ -186,114 +422,496 @@ def upload_file():
     if file.filename == '':
         return jsonify({'success': False, 'error': '선택된 파일이 없습니다'}), 400
 
+    # 작업별 모델 선택 (없으면 현재 설정 사용)
+    settings, error = job_settings(request.form)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+
     if file and allowed_file(file.filename):
         # 원본 파일명 보존 (한글 등)
-        original_filename = file.filename
-        filename = secure_filename(file.filename)
-        if not filename:
-            ext = original_filename.rsplit('.', 1)[1].lower()
-            filename = f"{uuid.uuid4().hex}.{ext}"
-
-        # 중복 파일명 처리
-        filename = get_unique_filename(app.config['UPLOAD_FOLDER'], filename)
-
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-
-        # 작업 ID 생성
-        job_id = uuid.uuid4().hex
-        job_status[job_id] = {
-            'status': 'uploaded',
-            'progress': 0,
-            'message': '파일 업로드 완료',
-            'filepath': filepath,
-            'filename': filename,
-            'result': None
-        }
+        filename = safe_upload_name(file.filename)
 
-        return jsonify({
-            'success': True,
-            'job_id': job_id,
-            'filename': filename
-        })
+        # 저장하면서 내용 해시 계산
+        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+        tmp_path = os.path.join(app.config['UPLOAD_FOLDER'], f'.{uuid.uuid4().hex}.part')
+        with stage_seconds.time(stage='upload'), open(tmp_path, 'wb') as out:
+            audio_hash = hash_stream(file.stream, out)
+        upload_bytes_total.inc(os.path.getsize(tmp_path))
+
+        filename = store_upload(tmp_path, filename, audio_hash)
+        return jsonify(start_job(filename, audio_hash, settings))
 
     return jsonify({'success': False, 'error': '허용되지 않는 파일 형식입니다'}), 400
 
 
-@app.route('/transcribe/<job_id>')
-def transcribe_job(job_id):
-    """SSE로 변환 진행률 전송"""
-    if job_id not in job_status:
-        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다'}), 404
+# 분할 업로드 (청크 단위로 이어받기, 병렬 전송 가능)
+UPLOAD_CHUNK_MB = int(os.getenv('UPLOAD_CHUNK_MB', '8'))
 
-    def generate():
-        job = job_status[job_id]
-        filepath = job['filepath']
+chunked_uploads = ChunkedUploads(
+    os.path.join(app.config['UPLOAD_FOLDER'], '.sessions'),
+    chunk_size=UPLOAD_CHUNK_MB * 1024 * 1024,
+    max_bytes=int(os.getenv('UPLOAD_MAX_MB', '4096')) * 1024 * 1024,
+    ttl_seconds=float(os.getenv('UPLOAD_SESSION_TTL_HOURS', '24')) * 3600,
+    early_decode=os.getenv('UPLOAD_EARLY_DECODE', 'true').lower() == 'true'
+)
 
-        # 오디오 길이 확인
-        duration = get_audio_duration(filepath)
 
-        yield f"data: {json.dumps({'stage': 'init', 'progress': 0, 'message': '파일 분석 중...', 'duration': duration})}\n\n"
+@app.route('/upload/init', methods=['POST'])
+def upload_init():
+    """분할 업로드 시작 - {filename, size, model_id?, device_mode?, priority?}"""
+    data = request.get_json() or {}
+    filename = data.get('filename') or ''
+    size = data.get('size')
 
-        try:
-            yield f"data: {json.dumps({'stage': 'loading', 'progress': 5, 'message': '모델 로딩 중...'})}\n\n"
+    if not allowed_file(filename):
+        return jsonify({'success': False, 'error': '허용되지 않는 파일 형식입니다'}), 400
+    if not isinstance(size, int):
+        return jsonify({'success': False, 'error': '파일 크기가 없습니다'}), 400
+
+    settings, error = job_settings(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+
+    try:
+        session = chunked_uploads.init(filename, size, settings)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({
+        'success': True,
+        'upload_id': session['upload_id'],
+        'chunk_size': session['chunk_size'],
+        'chunks': session['chunks']
+    })
+
+
+@app.route('/upload/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """분할 업로드 상태 (이어받기 시 받은 청크 확인)"""
+    session = chunked_uploads.get(upload_id)
+    if session is None:
+        return jsonify({'success': False, 'error': '업로드 세션을 찾을 수 없습니다'}), 404
+
+    return jsonify({
+        'success': True,
+        'upload_id': upload_id,
+        'chunk_size': session['chunk_size'],
+        'chunks': session['chunks'],
+        'received': session['received']
+    })
+
+
+@app.route('/upload/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    """청크 하나 업로드 (요청 본문을 그대로 파일의 해당 위치에 기록)"""
+    try:
+        with stage_seconds.time(stage='upload_chunk'):
+            session = chunked_uploads.write_chunk(upload_id, index, request.stream)
+    except KeyError:
+        return jsonify({'success': False, 'error': '업로드 세션을 찾을 수 없습니다'}), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify({
+        'success': True,
+        'received': len(session['received']),
+        'chunks': session['chunks']
+    })
 
-            pipe = get_whisper_pipe()
 
-            yield f"data: {json.dumps({'stage': 'processing', 'progress': 10, 'message': f'음성 인식 시작 (길이: {duration:.1f}초)' if duration else '음성 인식 시작...', 'duration': duration})}\n\n"
+@app.route('/upload/<upload_id>/finalize', methods=['POST'])
+def upload_finalize(upload_id):
+    """분할 업로드 완료 - 파일을 업로드 폴더로 옮기고 변환 작업 등록"""
+    started = time.time()
+    try:
+        audio_hash, session, predecoded = chunked_uploads.finalize(upload_id)
+    except KeyError:
+        return jsonify({'success': False, 'error': '업로드 세션을 찾을 수 없습니다'}), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    upload_bytes_total.inc(session['size'])
+    filename = store_upload(chunked_uploads.part_path(upload_id), safe_upload_name(session['filename']), audio_hash)
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+
+    # 업로드 중에 디코딩한 결과를 작업에서 쓰도록 옮김 (같은 파일의 결과가 이미 있으면 세션과 함께 삭제)
+    if predecoded is not None and not os.path.exists(decoded_path(filepath)):
+        os.makedirs(os.path.dirname(decoded_path(filepath)), exist_ok=True)
+        os.replace(predecoded, decoded_path(filepath))
+        print(f"[Upload] Pre-decoded {filename}")
+    stage_seconds.observe(time.time() - started, stage='upload_finalize')
+
+    response = start_job(filename, audio_hash, session['fields'])
+    if response.get('cached'):
+        discard_decoded(filepath)
+
+    chunked_uploads.discard(upload_id)
+    return jsonify(response)
+
+
+@app.route('/upload/<upload_id>', methods=['DELETE'])
+def upload_abort(upload_id):
+    """분할 업로드 취소"""
+    chunked_uploads.discard(upload_id)
+    return jsonify({'success': True})
+
+
+def dispatch_job(job_id, device, priority=0):
+    """inline이면 이 프로세스의 작업 큐에 등록, worker면 추론 워커 프로세스(worker.py)가 저장소에서 가져감"""
+    if JOB_RUNNER == 'inline':
+        job_queue.start()
+        job_queue.submit(job_id, device, priority)
+
+
+def job_device(device_mode):
+    """작업을 배정할 장치 큐 (cuda/cpu)"""
+    if device_mode == "cpu" or not cuda_available():
+        return "cpu"
+    return "cuda"
+
+
+def run_job(job_id):
+    """작업 큐 워커가 실행하는 작업 (종류별로 분기)"""
+    job = job_store.get(job_id, with_result=False)
+    if job is None:
+        print(f"[Queue] Job {job_id} no longer exists")
+        return
+
+    if job.get('kind') == 'reload':
+        run_reload(job_id, job)
+    else:
+        run_transcription(job_id, job)
+
+
+def run_reload(job_id, job):
+    """모델 강제 리로드 작업"""
+    job_store.update(job_id, status='processing')
+    try:
+        job_store.publish(job_id, {'stage': 'unloading', 'message': '기존 모델 해제 중...'})
+        model_registry.reload(job['model_id'], job['device_mode'], job['backend'])
+        job_store.publish(job_id, {'stage': 'complete', 'message': '모델 리로드 완료!'}, status='complete')
+        jobs_finished_total.inc(kind='reload', status='complete')
+    except Exception as e:
+        job_store.publish(job_id, {'stage': 'error', 'message': str(e)}, status='error')
+        jobs_finished_total.inc(kind='reload', status='error')
+        raise
+
+
+def run_transcription(job_id, job):
+    """워커 스레드에서 실행되는 변환 작업 - 진행 상황은 job_store에 이벤트로 발행"""
+    from transcribe import transcribe_audio_with_progress
+
+    config.sync()
+    filepath = job['filepath']
+    # 업로드 시점의 설정 (추론 워커가 다른 프로세스여도 같은 설정으로 처리)
+    options = dict(config.job_options(), **job.get('options', {}))
+    timings = {}
+    job_started = time.time()
+    vad_stats = None
+
+    def emit(event, **fields):
+        job_store.publish(job_id, event, **fields)
+
+    job_store.update(job_id, status='processing')
+
+    try:
+        # 작업당 한 번만 디코딩해서 길이 계산, Whisper, 화자 분리에 공유
+        emit({'stage': 'init', 'progress': 0, 'message': '파일 분석 중...'})
+        started = time.time()
+        decode_total.inc(source='predecoded' if os.path.exists(decoded_path(filepath)) else 'ffmpeg')
+        audio = load_audio(filepath)
+        discard_decoded(filepath)
+        duration = audio_duration(audio)
+        timings['decode'] = round(time.time() - started, 2)
+
+        emit({'stage': 'init', 'progress': 2, 'message': '파일 분석 완료', 'duration': duration, 'timings': dict(timings)})
+
+        # 화자 분리는 같은 디코딩 결과로 음성 인식과 병렬 실행
+        use_diarization = options['enable_diarization'] and config.hf_token
+        diarization_future = None
+        if use_diarization and options['parallel_diarization']:
+            diarization_future = diarization_executor.submit(diarize, audio, config.hf_token, timings)
+
+        # 무음 구간 제거 - 건너뛴 비율이 작으면 원본 그대로 사용
+        speech_audio, vad_offsets = audio, None
+        if options['enable_vad']:
+            started = time.time()
+            speech_audio, vad_offsets, vad_stats = skip_silence(audio, duration)
+            timings['vad'] = round(time.time() - started, 2)
+            print(f"[VAD] Speech {vad_stats['speech_seconds']:.1f}s / {duration:.1f}s (skipped {vad_stats['skipped_ratio']:.1%})")
+            emit({'stage': 'init', 'progress': 4, 'message': f"무음 구간 {vad_stats['skipped_ratio']:.0%} 건너뜀", 'vad': vad_stats}, vad=vad_stats)
+
+        emit({'stage': 'loading', 'progress': 5, 'message': '모델 로딩 중...'})
+
+        started = time.time()
+        with model_registry.use(job['model_id'], job['device_mode'], job['backend']) as model:
+            timings['model_load'] = round(time.time() - started, 2)
+
+            emit({'stage': 'processing', 'progress': 10, 'message': f'음성 인식 시작 (길이: {duration:.1f}초)' if duration else '음성 인식 시작...', 'duration': duration, 'timings': dict(timings)})
+
+            # 실제 변환 수행 - 윈도우가 끝날 때마다 진행률 전송 (10% ~ 80%)
+            print(f"[Transcribe] Starting transcription for {filepath} ({job['model_id']})")
+            started = time.time()
+
+            def on_window(done, total):
+                elapsed = time.time() - started
+                emit({
+                    'stage': 'processing',
+                    'progress': 10 + int(70 * done / total) if total else 10,
+                    'message': f'음성 인식 중... ({done}/{total})' if total else f'음성 인식 중... ({done})',
+                    'window': done,
+                    'windows': total,
+                    'eta': round(elapsed / done * (total - done), 1) if total else None
+                })
+
+            if options['enable_batching'] and model.batcher is not None:
+                result = model.batcher.transcribe(speech_audio, TRANSCRIBE_LANGUAGE, progress_callback=on_window)
+            else:
+                result = transcribe_audio_with_progress(
+                    model.pipe, speech_audio, TRANSCRIBE_LANGUAGE,
+                    progress_callback=lambda event: on_window(event['window'], event['windows']) if 'window' in event else None
+                )
+            transcribe_seconds = time.time() - started
+            timings['transcribe'] = round(transcribe_seconds, 2)
+
+        # 실시간 배율 (원본 오디오 길이 기준 - VAD로 건너뛴 구간도 포함)
+        device = model.device
+        audio_seconds_total.inc(duration, model=job['model_id'], device=device)
+        inference_seconds_total.inc(transcribe_seconds, model=job['model_id'], device=device)
+        if duration:
+            realtime_factor.observe(transcribe_seconds / duration, model=job['model_id'], device=device, backend=job['backend'])
+
+        # 음성 구간만 이어 붙였으면 타임스탬프를 원본 기준으로 복원
+        if vad_offsets is not None:
+            result = remap_timestamps(result, vad_offsets)
+        print(f"[Transcribe] Completed: {len(result.get('chunks', []))} chunks")
+
+        # 화자 분리 결과 병합 + 등록된 화자 이름 붙이기
+        chunks = result.get('chunks', [])
+        speakers = {}
+
+        if use_diarization:
+            started = time.time()
+            if diarization_future is not None:
+                emit({'stage': 'diarization', 'progress': 80, 'message': '화자 분리 완료 대기 중...', 'timings': dict(timings)})
+                diarization = diarization_future.result()
+            else:
+                emit({'stage': 'diarization', 'progress': 80, 'message': '화자 분리 중...', 'timings': dict(timings)})
+                diarization = diarize(audio, config.hf_token, timings)
+            timings['diarization_wait'] = round(time.time() - started, 2)
+
+            if diarization is not None:
+                started = time.time()
+                chunks, speakers = assign_speakers(chunks, diarization, speaker_index, options['split_on_speaker_change'])
+                timings['merge'] = round(time.time() - started, 2)
+
+        emit({'stage': 'processing', 'progress': 95, 'message': '결과 처리 중...'})
+
+        # 결과 저장
+        timings['total'] = round(time.time() - job_started, 2)
+        final = {'text': result['text'], 'chunks': chunks}
+        if speakers:
+            final['speakers'] = speakers
+        print(f"[Transcribe] Timings: {timings}")
+
+        if job.get('cache_key'):
+            result_cache.put(job['cache_key'], final)
+
+        emit(
+            {'stage': 'complete', 'progress': 100, 'message': f'변환 완료! ({len(chunks)}개 청크)', 'result': final, 'timings': timings, 'vad': vad_stats},
+            status='complete', result=final, timings=timings
+        )
+        jobs_finished_total.inc(kind='transcribe', status='complete')
+
+    except Exception as e:
+        import traceback
+        print(f"[Transcribe] Error: {e}")
+        traceback.print_exc()
+        emit({'stage': 'error', 'progress': 0, 'message': str(e)}, status='error')
+        jobs_finished_total.inc(kind='transcribe', status='error')
+        # 작업 큐의 실패 수에도 반영
+        raise
+
+    finally:
+        # 실패한 작업도 끝난 단계까지는 기록
+        for stage, seconds in list(timings.items()):
+            stage_seconds.observe(seconds, stage=stage)
+
+
+# 장치별 워커 수 (GPU는 모델 하나를 공유하므로 기본 1)
+WORKERS_CUDA = int(os.getenv('WORKERS_CUDA', '1'))
+WORKERS_CPU = int(os.getenv('WORKERS_CPU', '2'))
+
+# 음성 인식과 병렬로 도는 화자 분리 스레드 (작업 워커당 하나)
+diarization_executor = ThreadPoolExecutor(max_workers=WORKERS_CUDA + WORKERS_CPU, thread_name_prefix='diarization')
+
+job_queue = JobQueue(run_job, {
+    'cuda': WORKERS_CUDA,
+    'cpu': WORKERS_CPU,
+})
+
+
+def recover_jobs():
+    """재시작 전에 끝나지 않은 작업을 다시 큐에 등록 (큐를 실행하는 프로세스에서 한 번만 호출)"""
+    jobs = job_store.recover()
+    if not jobs:
+        return
+    job_queue.start()
+    for job in jobs:
+        job_queue.submit(job['id'], job.get('device', 'cpu'), job.get('priority', 0))
+
+
+# 스냅샷 시점의 프로세스별 상태 (작업 워커, 상주 모델, GPU 메모리, 캐시)
+worker_jobs = metrics.gauge('jj_worker_jobs', '이 프로세스 작업 큐의 작업 수', ['device', 'state'])
+model_resident_bytes = metrics.gauge('jj_model_resident_bytes', '상주 모델 메모리 (bytes)', ['device'])
+model_loads_total = metrics.counter('jj_model_loads_total', '모델 로드 횟수')
+gpu_memory_bytes = metrics.gauge('jj_gpu_memory_bytes', 'GPU 메모리 (torch 할당 기준)', ['gpu', 'kind'])
+result_cache_bytes = metrics.gauge('jj_result_cache_bytes', '변환 결과 캐시 크기 (bytes)')
+
 
-            # 실제 변환 수행
-            print(f"[Transcribe] Starting transcription for {filepath}")
-            result = transcribe_audio(pipe, filepath)
-            print(f"[Transcribe] Completed: {len(result.get('chunks', []))} chunks")
+def collect_process_metrics():
+    for device, stats in job_queue.stats()['devices'].items():
+        worker_jobs.set(stats['queued'], device=device, state='queued')
+        worker_jobs.set(stats['running'], device=device, state='running')
 
-            # 화자 분리 수행
-            chunks = result.get('chunks', [])
+    model_stats = model_registry.stats()
+    for device, used in model_stats['used'].items():
+        model_resident_bytes.set(used, device=device)
+    model_loads_total.set(model_stats['loads'])
 
-            if config.enable_diarization and config.hf_token:
-                yield f"data: {json.dumps({'stage': 'diarization', 'progress': 80, 'message': '화자 분리 중...'})}\n\n"
+    # torch를 불러오지 않은 웹 프로세스에서 torch/CUDA를 초기화하지 않도록 확인
+    torch = sys.modules.get('torch')
+    if torch is not None and torch.cuda.is_available() and torch.cuda.is_initialized():
+        for index in range(torch.cuda.device_count()):
+            gpu_memory_bytes.set(torch.cuda.memory_allocated(index), gpu=index, kind='allocated')
+            gpu_memory_bytes.set(torch.cuda.memory_reserved(index), gpu=index, kind='reserved')
+            gpu_memory_bytes.set(torch.cuda.max_memory_allocated(index), gpu=index, kind='max_allocated')
 
-                try:
-                    from diarization import perform_diarization, merge_transcription_with_diarization
+    cache_stats = result_cache.stats()
+    cache_lookups_total.set(cache_stats['hits'], cache='result', result='hit')
+    cache_lookups_total.set(cache_stats['misses'], cache='result', result='miss')
+    result_cache_bytes.set(cache_stats['bytes'])
 
-                    diarization_segments = perform_diarization(filepath, config.hf_token)
-                    chunks = merge_transcription_with_diarization(chunks, diarization_segments)
-                    print(f"[Diarization] Completed: {len(diarization_segments)} segments")
-                except ImportError:
-                    print("[Diarization] pyannote.audio가 설치되지 않았습니다")
-                except Exception as e:
-                    print(f"[Diarization] Error: {e}")
+    summary_stats = summary_cache.stats()
+    cache_lookups_total.set(summary_stats['hits'], cache='summary', result='hit')
+    cache_lookups_total.set(summary_stats['misses'], cache='summary', result='miss')
 
-            yield f"data: {json.dumps({'stage': 'processing', 'progress': 95, 'message': '결과 처리 중...'})}\n\n"
 
-            # 결과 저장
-            job_status[job_id]['result'] = {'text': result['text'], 'chunks': chunks}
-            job_status[job_id]['status'] = 'complete'
+metrics.on_collect(collect_process_metrics)
 
-            yield f"data: {json.dumps({'stage': 'complete', 'progress': 100, 'message': f'변환 완료! ({len(chunks)}개 청크)', 'result': {'text': result['text'], 'chunks': chunks}})}\n\n"
+# 작업 저장소 기준 값 (모든 프로세스가 같은 값을 보므로 스냅샷 공유 대상에서 제외)
+store_metrics = Registry()
+stored_jobs = store_metrics.gauge('jj_jobs', '저장된 작업 수', ['status'])
+queue_depth = store_metrics.gauge('jj_queue_depth', '실행을 기다리는 작업 수', ['device'])
 
-        except Exception as e:
-            import traceback
-            print(f"[Transcribe] Error: {e}")
-            traceback.print_exc()
-            yield f"data: {json.dumps({'stage': 'error', 'progress': 0, 'message': str(e)})}\n\n"
 
-    return Response(generate(), mimetype='text/event-stream')
+def collect_store_metrics():
+    for status, count in job_store.stats()['jobs'].items():
+        stored_jobs.set(count, status=status)
+    for device in ('cuda', 'cpu'):
+        queue_depth.set(job_store.queued_count(device), device=device)
+
+
+store_metrics.on_collect(collect_store_metrics)
+
+# 운영 모드에서는 프로세스별 메트릭을 공유 폴더로 모음
+if JOB_RUNNER == 'worker':
+    metrics_spool.start()
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus 메트릭 (운영 모드에서는 다른 웹/추론 워커 프로세스 값까지 합산)"""
+    snapshots = [metrics.snapshot(), store_metrics.snapshot()] + metrics_spool.read_others()
+    return Response(render_metrics(snapshots), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/transcribe/<job_id>')
+def transcribe_job(job_id):
+    """SSE로 변환 진행률 전송 (작업은 워커가 수행, 여기서는 이벤트만 전달)"""
+    if not job_store.exists(job_id):
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다'}), 404
+
+    # 재연결 시 마지막으로 받은 이벤트 이후부터 전송
+    try:
+        start = int(request.headers.get('Last-Event-ID', -1)) + 1
+    except ValueError:
+        start = 0
+
+    return Response(stream_job_events(job_id, start), mimetype='text/event-stream')
+
+
+# 진행 이벤트 없이 이 시간이 지나면 SSE 종료 (추론 워커가 없거나 작업이 멈춘 경우)
+SSE_MAX_IDLE_SECONDS = float(os.getenv('SSE_MAX_IDLE_SECONDS', '900'))
+
+
+def stream_job_events(job_id, start):
+    """
+    작업 이벤트를 SSE 형식으로 전송 (complete/error에서 종료, 이벤트가 없으면 keep-alive)
+
+    이벤트가 없을 때마다 작업 상태를 확인해서 작업이 사라졌거나 SSE_MAX_IDLE_SECONDS 동안 진행이 없으면 error로 종료
+    """
+    index = start
+    last_event = time.time()
+    while True:
+        events = job_store.read(job_id, index)
+        if not events:
+            job = job_store.get(job_id, with_result=False)
+            idle = time.time() - last_event
+            if job is not None and job['status'] == 'complete':
+                # 끝났는데 종료 이벤트가 없음 (이벤트만 정리된 경우) - 저장된 결과로 완료 전송
+                final = {'stage': 'complete', 'progress': 100, 'message': '변환 완료!', 'result': (job_store.get(job_id) or {}).get('result')}
+                yield f"id: {index}\ndata: {json.dumps(final)}\n\n"
+                return
+            if job is None:
+                message = '작업을 찾을 수 없습니다'
+            elif job['status'] == 'error':
+                message = job.get('message') or '작업이 실패했습니다'
+            elif idle > SSE_MAX_IDLE_SECONDS:
+                waiting = '시작되지 않았습니다 (추론 워커 확인)' if job['status'] == 'queued' else '진행되지 않았습니다'
+                message = f'작업이 {idle:.0f}초 동안 {waiting}'
+            else:
+                yield ": keep-alive\n\n"
+                continue
+            print(f"[SSE] Closing stream for {job_id}: {message}")
+            yield f"id: {index}\ndata: {json.dumps({'stage': 'error', 'progress': 0, 'message': message})}\n\n"
+            return
+
+        last_event = time.time()
+        for event in events:
+            yield f"id: {index}\ndata: {json.dumps(event)}\n\n"
+            index += 1
+            if event['stage'] in ('complete', 'error'):
+                return
+
+
+@app.route('/api/queue')
+def queue_stats():
+    """작업 큐 상태 (대기열 길이, 대기 시간)"""
+    return jsonify({
+        'success': True,
+        'stats': job_queue.stats(),
+        'batcher': model_registry.batcher_stats(),
+        'cache': result_cache.stats(),
+        'jobs': job_store.stats(),
+        'startup': startup
+    })
 
 
 @app.route('/job/<job_id>')
 def get_job_result(job_id):
     """작업 결과 조회"""
-    if job_id not in job_status:
+    job = job_store.get(job_id)
+    if job is None:
         return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다'}), 404
 
-    job = job_status[job_id]
     if job['status'] == 'complete' and job['result']:
         return jsonify({
             'success': True,
             'filename': job['filename'],
             'text': job['result']['text'],
-            'chunks': job['result'].get('chunks', [])
+            'chunks': job['result'].get('chunks', []),
+            'speakers': job['result'].get('speakers', {})
         })
 
     return jsonify({
@@ -312,36 +930,70 @@ def uploaded_file(filename):
 NOTES_FOLDER = 'notes'
 
 
-def get_notes_list():
-    """저장된 노트 목록 조회"""
-    notes = []
-    if os.path.exists(NOTES_FOLDER):
-        for filename in os.listdir(NOTES_FOLDER):
-            if filename.endswith('.json'):
-                filepath = os.path.join(NOTES_FOLDER, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        note = json.load(f)
-                        notes.append({
-                            'id': note.get('id'),
-                            'title': note.get('title'),
-                            'created_at': note.get('created_at'),
-                            'audio_filename': note.get('audio_filename'),
-                            'duration': note.get('duration')
-                        })
-                except:
-                    pass
-    # 최신순 정렬
-    notes.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-    return notes
+# 청크 저장 방식 (json: 노트 JSON 안에, columnar: 압축 열 단위 .chunks 파일)
+notes_store = NotesStore(
+    NOTES_FOLDER,
+    chunk_format=os.getenv('NOTES_CHUNK_FORMAT', 'json'),
+    compress=os.getenv('NOTES_CHUNK_COMPRESS', 'true').lower() == 'true'
+)
+
+# 전문 검색 색인 (노트 저장/삭제 시 해당 노트만 갱신)
+search_index = SearchIndex(os.path.join(NOTES_FOLDER, 'search.sqlite3'))
+if not search_index.is_built():
+    search_index.build(notes_store.iter_notes())
+
+# 등록된 화자 음성 벡터 색인 (회의가 달라도 같은 사람은 같은 이름으로)
+speaker_index = SpeakerIndex(
+    os.path.join(NOTES_FOLDER, 'speakers'),
+    threshold=float(os.getenv('SPEAKER_MATCH_THRESHOLD', '0.5'))
+)
+
+
+# 노트 목록 한 페이지 최대 개수
+NOTES_MAX_PAGE = 500
 
 
 @app.route('/api/notes', methods=['GET'])
 def list_notes():
-    """저장된 노트 목록"""
+    """저장된 노트 목록 (최신순, limit/cursor로 페이지 단위 조회 가능)"""
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    if limit is not None and limit < 1:
+        return jsonify({'success': False, 'error': 'limit은 1 이상이어야 합니다'}), 400
+    if limit is not None:
+        limit = min(limit, NOTES_MAX_PAGE)
+
+    notes, next_cursor = notes_store.list(limit, cursor)
+
     return jsonify({
         'success': True,
-        'notes': get_notes_list()
+        'notes': notes,
+        'next_cursor': next_cursor
+    })
+
+
+@app.route('/api/notes/search', methods=['GET'])
+def search_notes():
+    """녹취록 전문 검색 - 노트별 점수와 일치한 청크(타임스탬프, 화자) 반환"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': '검색어가 없습니다'}), 400
+
+    started = time.time()
+    results = search_index.search(query, limit=request.args.get('limit', 20, type=int))
+    meta = notes_store.meta([r['note_id'] for r in results])
+
+    notes = []
+    for r in results:
+        if r['note_id'] not in meta:
+            continue
+        notes.append(dict(meta[r['note_id']], score=r['score'], matches=r['matches']))
+
+    return jsonify({
+        'success': True,
+        'query': query,
+        'notes': notes,
+        'took_ms': round((time.time() - started) * 1000, 1)
     })
 
 
@@ -352,29 +1004,12 @@ def save_note():
     if not data:
         return jsonify({'success': False, 'error': '데이터가 없습니다'}), 400
 
-    note_id = data.get('id') or uuid.uuid4().hex
-    os.makedirs(NOTES_FOLDER, exist_ok=True)
-    filepath = os.path.join(NOTES_FOLDER, f'{note_id}.json')
-
-    # 기존 노트가 있으면 로드하여 병합
-    existing_note = {}
-    if os.path.exists(filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            existing_note = json.load(f)
-
-    # 기존 데이터에 새 데이터 병합 (새 데이터가 우선)
-    note = {
-        'id': note_id,
-        'title': data.get('title') or existing_note.get('title') or '새 노트',
-        'created_at': data.get('created_at') or existing_note.get('created_at') or time.strftime('%Y-%m-%d %H:%M:%S'),
-        'audio_filename': data.get('audio_filename') if 'audio_filename' in data else existing_note.get('audio_filename'),
-        'duration': data.get('duration') if 'duration' in data else existing_note.get('duration'),
-        'text': data.get('text') if 'text' in data else existing_note.get('text'),
-        'chunks': data.get('chunks') if 'chunks' in data else existing_note.get('chunks', [])
-    }
+    with stage_seconds.time(stage='note_save'):
+        note = notes_store.save(dict(data, id=data.get('id') or uuid.uuid4().hex))
 
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(note, f, ensure_ascii=False, indent=2)
+        # 본문이 바뀐 경우에만 다시 색인
+        if 'text' in data or 'chunks' in data:
+            search_index.index_note(note)
 
     return jsonify({
         'success': True,
@@ -386,32 +1021,91 @@ def save_note():
     })
 
 
-@app.route('/api/notes/<note_id>', methods=['GET'])
-def get_note(note_id):
-    """노트 조회"""
-    filepath = os.path.join(NOTES_FOLDER, f'{note_id}.json')
+@app.route('/api/notes/<note_id>', methods=['PATCH'])
+def patch_note(note_id):
+    """
+    노트 부분 편집 (청크 단위) - 전체 노트를 다시 쓰지 않고 편집 로그에 추가
 
-    if not os.path.exists(filepath):
+    요청 예: {"title": "...", "chunks": [{"index": 3, "text": "...", "speaker": "화자 2"}]}
+    """
+    edits = request.get_json()
+    if not isinstance(edits, dict) or not edits:
+        return jsonify({'success': False, 'error': '데이터가 없습니다'}), 400
+
+    started = time.time()
+    try:
+        note = notes_store.patch(note_id, edits)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    if note is None:
         return jsonify({'success': False, 'error': '노트를 찾을 수 없습니다'}), 404
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        note = json.load(f)
+    # 바뀐 청크만 다시 색인 (색인에 텍스트와 함께 화자, 타임스탬프도 저장하므로 세 필드 모두 확인)
+    changed = {
+        edit['index']: note['chunks'][edit['index']]
+        for edit in edits.get('chunks') or []
+        if any(field in edit for field in ('text', 'speaker', 'timestamp'))
+    }
+    if changed:
+        search_index.index_chunks(note_id, changed)
+    elif 'text' in edits and not note.get('chunks'):
+        search_index.index_note(note)
+    stage_seconds.observe(time.time() - started, stage='note_patch')
 
     return jsonify({
         'success': True,
-        'note': note
+        'note': {
+            'id': note['id'],
+            'title': note['title'],
+            'created_at': note['created_at']
+        },
+        'applied': len(edits.get('chunks') or [])
     })
 
 
+@app.route('/api/notes/stats', methods=['GET'])
+def notes_stats():
+    """노트 저장/편집 쓰기 통계 (write amplification 포함)"""
+    return jsonify({
+        'success': True,
+        'count': notes_store.count(),
+        'writes': notes_store.write_stats()
+    })
+
+
+@app.route('/api/notes/<note_id>', methods=['GET'])
+def get_note(note_id):
+    """노트 조회 (?start=&end=를 주면 그 시간 범위의 청크만)"""
+    start = request.args.get('start', type=float)
+    end = request.args.get('end', type=float)
+
+    if start is None and end is None:
+        note = notes_store.get(note_id)
+        indices = None
+    else:
+        note, indices = notes_store.get_range(note_id, start, end)
+
+    if note is None:
+        return jsonify({'success': False, 'error': '노트를 찾을 수 없습니다'}), 404
+
+    response = {
+        'success': True,
+        'note': note
+    }
+    if indices is not None:
+        # PATCH에서 쓸 원래 청크 index
+        response['chunk_indices'] = indices
+    return jsonify(response)
+
+
 @app.route('/api/notes/<note_id>', methods=['DELETE'])
 def delete_note(note_id):
     """노트 삭제"""
-    filepath = os.path.join(NOTES_FOLDER, f'{note_id}.json')
-
-    if not os.path.exists(filepath):
+    if not notes_store.delete(note_id):
         return jsonify({'success': False, 'error': '노트를 찾을 수 없습니다'}), 404
 
-    os.remove(filepath)
+    search_index.remove_note(note_id)
 
     return jsonify({
         'success': True,
@@ -419,9 +1113,411 @@ def delete_note(note_id):
     })
 
 
+# 화자 등록 관련 API
+@app.route('/api/speakers', methods=['GET'])
+def list_speakers():
+    """등록된 화자 목록"""
+    return jsonify({
+        'success': True,
+        'speakers': speaker_index.list(),
+        'threshold': speaker_index.threshold
+    })
+
+
+@app.route('/api/speakers', methods=['POST'])
+def enroll_speaker():
+    """
+    노트의 화자를 이름으로 등록 - 노트에 저장된 음성 벡터 사용 (오디오를 다시 분석하지 않음)
+
+    요청 예: {"note_id": "...", "speaker": "화자1", "name": "김철수"}
+    등록 후 해당 노트의 화자 라벨도 이름으로 바꿈
+    """
+    data = request.get_json() or {}
+    name = (data.get('name') or '').strip()
+    speaker = data.get('speaker')
+    if not name or not speaker or not data.get('note_id'):
+        return jsonify({'success': False, 'error': 'note_id, speaker, name이 필요합니다'}), 400
+
+    note = notes_store.get(data['note_id'])
+    if note is None:
+        return jsonify({'success': False, 'error': '노트를 찾을 수 없습니다'}), 404
+
+    speakers = dict(note.get('speakers') or {})
+    info = speakers.get(speaker)
+    if not info or not info.get('embedding'):
+        return jsonify({'success': False, 'error': '화자 음성 정보가 없습니다 (화자 분리를 사용해 다시 변환하세요)'}), 400
+
+    try:
+        enrolled = speaker_index.enroll(name, info['embedding'])
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    # 노트의 화자 라벨을 이름으로 변경 (이미 같은 이름의 화자가 있으면 그쪽 음성 정보 유지)
+    del speakers[speaker]
+    speakers.setdefault(name, dict(info, speaker_id=enrolled['id'], similarity=None))
+    chunks = [dict(chunk, speaker=name) if chunk.get('speaker') == speaker else chunk for chunk in note.get('chunks', [])]
+
+    with stage_seconds.time(stage='note_save'):
+        note = notes_store.save(dict(note, chunks=chunks, speakers=speakers))
+        search_index.index_note(note)
+
+    return jsonify({
+        'success': True,
+        'speaker': enrolled,
+        'note': {'id': note['id'], 'title': note['title'], 'created_at': note['created_at']}
+    })
+
+
+@app.route('/api/speakers/<speaker_id>', methods=['DELETE'])
+def delete_speaker(speaker_id):
+    """등록된 화자 삭제 (이미 이름이 붙은 노트는 그대로)"""
+    if not speaker_index.remove(speaker_id):
+        return jsonify({'success': False, 'error': '화자를 찾을 수 없습니다'}), 404
+
+    return jsonify({
+        'success': True,
+        'message': '화자가 삭제되었습니다'
+    })
+
+
+# 회의록 요약 (구간별 요약을 내용 해시로 캐시 - 다시 요약/검증할 때 바뀐 구간만 LLM 호출)
+summary_cache = ResultCache(os.path.join(CACHE_FOLDER, 'summaries'), int(os.getenv('SUMMARY_CACHE_MAX_MB', '256')) * 1024 * 1024)
+summarizer = Summarizer(summary_cache, segment_chars=int(os.getenv('SUMMARY_SEGMENT_CHARS', '6000')))
+
+# LLM 서버별 동시 연결 수
+SUMMARY_MAX_CONNECTIONS = int(os.getenv('SUMMARY_MAX_CONNECTIONS', '4'))
+
+
+# 클라이언트가 지정할 수 있는 LLM 서버 주소 접두사 (쉼표 구분 - 기본은 웹 UI 프리셋의 공개 API만, 목록 밖은 모두 거부)
+LLM_ALLOWED_URLS = [
+    u.strip().rstrip('/')
+    for u in os.getenv('LLM_ALLOWED_URLS', 'https://api.openai.com/v1,https://api.anthropic.com/v1').split(',')
+    if u.strip()
+]
+
+
+def llm_url_allowed(api_url):
+    """클라이언트 LLM 주소가 허용 목록에 있는지 확인"""
+    url = api_url.rstrip('/')
+    return any(url == prefix or url.startswith(prefix + '/') for prefix in LLM_ALLOWED_URLS)
+
+
+def summary_request(data):
+    """요약/검증 요청 공통 검증 - (LLM 클라이언트, 청크, 오류 메시지)"""
+    chunks = data.get('chunks')
+    if chunks is None and data.get('note_id'):
+        note = notes_store.get(data['note_id'])
+        chunks = note.get('chunks') if note else None
+    if not chunks:
+        return None, None, '요약할 녹취록이 없습니다'
+    if not all(isinstance(c, dict) and isinstance(c.get('timestamp'), list) and len(c['timestamp']) == 2 for c in chunks):
+        return None, None, '잘못된 청크 형식입니다'
+
+    # 요청에 없으면 서버 설정 사용 (로컬 OpenAI 호환 서버 등)
+    # 서버 키(LLM_API_KEY)는 서버 URL(LLM_API_URL)에만 보냄 - 클라이언트가 고른 URL로 키가 새지 않도록
+    llm = data.get('llm') or {}
+    server_url = os.getenv('LLM_API_URL', '')
+    api_url = llm.get('api_url') or server_url
+    model = llm.get('model') or os.getenv('LLM_MODEL', '')
+    if not api_url or not model:
+        return None, None, 'API URL과 모델명을 입력하세요'
+
+    if api_url.rstrip('/') == server_url.rstrip('/'):
+        api_key = llm.get('api_key') or os.getenv('LLM_API_KEY', '')
+    else:
+        # 서버가 클라이언트 URL로 요청을 대신 보내므로 허용 목록(LLM_ALLOWED_URLS)에 없는 주소는 키가 있어도 거부 (SSRF 방지)
+        if not llm_url_allowed(api_url):
+            return None, None, '허용되지 않은 LLM 서버입니다 (LLM_ALLOWED_URLS)'
+        api_key = llm.get('api_key') or ''
+
+    try:
+        client = LLMClient(api_url, api_key, model, SUMMARY_MAX_CONNECTIONS)
+    except ValueError as e:
+        return None, None, str(e)
+    return client, chunks, None
+
+
+@app.route('/api/summarize', methods=['POST'])
+def summarize_transcript():
+    """회의록 생성 - {chunks 또는 note_id, template?, llm: {api_url, api_key, model}}"""
+    data = request.get_json() or {}
+    client, chunks, error = summary_request(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+
+    try:
+        with stage_seconds.time(stage='summarize'):
+            summary, stats = summarizer.summarize(client, chunks, data.get('template') or '')
+    except LLMError as e:
+        print(f"[Summary] Error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 502
+
+    print(f"[Summary] {stats['segments']} segments, {stats['llm_calls']} LLM calls, {stats['cache_hits']} cached ({stats['took_ms']}ms)")
+    return jsonify({'success': True, 'summary': summary, 'stats': stats})
+
+
+@app.route('/api/summarize/verify', methods=['POST'])
+def verify_summary():
+    """요약 검증 - {chunks 또는 note_id, summary, llm} (구간별로 그 구간을 인용한 항목과 비교)"""
+    data = request.get_json() or {}
+    if not (data.get('summary') or '').strip():
+        return jsonify({'success': False, 'error': '검증할 요약이 없습니다'}), 400
+
+    client, chunks, error = summary_request(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+
+    try:
+        with stage_seconds.time(stage='verify'):
+            result, stats = summarizer.verify(client, chunks, data['summary'])
+    except LLMError as e:
+        print(f"[Summary] Verify error: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 502
+
+    print(f"[Summary] Verified {stats['segments']} segments, {stats['llm_calls']} LLM calls, {stats['cache_hits']} cached ({stats['took_ms']}ms)")
+    return jsonify({'success': True, 'result': result, 'stats': stats})
+
+
+# 실시간 스트리밍 변환 (WebSocket - flask-sock 필요: uv sync --extra stream)
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+except ImportError:
+    Sock = None
+
+# 새 오디오가 이만큼 쌓일 때마다 다시 디코딩 (partial 갱신 주기, 초)
+STREAM_STEP_SECONDS = float(os.getenv('STREAM_STEP_SECONDS', '1.0'))
+# 확정되지 않은 오디오 최대 길이 (초)
+STREAM_MAX_BUFFER_SECONDS = float(os.getenv('STREAM_MAX_BUFFER_SECONDS', '20'))
+
+# 실시간 변환은 지연 시간 때문에 작업 저장소를 거치지 않고 연결을 받은 프로세스에서 바로 추론
+# inline 모드는 이 프로세스, 운영 모드는 웹 워커에 모델이 올라가지 않도록 전용 프로세스 하나만 (uv run serve --stream)
+STREAM_SERVING = os.getenv('STREAM_SERVING', '1' if JOB_RUNNER == 'inline' else '0') == '1'
+# 브라우저가 연결할 실시간 변환 주소 (비우면 같은 호스트의 /ws/transcribe)
+STREAM_URL = os.getenv('STREAM_URL', '')
+# 프로세스당 동시 실시간 세션 수 (모델 하나를 나눠 쓰므로 넘으면 바로 거절)
+STREAM_MAX_SESSIONS = int(os.getenv('STREAM_MAX_SESSIONS', '2'))
+stream_slots = threading.BoundedSemaphore(STREAM_MAX_SESSIONS)
+
+stream_latency_seconds = metrics.histogram(
+    'jj_stream_latency_seconds', '실시간 변환 지연 시간 (오디오 수신 → 결과 전송, 초)', ['kind'],
+    buckets=(0.1, 0.25, 0.5, 1, 1.5, 2, 3, 5, 10)
+)
+active_streams = metrics.gauge('jj_streams_active', '진행 중인 실시간 변환 세션 수')
+
+# 진행 중인 세션 (세션 id → StreamingTranscriber)
+stream_sessions = {}
+
+metrics.on_collect(lambda: active_streams.set(len(stream_sessions)))
+
+
+def stream_transcription(ws):
+    """
+    실시간 변환 (WebSocket /ws/transcribe)
+
+    1. 텍스트 {"type": "start", "format": "s16le" | "f32le", "sample_rate": 16000, "title"?, "diarization"?, "model_id"?, "device_mode"?}
+    2. 바이너리 PCM 프레임 (16kHz 모노) → {"type": "partial", "text"} / {"type": "final", "chunks"}
+    3. 텍스트 {"type": "stop"} → 남은 오디오 확정 + (선택) 화자 분리 후 노트 저장 → {"type": "done", "note", "chunks"}
+
+    연결이 끊겨도 받은 만큼은 노트로 저장
+    """
+    def send(message):
+        try:
+            ws.send(json.dumps(message, ensure_ascii=False))
+        except ConnectionClosed:
+            pass
+
+    try:
+        start = json.loads(ws.receive(timeout=30) or 'null')
+    except ConnectionClosed:
+        return
+    except (TypeError, ValueError):
+        start = None
+    if not isinstance(start, dict) or start.get('type') != 'start':
+        send({'type': 'error', 'message': '시작 메시지가 없습니다'})
+        return
+
+    fmt = start.get('format', 's16le')
+    if fmt not in PCM_FORMATS:
+        send({'type': 'error', 'message': f'지원하지 않는 PCM 형식입니다 ({", ".join(PCM_FORMATS)})'})
+        return
+    if start.get('sample_rate', SAMPLE_RATE) != SAMPLE_RATE:
+        send({'type': 'error', 'message': f'{SAMPLE_RATE}Hz 모노 오디오만 받을 수 있습니다'})
+        return
+
+    settings, error = job_settings(start)
+    if error:
+        send({'type': 'error', 'message': error})
+        return
+    model_id, device_mode = settings['model_id'], settings['device_mode']
+    backend = effective_backend(device_mode, config.cpu_backend, config.gpu_backend)
+
+    # 받은 오디오는 재생/화자 분리용으로 그대로 기록
+    session_id = uuid.uuid4().hex
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    recorder = WavRecorder(os.path.join(app.config['UPLOAD_FOLDER'], f'.{session_id}.wav'))
+
+    send({'type': 'status', 'message': '모델 로딩 중...'})
+    try:
+        with model_registry.use(model_id, device_mode, backend) as model:
+            # gevent 웹 워커에서는 배치 엔진 스레드 대신 네이티브 스레드 풀에서 바로 추론
+            batcher = model.batcher if config.enable_batching and not in_gevent_worker() else None
+
+            def decode(audio):
+                from transcribe import transcribe_audio
+
+                if batcher is not None:
+                    return batcher.transcribe(audio, TRANSCRIBE_LANGUAGE)['chunks']
+                return transcribe_audio(model.pipe, audio, TRANSCRIBE_LANGUAGE).get('chunks', [])
+
+            transcriber = StreamingTranscriber(decode, step_seconds=STREAM_STEP_SECONDS, max_buffer_seconds=STREAM_MAX_BUFFER_SECONDS)
+            stream_sessions[session_id] = transcriber
+            print(f"[Stream] Session {session_id} started ({model_id}, {model.device})")
+            send({'type': 'ready', 'session_id': session_id})
+
+            def forward(events):
+                for event in events:
+                    if 'latency' in event and (event['type'] == 'final' or event['text']):
+                        stream_latency_seconds.observe(event['latency'], kind=event['type'])
+                    send(event)
+
+            try:
+                while True:
+                    try:
+                        message = ws.receive()
+                    except ConnectionClosed:
+                        print(f"[Stream] Session {session_id} disconnected, saving received audio")
+                        break
+
+                    if isinstance(message, (bytes, bytearray)):
+                        try:
+                            samples = pcm_to_float(bytes(message), fmt)
+                        except ValueError as e:
+                            send({'type': 'error', 'message': str(e)})
+                            continue
+                        recorder.write(samples)
+                        forward(run_blocking(transcriber.feed, samples))
+                        continue
+
+                    try:
+                        control = json.loads(message)
+                    except (TypeError, ValueError):
+                        control = {}
+                    if control.get('type') == 'stop':
+                        break
+
+                send({'type': 'status', 'message': '남은 음성 변환 중...'})
+                forward(run_blocking(transcriber.finish))
+            finally:
+                stream_sessions.pop(session_id, None)
+                recorder.close()
+    except Exception as e:
+        import traceback
+        print(f"[Stream] Error: {e}")
+        traceback.print_exc()
+        recorder.close()
+        if not recorder.samples:
+            os.remove(recorder.path)
+            send({'type': 'error', 'message': str(e)})
+            return
+        # 받은 녹음은 버리지 않고 업로드 파일로 남김 (일반 변환으로 다시 처리 가능)
+        with open(recorder.path, 'rb') as f:
+            audio_hash = hash_stream(f)
+        filename = store_upload(recorder.path, f"live_{time.strftime('%Y%m%d_%H%M%S')}.wav", audio_hash)
+        send({'type': 'error', 'message': f'{e} (녹음은 {filename}으로 저장되었습니다)', 'filename': filename})
+        return
+
+    stats = transcriber.stats()
+    stage_seconds.observe(transcriber.decode_seconds, stage='stream_decode')
+    print(f"[Stream] Session {session_id} finished: {stats}")
+
+    if not recorder.samples:
+        os.remove(recorder.path)
+        send({'type': 'error', 'message': '받은 오디오가 없습니다'})
+        return
+
+    with open(recorder.path, 'rb') as f:
+        audio_hash = hash_stream(f)
+    filename = store_upload(recorder.path, f"live_{time.strftime('%Y%m%d_%H%M%S')}.wav", audio_hash)
+
+    # 화자 분리는 전체 녹음으로 끝난 뒤에 한 번 (요청에 없으면 현재 설정)
+    chunks = transcriber.chunks
+    speakers = {}
+    timings = {'stream_decode': round(transcriber.decode_seconds, 2)}
+    use_diarization = start.get('diarization', config.enable_diarization) and config.hf_token
+    if use_diarization and chunks:
+        send({'type': 'status', 'message': '화자 분리 중...'})
+        audio = load_audio(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+        diarization = run_blocking(diarize, audio, config.hf_token, timings)
+        chunks, speakers = assign_speakers(chunks, diarization, speaker_index, config.split_on_speaker_change)
+        stage_seconds.observe(timings['diarization'], stage='diarization')
+
+    with stage_seconds.time(stage='note_save'):
+        note = notes_store.save({
+            'id': uuid.uuid4().hex,
+            'title': start.get('title') or f"실시간 {time.strftime('%Y-%m-%d %H:%M')}",
+            'audio_filename': filename,
+            'duration': transcriber.duration,
+            'text': ' '.join(chunk['text'] for chunk in chunks),
+            'chunks': chunks,
+            'speakers': speakers
+        })
+        search_index.index_note(note)
+
+    send({
+        'type': 'done',
+        'note': {'id': note['id'], 'title': note['title'], 'created_at': note['created_at']},
+        'filename': filename,
+        'duration': transcriber.duration,
+        'chunks': chunks,
+        'stats': stats,
+        'timings': timings
+    })
+
+
+# 모듈 import 완료 (웹 프로세스는 여기까지 torch/transformers를 불러오지 않아야 함)
+startup['import_seconds'] = _startup_phase('import', _import_started)
+startup['ml_loaded'] = 'torch' in sys.modules
+print(f"[Startup] App imported in {startup['import_seconds']}s (ML libraries loaded: {'yes' if startup['ml_loaded'] else 'no'})")
+
+
+def serve_stream(ws):
+    """/ws/transcribe 진입점 - 동시 세션 수 제한"""
+    if not stream_slots.acquire(blocking=False):
+        try:
+            ws.send(json.dumps({'type': 'error', 'message': f'실시간 변환 세션이 가득 찼습니다 (최대 {STREAM_MAX_SESSIONS}개)'}, ensure_ascii=False))
+        except ConnectionClosed:
+            pass
+        return
+    try:
+        stream_transcription(ws)
+    finally:
+        stream_slots.release()
+
+
+if Sock is not None and STREAM_SERVING:
+    Sock(app).route('/ws/transcribe')(serve_stream)
+elif Sock is not None:
+    @app.route('/ws/transcribe')
+    def stream_elsewhere():
+        return jsonify({'success': False, 'error': '이 서버 프로세스는 실시간 변환을 처리하지 않습니다 (STREAM_URL의 실시간 변환 프로세스에 연결하세요)'}), 404
+else:
+    @app.route('/ws/transcribe')
+    def stream_unavailable():
+        return jsonify({'success': False, 'error': '실시간 변환을 사용하려면 flask-sock을 설치하세요 (uv sync --extra stream)'}), 501
+
+
 def main():
     os.makedirs('uploads', exist_ok=True)
     os.makedirs(NOTES_FOLDER, exist_ok=True)
+
+    # 기본 모델은 서버가 요청을 받기 시작할 때 백그라운드에서 미리 로드 (MODEL_WARMUP)
+    # (debug 리로더의 부모 프로세스에서는 로드하지 않음)
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        threading.Thread(target=warm_up, name='model-warmup', daemon=True).start()
+        if JOB_RUNNER == 'inline':
+            recover_jobs()
+
     app.run(debug=True, port=5000, host='0.0.0.0', threaded=True)
 
 
@@ -0,0 +1,184 @@
+"""오디오 디코딩 모듈 (ffmpeg PCM 파이프 → float32 NumPy)"""
+
+import os
+import shutil
+import subprocess
+import threading
+from typing import Iterator
+
+import numpy as np
+
+# Whisper, pyannote 모두 16kHz 모노 입력 사용
+SAMPLE_RATE = 16000
+
+# ffmpeg stdout에서 한 번에 읽는 크기
+READ_BYTES = 1 << 20
+
+
+def _ffmpeg_command(audio_path: str, sampling_rate: int):
+    return [
+        'ffmpeg', '-nostdin', '-v', 'error',
+        '-i', audio_path,
+        '-f', 'f32le',           # float32 little-endian PCM
+        '-acodec', 'pcm_f32le',
+        '-ar', str(sampling_rate),  # 16kHz로 리샘플링
+        '-ac', '1',              # 모노
+        'pipe:1'
+    ]
+
+
+def stream_audio(audio_path: str, block_seconds: float = 30, sampling_rate: int = SAMPLE_RATE) -> Iterator[np.ndarray]:
+    """
+    오디오를 block_seconds 단위 float32 블록으로 스트리밍 디코딩
+
+    임시 파일 없이 ffmpeg stdout을 바로 읽으므로 메모리는 블록 크기만큼만 사용
+    """
+    if not os.path.exists(audio_path):
+        raise FileNotFoundError(audio_path)
+
+    block_bytes = int(block_seconds * sampling_rate) * 4
+
+    try:
+        process = subprocess.Popen(
+            _ffmpeg_command(audio_path, sampling_rate),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg이 설치되지 않았습니다")
+
+    buffer = bytearray()
+    try:
+        while True:
+            data = process.stdout.read(READ_BYTES)
+            if not data:
+                break
+            buffer.extend(data)
+            while len(buffer) >= block_bytes:
+                yield np.frombuffer(bytes(buffer[:block_bytes]), dtype=np.float32)
+                del buffer[:block_bytes]
+
+        # float32 경계에 맞춰 남은 샘플 반환
+        tail = len(buffer) - len(buffer) % 4
+        if tail:
+            yield np.frombuffer(bytes(buffer[:tail]), dtype=np.float32)
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg 디코딩 실패: {stderr.decode(errors='replace')}")
+
+
+def decoded_path(audio_path: str) -> str:
+    """업로드 중에 미리 디코딩한 PCM 파일 위치 (<폴더>/.pcm/<파일명>.f32)"""
+    folder, name = os.path.split(audio_path)
+    return os.path.join(folder, '.pcm', f'{name}.f32')
+
+
+def discard_decoded(audio_path: str):
+    """미리 디코딩한 PCM 삭제 (작업에서 읽은 뒤에는 필요 없음)"""
+    try:
+        os.remove(decoded_path(audio_path))
+    except FileNotFoundError:
+        pass
+
+
+class PipeDecoder:
+    """
+    앞에서부터 받은 바이트를 ffmpeg stdin으로 흘려 디코딩 (업로드가 끝나기 전에 디코딩 시작)
+
+    디코딩 결과는 tmp_path에 바로 기록하고, finish()에서 decoded_path(오디오 경로)로 옮김
+    mp4/m4a처럼 파일 끝의 정보가 필요한 형식은 ffmpeg이 실패하므로 finish()가 False를 반환하고,
+    그때는 작업에서 평소처럼 파일을 디코딩함
+    """
+
+    def __init__(self, tmp_path: str, sampling_rate: int = SAMPLE_RATE):
+        self.tmp_path = tmp_path
+        self.failed = False
+        try:
+            self.process = subprocess.Popen(
+                _ffmpeg_command('pipe:0', sampling_rate),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except FileNotFoundError:
+            self.process = None
+            self.failed = True
+            return
+
+        # stdout을 계속 비워야 ffmpeg이 stdin 쓰기에서 막히지 않음
+        self._out = open(tmp_path, 'wb')
+        self._reader = threading.Thread(
+            target=shutil.copyfileobj, args=(self.process.stdout, self._out, READ_BYTES),
+            name='pipe-decoder', daemon=True
+        )
+        self._reader.start()
+
+    def feed(self, data: bytes):
+        if self.failed:
+            return
+        try:
+            self.process.stdin.write(data)
+        except OSError:
+            self.failed = True
+
+    def finish(self, audio_path: str) -> bool:
+        """입력을 닫고 디코딩 결과를 decoded_path(audio_path)로 옮김 (실패 시 False)"""
+        if self.process is None:
+            return False
+        try:
+            self.process.stdin.close()
+        except OSError:
+            self.failed = True
+        returncode = self.process.wait()
+        self._close()
+
+        if self.failed or returncode != 0 or os.path.getsize(self.tmp_path) < 4:
+            os.remove(self.tmp_path)
+            return False
+
+        path = decoded_path(audio_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.tmp_path, path)
+        return True
+
+    def abort(self):
+        if self.process is None:
+            return
+        self.failed = True
+        self.process.kill()
+        self.process.wait()
+        self._close()
+        os.remove(self.tmp_path)
+
+    def _close(self):
+        self._reader.join()
+        self._out.close()
+        self.process.stdout.close()
+
+
+def load_audio(audio_path: str, sampling_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """오디오 전체를 float32 배열로 한 번 디코딩 (Whisper/pyannote/길이 계산에서 공유)"""
+    pcm_path = decoded_path(audio_path)
+    if sampling_rate == SAMPLE_RATE and os.path.exists(pcm_path):
+        # 업로드 중에 이미 디코딩된 결과
+        audio = np.fromfile(pcm_path, dtype='<f4')
+        print(f"[Audio] Using pre-decoded {audio_path}: {len(audio) / sampling_rate:.1f}s")
+        return audio
+
+    blocks = list(stream_audio(audio_path, sampling_rate=sampling_rate))
+    if not blocks:
+        return np.zeros(0, dtype=np.float32)
+
+    audio = np.concatenate(blocks)
+    print(f"[Audio] Decoded {audio_path}: {len(audio) / sampling_rate:.1f}s ({audio.nbytes / 1024 / 1024:.1f}MB)")
+    return audio
+
+
+def audio_duration(audio: np.ndarray, sampling_rate: int = SAMPLE_RATE) -> float:
+    """디코딩된 오디오의 길이(초)"""
+    return len(audio) / float(sampling_rate)
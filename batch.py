@@ -0,0 +1,297 @@
+"""폴더 단위 일괄 변환 CLI (보관된 녹음 파일을 노트로 한꺼번에 저장)
+
+- 모델은 한 번만 로드하고, 여러 파일의 30초 윈도우를 배치 엔진(WhisperBatcher)으로 함께 추론
+- 파일별 디코딩 / 음성 인식 / 화자 분리가 워커 풀에서 겹쳐서 진행
+- 끝난 파일은 체크포인트(JSONL)에 기록하므로 중단 후 다시 실행하면 남은 파일만 처리
+- 결과는 웹 서버와 같은 노트 저장소 + 검색 색인에 바로 저장 (오디오는 uploads/에 복사해 재생 가능)
+
+사용 예:
+    uv run batch /archive/2024 --recursive --workers 4
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from audio import load_audio, audio_duration
+from cache import UploadIndex, hash_stream
+from devices import CPU_BACKENDS, GPU_BACKENDS
+from notes_store import NotesStore
+from pipeline import skip_silence, diarize, assign_speakers, safe_upload_name
+from search_index import SearchIndex
+from speakers import SpeakerIndex
+from vad import remap_timestamps
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.m4a', '.flac')
+
+UPLOAD_FOLDER = 'uploads'
+NOTES_FOLDER = 'notes'
+CACHE_FOLDER = 'cache'
+
+
+def find_audio_files(folder: str, recursive: bool = False) -> List[str]:
+    """폴더 안의 오디오 파일 (경로 순 정렬)"""
+    if not recursive:
+        names = sorted(os.listdir(folder))
+        return [os.path.join(folder, name) for name in names if name.lower().endswith(AUDIO_EXTENSIONS)]
+
+    paths = []
+    for root, dirs, names in os.walk(folder):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        paths += [os.path.join(root, name) for name in sorted(names) if name.lower().endswith(AUDIO_EXTENSIONS)]
+    return paths
+
+
+class Checkpoint:
+    """
+    처리 결과 기록 (JSONL, 한 줄에 파일 하나) - 같은 경로/크기/수정 시간으로 끝난 파일은 건너뜀
+
+    파일이 바뀌면(크기나 수정 시간이 다르면) 다시 처리
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 중단되며 잘린 마지막 줄
+                        continue
+                    self._entries[entry['path']] = entry
+
+    @staticmethod
+    def _stat(path: str) -> Dict:
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+    def is_done(self, path: str) -> bool:
+        entry = self._entries.get(os.path.abspath(path))
+        return entry is not None and entry['status'] == 'done' and entry['stat'] == self._stat(path)
+
+    def failed(self) -> List[str]:
+        return [path for path, entry in self._entries.items() if entry['status'] == 'error']
+
+    def record(self, path: str, status: str, **fields):
+        entry = dict(fields, path=os.path.abspath(path), status=status, stat=self._stat(path), at=time.time())
+        with self._lock:
+            self._entries[entry['path']] = entry
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def default_checkpoint(folder: str) -> str:
+    """폴더별 체크포인트 위치 (cache/batch/<폴더 경로 해시>.jsonl - 원본 폴더에는 쓰지 않음)"""
+    digest = hashlib.sha256(os.path.abspath(folder).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(CACHE_FOLDER, 'batch', f'{digest}.jsonl')
+
+
+class BatchTranscriber:
+    """모델 하나를 여러 파일이 공유하는 일괄 변환기"""
+
+    def __init__(self, model_id: str, device_mode: str, backend: str, language: str, hf_token: Optional[str],
+                 enable_vad: bool = True, split_on_speaker_change: bool = False, batch_size: int = 8, copy_audio: bool = True,
+                 gpu_backend: str = 'torch'):
+        from transcribe import load_whisper_model, WhisperBatcher
+
+        self.model_id = model_id
+        self.language = language
+        self.hf_token = hf_token
+        self.enable_vad = enable_vad
+        self.split_on_speaker_change = split_on_speaker_change
+        self.copy_audio = copy_audio
+
+        started = time.time()
+        pipe = load_whisper_model(model_id, device_mode, backend, gpu_backend, warmup_batch_size=batch_size)
+        self.batcher = WhisperBatcher(pipe, batch_size, max_wait_ms=50)
+        print(f"[Batch] Model loaded: {model_id} ({time.time() - started:.1f}s)")
+
+        # 화자 분리는 음성 인식과 겹쳐서 실행
+        self.diarization_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='diarization') if hf_token else None
+
+        self.notes_store = NotesStore(
+            NOTES_FOLDER,
+            chunk_format=os.getenv('NOTES_CHUNK_FORMAT', 'json'),
+            compress=os.getenv('NOTES_CHUNK_COMPRESS', 'true').lower() == 'true'
+        )
+        self.search_index = SearchIndex(os.path.join(NOTES_FOLDER, 'search.sqlite3'))
+        self.speaker_index = SpeakerIndex(
+            os.path.join(NOTES_FOLDER, 'speakers'),
+            threshold=float(os.getenv('SPEAKER_MATCH_THRESHOLD', '0.5'))
+        )
+        self.upload_index = UploadIndex(os.path.join(CACHE_FOLDER, 'uploads.sqlite3'), UPLOAD_FOLDER)
+
+    def close(self):
+        self.batcher.close()
+        if self.diarization_executor is not None:
+            self.diarization_executor.shutdown()
+
+    def _store_audio(self, path: str, audio_hash: str) -> str:
+        """재생용 오디오를 uploads/로 복사 (같은 내용이 이미 있으면 재사용) - 파일명 반환"""
+        filename, _ = self.upload_index.store(path, safe_upload_name(os.path.basename(path)), audio_hash, move=False)
+        return filename
+
+    def process(self, path: str) -> Dict:
+        """파일 하나 변환 후 노트로 저장 - 체크포인트에 남길 정보 반환"""
+        timings = {}
+
+        started = time.time()
+        with open(path, 'rb') as f:
+            audio_hash = hash_stream(f)
+        audio = load_audio(path)
+        duration = audio_duration(audio)
+        timings['decode'] = round(time.time() - started, 2)
+
+        diarization_future = None
+        if self.diarization_executor is not None:
+            diarization_future = self.diarization_executor.submit(diarize, audio, self.hf_token)
+
+        speech_audio, vad_offsets = audio, None
+        if self.enable_vad:
+            speech_audio, vad_offsets, _ = skip_silence(audio, duration)
+
+        started = time.time()
+        result = self.batcher.transcribe(speech_audio, self.language)
+        if vad_offsets is not None:
+            result = remap_timestamps(result, vad_offsets)
+        timings['transcribe'] = round(time.time() - started, 2)
+
+        chunks = result.get('chunks', [])
+        speakers = {}
+        if diarization_future is not None:
+            started = time.time()
+            diarization = diarization_future.result()
+            timings['diarization_wait'] = round(time.time() - started, 2)
+            chunks, speakers = assign_speakers(chunks, diarization, self.speaker_index, self.split_on_speaker_change)
+
+        audio_filename = self._store_audio(path, audio_hash) if self.copy_audio else None
+
+        # 같은 오디오는 같은 노트 id - 다시 실행해도 노트가 중복되지 않음
+        note = self.notes_store.save({
+            'id': audio_hash[:32],
+            'title': os.path.splitext(os.path.basename(path))[0],
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(os.path.getmtime(path))),
+            'audio_filename': audio_filename,
+            'duration': duration,
+            'text': result['text'],
+            'chunks': chunks,
+            'speakers': speakers
+        })
+        self.search_index.index_note(note)
+
+        return {'note_id': note['id'], 'sha256': audio_hash, 'duration': duration, 'chunks': len(chunks), 'timings': timings}
+
+
+def run_batch(folder: str, transcriber: BatchTranscriber, checkpoint: Checkpoint, workers: int = 2,
+              recursive: bool = False, retry_failed: bool = True) -> Dict:
+    """폴더의 남은 파일을 워커 풀로 처리 - 요약 통계 반환"""
+    paths = find_audio_files(folder, recursive)
+    remaining = [path for path in paths if not checkpoint.is_done(path)]
+    failed = set(checkpoint.failed())
+    pending = [path for path in remaining if retry_failed or os.path.abspath(path) not in failed]
+    print(f"[Batch] {len(paths)} files, {len(paths) - len(remaining)} already done, {len(remaining) - len(pending)} failed before (skipped), {len(pending)} to process")
+
+    started = time.time()
+    done = errors = 0
+    audio_seconds = 0.0
+
+    # 워커 수만큼만 동시에 디코딩된 오디오를 메모리에 둠
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as executor:
+        futures = {executor.submit(transcriber.process, path): path for path in pending}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                info = future.result()
+            except Exception as e:
+                errors += 1
+                checkpoint.record(path, 'error', error=str(e))
+                print(f"[Batch] ({done + errors}/{len(pending)}) Error {path}: {e}")
+                continue
+
+            done += 1
+            audio_seconds += info['duration']
+            checkpoint.record(path, 'done', **info)
+            print(f"[Batch] ({done + errors}/{len(pending)}) {path}: {info['duration']:.0f}s, {info['chunks']} chunks, {info['timings']}")
+
+    elapsed = time.time() - started
+    return {
+        'files': len(paths),
+        'skipped': len(paths) - len(pending),
+        'done': done,
+        'errors': errors,
+        'audio_seconds': round(audio_seconds, 1),
+        'elapsed_seconds': round(elapsed, 1),
+        'throughput': round(audio_seconds / elapsed, 2) if elapsed else None,
+        'batcher': transcriber.batcher.stats(),
+    }
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="폴더 단위 일괄 변환 (결과는 노트로 저장)")
+    parser.add_argument('folder', help='오디오 파일 폴더')
+    parser.add_argument('--recursive', '-r', action='store_true', help='하위 폴더 포함')
+    parser.add_argument('--model', default='openai/whisper-base')
+    parser.add_argument('--device', default='auto', choices=['auto', 'cuda', 'cpu'])
+    parser.add_argument('--backend', default='torch', choices=CPU_BACKENDS, help='CPU 추론 백엔드')
+    parser.add_argument('--gpu-backend', default=os.getenv('GPU_BACKEND', 'torch'), choices=GPU_BACKENDS, help='GPU 추론 백엔드')
+    parser.add_argument('--language', default='korean')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('BATCH_WORKERS', '2')), help='동시에 처리할 파일 수')
+    parser.add_argument('--batch-size', type=int, default=int(os.getenv('WHISPER_BATCH_SIZE', '8')))
+    parser.add_argument('--no-diarization', action='store_true', help='화자 분리 생략 (HF_TOKEN이 없어도 생략)')
+    parser.add_argument('--split-on-speaker-change', action='store_true')
+    parser.add_argument('--no-vad', action='store_true', help='무음 구간도 그대로 변환')
+    parser.add_argument('--no-copy', action='store_true', help='오디오를 uploads/에 복사하지 않음 (노트에서 재생 불가)')
+    parser.add_argument('--checkpoint', help='체크포인트 파일 (기본: cache/batch/<폴더 해시>.jsonl)')
+    parser.add_argument('--skip-failed', action='store_true', help='이전에 실패한 파일은 다시 시도하지 않음')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.folder):
+        parser.error(f'폴더가 없습니다: {args.folder}')
+
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    os.makedirs(NOTES_FOLDER, exist_ok=True)
+
+    checkpoint_path = args.checkpoint or default_checkpoint(args.folder)
+    os.makedirs(os.path.dirname(checkpoint_path) or '.', exist_ok=True)
+    checkpoint = Checkpoint(checkpoint_path)
+    print(f"[Batch] Checkpoint: {checkpoint_path}")
+
+    hf_token = None if args.no_diarization else (os.getenv('HF_TOKEN') or None)
+    if not args.no_diarization and not hf_token:
+        print("[Batch] HF_TOKEN이 없어 화자 분리를 생략합니다")
+
+    transcriber = BatchTranscriber(
+        args.model, args.device, args.backend, args.language, hf_token,
+        enable_vad=not args.no_vad,
+        split_on_speaker_change=args.split_on_speaker_change,
+        batch_size=args.batch_size,
+        copy_audio=not args.no_copy,
+        gpu_backend=args.gpu_backend
+    )
+    try:
+        summary = run_batch(args.folder, transcriber, checkpoint, args.workers, args.recursive, not args.skip_failed)
+    finally:
+        transcriber.close()
+
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    if summary['errors']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
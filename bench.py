@@ -0,0 +1,998 @@
+"""성능 벤치마크 스크립트"""
+
+import argparse
+import json
+import os
+import random
+import time
+from typing import Dict, List
+
+from devices import CPU_BACKENDS, GPU_BACKENDS
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.m4a', '.flac')
+
+
+def synthetic_merge_inputs(n_chunks: int, n_segments: int, seed: int = 0):
+    """합성 Whisper 청크 / 화자 분리 세그먼트 생성 (같은 길이의 타임라인)"""
+    rng = random.Random(seed)
+
+    chunks = []
+    t = 0.0
+    for i in range(n_chunks):
+        length = rng.uniform(1.0, 8.0)
+        chunks.append({'text': f' 문장 {i} 입니다', 'timestamp': (t, t + length)})
+        t += length + rng.uniform(0.0, 0.5)
+    total = t
+
+    segments = []
+    step = total / n_segments
+    for i in range(n_segments):
+        start = i * step + rng.uniform(-0.2, 0.2) * step
+        segments.append({
+            'start': max(0.0, start),
+            'end': start + step * rng.uniform(0.8, 1.3),
+            'speaker': f'SPEAKER_{rng.randrange(8):02d}'
+        })
+
+    return chunks, segments
+
+
+def naive_merge(chunks: List[Dict], diarization_segments: List[Dict]) -> List[Dict]:
+    """기존 O(청크 x 세그먼트) 병합 (비교 기준)"""
+    merged = []
+    for chunk in chunks:
+        chunk_mid = (chunk['timestamp'][0] + chunk['timestamp'][1]) / 2
+        speaker = None
+        for seg in diarization_segments:
+            if seg['start'] <= chunk_mid <= seg['end']:
+                speaker = seg['speaker']
+                break
+        if speaker is None:
+            min_distance = float('inf')
+            for seg in diarization_segments:
+                distance = abs(chunk_mid - (seg['start'] + seg['end']) / 2)
+                if distance < min_distance:
+                    min_distance = distance
+                    speaker = seg['speaker']
+        merged.append(dict(chunk, speaker=speaker))
+    return merged
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_merge(n_chunks: int = 10000, n_segments: int = 10000, repeat: int = 3, baseline: bool = False) -> Dict:
+    """merge_transcription_with_diarization 벤치마크"""
+    from diarization import merge_transcription_with_diarization
+
+    chunks, segments = synthetic_merge_inputs(n_chunks, n_segments)
+
+    result = {
+        'chunks': n_chunks,
+        'segments': n_segments,
+        'merge_s': _best_of(lambda: merge_transcription_with_diarization(chunks, segments), repeat),
+        'merge_split_s': _best_of(
+            lambda: merge_transcription_with_diarization(chunks, segments, split_on_speaker_change=True), repeat
+        ),
+    }
+
+    # 기존 방식은 느리므로 요청 시에만 1회 측정
+    if baseline:
+        result['naive_s'] = _best_of(lambda: naive_merge(chunks, segments), 1)
+        result['speedup'] = result['naive_s'] / result['merge_s'] if result['merge_s'] else None
+
+    return result
+
+
+def _percentiles(values: List[float]) -> Dict:
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else None
+    return {'p50': pick(0.5), 'p90': pick(0.9), 'p99': pick(0.99), 'max': ordered[-1] if ordered else None}
+
+
+def bench_search(n_notes: int = 1000, chunks_per_note: int = 600, queries: int = 200, seed: int = 0) -> Dict:
+    """전문 검색 벤치마크 (합성 노트 색인 후 검색 지연 시간 측정)"""
+    import tempfile
+    from search_index import SearchIndex
+
+    rng = random.Random(seed)
+    syllables = [chr(0xAC00 + rng.randrange(11172)) for _ in range(400)]
+    words = [''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(5000)]
+
+    def sentence():
+        return ' '.join(rng.choice(words) for _ in range(rng.randint(4, 12)))
+
+    with tempfile.TemporaryDirectory() as folder:
+        index = SearchIndex(os.path.join(folder, 'search.sqlite3'))
+
+        started = time.perf_counter()
+        index.build(
+            {'id': f'note{i}', 'chunks': [
+                {'text': sentence(), 'timestamp': (j * 5.0, j * 5.0 + 5.0), 'speaker': f'화자{j % 4 + 1}'}
+                for j in range(chunks_per_note)
+            ]}
+            for i in range(n_notes)
+        )
+        build_s = time.perf_counter() - started
+
+        latencies = []
+        for _ in range(queries):
+            query = ' '.join(rng.choice(words) for _ in range(rng.randint(1, 2)))
+            started = time.perf_counter()
+            index.search(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        'notes': n_notes,
+        'chunks': n_notes * chunks_per_note,
+        'build_s': build_s,
+        'query_ms': _percentiles(latencies),
+    }
+
+
+def bench_notes(n_chunks: int = 3000, repeat: int = 5, window: float = 300.0) -> Dict:
+    """노트 청크 저장 방식별 파일 크기 / 전체 로드 / 시간 범위 로드 비교"""
+    import tempfile
+    from notes_store import NotesStore
+
+    chunks, _ = synthetic_merge_inputs(n_chunks, 1)
+    for i, chunk in enumerate(chunks):
+        chunk['timestamp'] = list(chunk['timestamp'])
+        chunk['speaker'] = f'화자 {i % 4 + 1}'
+    total = chunks[-1]['timestamp'][1]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for name, chunk_format, compress in (('json', 'json', False), ('columnar', 'columnar', False), ('columnar_zlib', 'columnar', True)):
+            store = NotesStore(os.path.join(folder, name), chunk_format=chunk_format, compress=compress)
+            store.save({'id': 'note', 'text': ''.join(c['text'] for c in chunks), 'chunks': chunks})
+
+            start = total / 2
+            results[name] = {
+                'bytes': sum(
+                    os.path.getsize(os.path.join(store.folder, f)) for f in os.listdir(store.folder)
+                    if f.startswith('note.')
+                ),
+                'load_ms': _best_of(lambda: store.get('note'), repeat) * 1000,
+                'range_ms': _best_of(lambda: store.get_range('note', start, start + window), repeat) * 1000,
+            }
+
+    return {'chunks': n_chunks, 'window_s': window, 'formats': results}
+
+
+def _rss_mb(pid: int) -> float:
+    """프로세스와 하위 프로세스의 RSS 합 (MB, Linux /proc 기준)"""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pending += [int(child) for child in f.read().split()]
+        except OSError:
+            continue
+    return total / 1024
+
+
+def bench_sse(url: str, jobs_db: str, clients: int = 500, n_jobs: int = 10, events: int = 50,
+              interval: float = 0.2, server_pid: int = None) -> Dict:
+    """
+    SSE 부하 테스트 - 가짜 모델(이벤트만 발행하는 스레드)로 작업을 진행시키고 많은 클라이언트가 동시에 구독
+
+    서버는 같은 작업 저장소(JOBS_DB)를 쓰는 운영 모드(serve.py)로 미리 실행해 둠
+    """
+    import asyncio
+    import threading
+    import uuid
+    from urllib.parse import urlparse
+    from jobs import JobStore
+
+    store = JobStore(jobs_db)
+    job_ids = [f'bench-{uuid.uuid4().hex}' for _ in range(n_jobs)]
+    for job_id in job_ids:
+        store.create(job_id, {'kind': 'bench', 'status': 'processing'})
+
+    def fake_model():
+        # Whisper 윈도우 진행률처럼 일정 간격으로 이벤트 발행
+        for i in range(1, events + 1):
+            time.sleep(interval)
+            stage = 'complete' if i == events else 'processing'
+            for job_id in job_ids:
+                store.publish(job_id, {'stage': stage, 'progress': int(100 * i / events), 't': time.time()},
+                              status='complete' if stage == 'complete' else 'processing')
+
+    target = urlparse(url)
+    first_event_ms = []
+    lag_ms = []
+    finished = 0
+    errors = 0
+
+    async def client(job_id):
+        nonlocal finished, errors
+        started = time.time()
+        try:
+            reader, writer = await asyncio.open_connection(target.hostname, target.port or 80)
+            writer.write(f"GET /transcribe/{job_id} HTTP/1.1\r\nHost: {target.netloc}\r\nAccept: text/event-stream\r\n\r\n".encode())
+            await writer.drain()
+
+            got_first = False
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.startswith(b'data: '):
+                    continue
+                event = json.loads(line[6:])
+                now = time.time()
+                if not got_first:
+                    first_event_ms.append((now - started) * 1000)
+                    got_first = True
+                if 't' in event:
+                    lag_ms.append((now - event['t']) * 1000)
+                if event['stage'] == 'complete':
+                    finished += 1
+                    break
+            writer.close()
+        except OSError:
+            errors += 1
+
+    async def run_clients():
+        tasks = [asyncio.create_task(client(job_ids[i % n_jobs])) for i in range(clients)]
+        # 모든 클라이언트가 연결한 뒤 가짜 모델 시작
+        await asyncio.sleep(1.0)
+        rss_before = _rss_mb(server_pid) if server_pid else None
+        threading.Thread(target=fake_model, daemon=True).start()
+        await asyncio.sleep(interval * events / 2)
+        rss_peak = _rss_mb(server_pid) if server_pid else None
+        await asyncio.gather(*tasks)
+        return rss_before, rss_peak
+
+    started = time.perf_counter()
+    rss_before, rss_peak = asyncio.run(run_clients())
+    elapsed = time.perf_counter() - started
+
+    return {
+        'clients': clients,
+        'jobs': n_jobs,
+        'events_per_job': events,
+        'finished': finished,
+        'errors': errors,
+        'elapsed_s': elapsed,
+        'first_event_ms': _percentiles(first_event_ms),
+        'delivery_lag_ms': _percentiles(lag_ms),
+        'server_rss_mb': {'connected': rss_before, 'streaming': rss_peak},
+    }
+
+
+def stub_llm_server(latency: float = 0.5):
+    """
+    OpenAI 호환 /chat/completions 대역 서버 (요약 파이프라인 테스트용, 스레드에서 실행)
+
+    요청에 있는 [M:SS] 줄을 앞부분만 남겨 돌려주므로 시간 표기가 끝까지 유지되는지 확인 가능
+    Returns:
+        (server, base_url, 통계 dict - calls, peak_concurrency, max_request_chars)
+    """
+    import re
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    stats = {'calls': 0, 'active': 0, 'peak_concurrency': 0, 'max_request_chars': 0}
+    lock = threading.Lock()
+    cited = re.compile(r'^(?:- )?(?:### .*|\[\d{1,3}:\d{2}\].*|.*\[\d{1,3}:\d{2}\])$')
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            system, user = body['messages'][0]['content'], body['messages'][-1]['content']
+            with lock:
+                stats['calls'] += 1
+                stats['active'] += 1
+                stats['peak_concurrency'] = max(stats['peak_concurrency'], stats['active'])
+                stats['max_request_chars'] = max(stats['max_request_chars'], len(system) + len(user))
+            time.sleep(latency)
+
+            if '검증 기준' in system:
+                content = '누락 없음'
+            else:
+                lines = [line for line in user.splitlines() if cited.match(line) and not line.startswith('###')]
+                content = '\n'.join(f'- {line[:60]}' if not line.startswith('- ') else line for line in lines[::4])
+
+            payload = json.dumps({
+                'choices': [{'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}]
+            }).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            with lock:
+                stats['active'] -= 1
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/v1', stats
+
+
+def bench_summarize(minutes: int = 120, latency: float = 0.5, connections: int = 4, url: str = None, model: str = 'stub',
+                    seed: int = 0) -> Dict:
+    """
+    구간별 요약 파이프라인 - 처음 요약 / 같은 녹취록 다시 요약 / 청크 하나 수정 후 요약 / 검증의 LLM 호출 수와 시간
+
+    url을 주지 않으면 대역 서버 사용 (실제 로컬 OpenAI 호환 서버도 --url로 측정 가능)
+    """
+    import tempfile
+    from cache import ResultCache
+    from summarize import LLMClient, Summarizer, transcript_line
+
+    rng = random.Random(seed)
+    syllables = [chr(0xAC00 + rng.randrange(11172)) for _ in range(400)]
+    words = [''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(3000)]
+
+    chunks, position, speaker = [], 0.0, 1
+    while position < minutes * 60:
+        length = rng.uniform(2, 8)
+        if rng.random() < 0.2:
+            speaker = rng.randint(1, 4)
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(4, 14)))
+        chunks.append({'text': text, 'timestamp': [round(position, 2), round(position + length, 2)], 'speaker': f'화자{speaker}'})
+        position += length
+
+    server, stats = None, None
+    if url is None:
+        server, url, stats = stub_llm_server(latency)
+
+    results = {'minutes': minutes, 'chunks': len(chunks), 'transcript_chars': sum(len(transcript_line(c)) + 1 for c in chunks)}
+    try:
+        with tempfile.TemporaryDirectory() as folder:
+            summarizer = Summarizer(ResultCache(folder, 256 * 1024 * 1024))
+            client = LLMClient(url, '', model, connections)
+
+            summary, results['cold'] = summarizer.summarize(client, chunks)
+            _, results['warm'] = summarizer.summarize(client, chunks)
+
+            chunks[len(chunks) // 2] = dict(chunks[len(chunks) // 2], text='수정된 문장입니다')
+            _, results['one_chunk_edited'] = summarizer.summarize(client, chunks)
+
+            _, results['verify_cold'] = summarizer.verify(client, chunks, summary)
+            lines = summary.splitlines()
+            lines[len(lines) // 2] += ' (수정)'
+            _, results['verify_one_line_edited'] = summarizer.verify(client, chunks, '\n'.join(lines))
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    if stats is not None:
+        results['stub'] = {k: v for k, v in stats.items() if k != 'active'}
+    return results
+
+
+def bench_stream(path: str, model_id: str = 'openai/whisper-base', device: str = 'auto', speed: float = 1.0,
+                 frame_seconds: float = 0.25, step_seconds: float = 1.0) -> Dict:
+    """
+    실시간 변환 지연 시간 - 오디오 파일을 마이크처럼 frame_seconds 단위로 흘려 넣고 partial/final 지연 측정
+
+    speed=1이면 실제 시간 그대로, 0이면 기다리지 않음 (디코딩이 실시간을 따라가는지만 확인)
+    """
+    from audio import SAMPLE_RATE, load_audio
+    from streaming import StreamingTranscriber
+    from transcribe import load_whisper_model, transcribe_audio
+
+    audio = load_audio(path)
+    started = time.perf_counter()
+    pipe = load_whisper_model(model_id, device)
+    load_s = time.perf_counter() - started
+    transcribe_audio(pipe, audio[:SAMPLE_RATE * 5])  # 워밍업
+
+    transcriber = StreamingTranscriber(lambda segment: transcribe_audio(pipe, segment).get('chunks', []), step_seconds=step_seconds)
+    frame = int(frame_seconds * SAMPLE_RATE)
+    finals = 0
+    started = time.perf_counter()
+    for offset in range(0, len(audio), frame):
+        if speed > 0:
+            # 실제 녹음처럼 프레임이 도착할 시각까지 대기 (디코딩이 늦으면 기다리지 않고 밀린 프레임을 바로 넣음)
+            delay = offset / SAMPLE_RATE / speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+        finals += sum(1 for event in transcriber.feed(audio[offset:offset + frame]) if event['type'] == 'final')
+    streamed_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    transcriber.finish()
+    finish_s = time.perf_counter() - started
+
+    return {
+        'file': path,
+        'model': model_id,
+        'device': device,
+        'speed': speed,
+        'load_s': round(load_s, 2),
+        'streamed_s': round(streamed_s, 2),
+        'finish_s': round(finish_s, 2),
+        'final_events': finals,
+        'stream': transcriber.stats(),
+    }
+
+
+def edit_distance(ref: List, hyp: List) -> int:
+    """레벤슈타인 거리"""
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1]
+
+
+def error_rates(reference: str, hypothesis: str) -> Dict:
+    """WER(어절 단위), CER(공백 제외 글자 단위) - 한국어는 CER이 더 의미 있음"""
+    ref_words, hyp_words = reference.split(), hypothesis.split()
+    ref_chars, hyp_chars = list(''.join(ref_words)), list(''.join(hyp_words))
+    return {
+        'wer': edit_distance(ref_words, hyp_words) / max(len(ref_words), 1),
+        'cer': edit_distance(ref_chars, hyp_chars) / max(len(ref_chars), 1),
+    }
+
+
+def load_samples(folder: str) -> List:
+    """샘플 폴더의 (오디오 경로, 정답 텍스트) 목록 - 정답은 같은 이름의 .txt"""
+    samples = []
+    for filename in sorted(os.listdir(folder)):
+        base, ext = os.path.splitext(filename)
+        if ext.lower() not in AUDIO_EXTENSIONS:
+            continue
+        ref_path = os.path.join(folder, base + '.txt')
+        reference = None
+        if os.path.exists(ref_path):
+            with open(ref_path, 'r', encoding='utf-8') as f:
+                reference = f.read().strip()
+        samples.append((os.path.join(folder, filename), reference))
+    return samples
+
+
+def bench_backends(samples_dir: str, model_id: str, backends: List[str], language: str = 'korean') -> Dict:
+    """CPU 백엔드별 RTF / WER / CER 비교"""
+    from audio import load_audio, audio_duration
+    from transcribe import load_whisper_model, transcribe_audio
+
+    samples = [(path, reference, load_audio(path)) for path, reference in load_samples(samples_dir)]
+    results = {}
+
+    for backend in backends:
+        started = time.perf_counter()
+        pipe = load_whisper_model(model_id, 'cpu', backend)
+        load_s = time.perf_counter() - started
+
+        audio_total = 0.0
+        elapsed_total = 0.0
+        per_sample = []
+        for path, reference, audio in samples:
+            started = time.perf_counter()
+            result = transcribe_audio(pipe, audio, language)
+            elapsed = time.perf_counter() - started
+
+            duration = audio_duration(audio)
+            audio_total += duration
+            elapsed_total += elapsed
+
+            row = {'file': os.path.basename(path), 'duration': duration, 'rtf': elapsed / duration if duration else None}
+            if reference is not None:
+                row.update(error_rates(reference, result['text']))
+            per_sample.append(row)
+
+        scored = [row for row in per_sample if 'wer' in row]
+        results[backend] = {
+            'load_s': load_s,
+            'rtf': elapsed_total / audio_total if audio_total else None,
+            'wer': sum(row['wer'] for row in scored) / len(scored) if scored else None,
+            'cer': sum(row['cer'] for row in scored) / len(scored) if scored else None,
+            'samples': per_sample,
+        }
+        del pipe
+
+    return {'model_id': model_id, 'samples_dir': samples_dir, 'backends': results}
+
+
+# 합성 코퍼스 기본 길이 (초)
+CORPUS_LENGTHS = (30, 120, 600)
+
+# compare에서 값이 작을수록 좋은 지표 / 클수록 좋은 지표 (키 이름 기준)
+LOWER_IS_BETTER = ('_s', '_ms', '_mb', 'rtf', 'p50', 'p90', 'p99', 'max', 'wer', 'cer')
+HIGHER_IS_BETTER = ('throughput', 'speedup')
+
+
+def synthetic_speech(seconds: float, seed: int, sampling_rate: int = 16000):
+    """
+    화자 두 명이 번갈아 말하는 듯한 합성 신호 (float32)
+
+    음성이 아니므로 인식 결과는 의미 없지만, 같은 seed면 항상 같은 입력이라 속도 비교에 사용
+    화자마다 기본 주파수가 달라 화자 분리/병합 경로도 실행됨
+    """
+    import numpy as np
+
+    rng = np.random.RandomState(seed)
+    audio = np.zeros(int(seconds * sampling_rate), dtype=np.float32)
+    pitches = (125.0, 210.0)
+    position, turn = 0, 0
+
+    while position < len(audio):
+        # 발화 (3~8초) + 쉼 (0.3~1.5초)
+        length = min(int(rng.uniform(3, 8) * sampling_rate), len(audio) - position)
+        t = np.arange(length) / sampling_rate
+        f0 = pitches[turn % 2] * (1 + 0.05 * np.sin(2 * np.pi * 0.5 * t))
+        phase = 2 * np.pi * np.cumsum(f0) / sampling_rate
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+        syllables = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3, 5) * t)) ** 2
+        audio[position:position + length] = 0.1 * voiced * syllables
+        position += length + int(rng.uniform(0.3, 1.5) * sampling_rate)
+        turn += 1
+
+    audio += rng.normal(0, 0.003, len(audio)).astype(np.float32)
+    return audio
+
+
+def _write_wav(path: str, audio, sampling_rate: int = 16000):
+    import wave
+    import numpy as np
+
+    pcm = (np.clip(audio, -1, 1) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sampling_rate)
+        f.writeframes(pcm.tobytes())
+
+
+def prepare_corpus(folder: str, lengths=CORPUS_LENGTHS, seed: int = 0) -> Dict:
+    """
+    벤치마크 코퍼스 준비 - 폴더에 오디오가 없으면 합성 코퍼스 생성, 있으면 그대로 사용
+
+    Returns:
+        {'dir', 'files': [{'file', 'sha256', 'reference'}], 'digest'} - digest가 같으면 같은 입력
+    """
+    import hashlib
+
+    os.makedirs(folder, exist_ok=True)
+    if not load_samples(folder):
+        for i, seconds in enumerate(lengths):
+            path = os.path.join(folder, f'synthetic_{int(seconds)}s.wav')
+            _write_wav(path, synthetic_speech(seconds, seed + i))
+        print(f"[Bench] Generated synthetic corpus in {folder} ({', '.join(f'{int(s)}s' for s in lengths)})")
+
+    files = []
+    corpus_digest = hashlib.sha256()
+    for path, reference in load_samples(folder):
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        corpus_digest.update(digest.encode())
+        files.append({'file': os.path.basename(path), 'sha256': digest, 'reference': reference})
+
+    return {'dir': folder, 'files': files, 'digest': corpus_digest.hexdigest()}
+
+
+def _peak_rss_mb() -> float:
+    """이 프로세스의 최대 RSS (MB)"""
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _environment() -> Dict:
+    import platform
+    import subprocess
+
+    env = {'python': platform.python_version(), 'platform': platform.platform(), 'cpu_count': os.cpu_count()}
+    try:
+        import torch
+        env['torch'] = torch.__version__
+        env['threads'] = torch.get_num_threads()
+        if torch.cuda.is_available():
+            env['gpu'] = torch.cuda.get_device_name(0)
+    except ImportError:
+        pass
+    try:
+        import transformers
+        env['transformers'] = transformers.__version__
+    except ImportError:
+        pass
+    try:
+        env['commit'] = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return env
+
+
+def _run_diarization(paths: List[str], hf_token: str, repeat: int) -> Dict:
+    """(하위 프로세스) 파일별 화자 분리 시간 + 병합에 쓸 세그먼트"""
+    from audio import load_audio, audio_duration
+    from diarization import load_diarization_pipeline, perform_diarization
+
+    started = time.perf_counter()
+    load_diarization_pipeline(hf_token)
+    load_s = time.perf_counter() - started
+
+    latencies, files, segments = [], [], {}
+    audio_total = elapsed_total = 0.0
+    for path in paths:
+        audio = load_audio(path)
+        duration = audio_duration(audio)
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            segments[path] = perform_diarization(audio, hf_token)
+            runs.append(time.perf_counter() - started)
+        latencies += runs
+        audio_total += duration * repeat
+        elapsed_total += sum(runs)
+        files.append({'file': os.path.basename(path), 'latency_s': min(runs), 'rtf': min(runs) / duration if duration else None})
+
+    return {
+        'load_s': load_s,
+        'rtf': elapsed_total / audio_total if audio_total else None,
+        'throughput': audio_total / elapsed_total if elapsed_total else None,
+        'latency_s': _percentiles(latencies),
+        'peak_rss_mb': _peak_rss_mb(),
+        'files': files,
+        'segments': segments,
+    }
+
+
+def _run_whisper(model_id: str, device: str, backend: str, samples: List, language: str, repeat: int, segments: Dict,
+                 gpu_backend: str = 'torch') -> Dict:
+    """(하위 프로세스) 모델 하나, 장치 하나의 로드/디코딩/변환/병합 측정"""
+    import torch
+    from audio import load_audio, audio_duration
+    from diarization import merge_transcription_with_diarization
+    from transcribe import load_whisper_model, transcribe_audio
+
+    started = time.perf_counter()
+    pipe = load_whisper_model(model_id, device, backend, gpu_backend)
+    load_s = time.perf_counter() - started
+
+    decode, latencies, merges, files = [], [], [], []
+    audio_total = elapsed_total = 0.0
+    for path, reference in samples:
+        started = time.perf_counter()
+        audio = load_audio(path)
+        decode.append(time.perf_counter() - started)
+        duration = audio_duration(audio)
+
+        # 첫 실행은 워밍업 (커널 선택, 캐시) - 측정에서 제외
+        transcribe_audio(pipe, audio[:16000 * 5], language)
+
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = transcribe_audio(pipe, audio, language)
+            runs.append(time.perf_counter() - started)
+        latencies += runs
+        audio_total += duration * repeat
+        elapsed_total += sum(runs)
+
+        row = {'file': os.path.basename(path), 'duration': duration, 'latency_s': min(runs), 'rtf': min(runs) / duration if duration else None}
+        if reference is not None:
+            row.update(error_rates(reference, result['text']))
+        files.append(row)
+
+        if path in segments:
+            chunks = result.get('chunks', [])
+            merges.append(_best_of(lambda: merge_transcription_with_diarization(chunks, segments[path]), repeat))
+
+    run = {
+        'model_id': model_id,
+        'device': device,
+        'backend': backend,
+        'gpu_backend': gpu_backend if device == 'cuda' else None,
+        'optimization': pipe.optimization.stats(),
+        'load_s': load_s,
+        'decode_s': sum(decode),
+        'rtf': elapsed_total / audio_total if audio_total else None,
+        'throughput': audio_total / elapsed_total if elapsed_total else None,
+        'latency_s': _percentiles(latencies),
+        'peak_rss_mb': _peak_rss_mb(),
+        'files': files,
+    }
+    if merges:
+        run['merge_ms'] = _percentiles([m * 1000 for m in merges])
+    if device == 'cuda':
+        run['gpu_peak_mb'] = torch.cuda.max_memory_allocated() / 1024 / 1024
+    return run
+
+
+def _in_subprocess(fn, *args):
+    """설정마다 새 프로세스에서 실행 (최대 RSS와 모델 캐시가 서로 섞이지 않도록)"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(fn, *args).result()
+
+
+# 웹 프로세스가 불러오지 않아야 하는 ML 라이브러리
+HEAVY_MODULES = ('torch', 'transformers', 'pyannote.audio', 'lightning_fabric', 'optimum')
+
+_STARTUP_PROBE = """
+import json, resource, sys, time
+started = time.time()
+import {module}
+imported = time.time() - started
+result = {{'import_seconds': imported, 'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+          'heavy': [m for m in {heavy!r} if m in sys.modules]}}
+if {warmup!r}:
+    {module}.warm_up()
+    result['warmup'] = {module}.startup
+print(json.dumps(result))
+"""
+
+
+def bench_startup(modules: List[str], repeat: int = 5, warmup: bool = False) -> Dict:
+    """
+    서버 시작 시간 - 모듈마다 새 프로세스에서 import (인터프리터 시작 포함 전체 시간, 최대 RSS, 불러온 ML 라이브러리)
+
+    warmup이면 마지막 실행에서 app.warm_up()까지 실행해 단계별 시간 기록 (MODEL_WARMUP 설정 따름)
+    """
+    import subprocess
+    import sys
+
+    env = dict(os.environ)
+    env.setdefault('JOB_RUNNER', 'worker')  # serve.py 웹 프로세스와 같은 조건
+    result = {'environment': _environment(), 'repeat': repeat, 'runs': {}}
+
+    for module in modules:
+        totals, imports, rss, heavy, warm = [], [], [], set(), None
+        for i in range(repeat):
+            probe = _STARTUP_PROBE.format(module=module, heavy=HEAVY_MODULES, warmup=warmup and i == repeat - 1)
+            started = time.time()
+            output = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, env=env, check=True).stdout
+            totals.append(time.time() - started)
+
+            run = json.loads(output.strip().splitlines()[-1])
+            imports.append(run['import_seconds'])
+            rss.append(run['rss_mb'])
+            heavy.update(run['heavy'])
+            warm = run.get('warmup', warm)
+
+        result['runs'][module] = {
+            'process_seconds': _percentiles(totals),
+            'import_seconds': _percentiles(imports),
+            'peak_rss_mb': max(rss),
+            'ml_modules_loaded': sorted(heavy),
+        }
+        if warm is not None:
+            result['runs'][module]['warmup'] = warm
+        print(f"[Bench] {module}: import p50 {result['runs'][module]['import_seconds']['p50']:.2f}s, "
+              f"RSS {max(rss):.0f}MB, ML modules: {', '.join(sorted(heavy)) or 'none'}")
+
+    return result
+
+
+def bench_pipeline(corpus_dir: str, models: List[str], devices: List[str], backend: str = 'torch', gpu_backend: str = 'torch',
+                   language: str = 'korean', repeat: int = 3, diarization: bool = False) -> Dict:
+    """전체 파이프라인 (모델 로드 → 변환 → 화자 분리 → 병합) 모델/장치별 측정"""
+    import torch
+
+    corpus = prepare_corpus(corpus_dir)
+    samples = [(os.path.join(corpus_dir, f['file']), f['reference']) for f in corpus['files']]
+    paths = [path for path, _ in samples]
+
+    result = {
+        'corpus': {'dir': corpus_dir, 'digest': corpus['digest'], 'files': [f['file'] for f in corpus['files']]},
+        'environment': _environment(),
+        'repeat': repeat,
+        'runs': {},
+        'skipped': {},
+    }
+
+    segments = {}
+    if diarization:
+        hf_token = os.getenv('HF_TOKEN')
+        if not hf_token:
+            result['skipped']['diarization'] = 'HF_TOKEN이 없습니다'
+        else:
+            print("[Bench] diarization")
+            run = _in_subprocess(_run_diarization, paths, hf_token, repeat)
+            segments = run.pop('segments')
+            result['runs']['diarization'] = run
+
+    for device in devices:
+        if device == 'cuda' and not torch.cuda.is_available():
+            result['skipped'][device] = 'CUDA를 사용할 수 없습니다'
+            continue
+        for model_id in models:
+            key = f'{model_id}@{device}'
+            print(f"[Bench] {key}")
+            try:
+                result['runs'][key] = _in_subprocess(_run_whisper, model_id, device, backend, samples, language, repeat, segments, gpu_backend)
+            except Exception as e:
+                result['skipped'][key] = str(e)
+
+    return result
+
+
+def _flatten(data, prefix: str = '') -> Dict[str, float]:
+    """중첩 결과를 'runs.model@cpu.latency_s.p50' 형태의 숫자 값으로 펼침"""
+    values = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            values.update(_flatten(value, f'{prefix}.{key}' if prefix else str(key)))
+    elif isinstance(data, list):
+        for i, value in enumerate(data):
+            # 파일별 결과는 파일 이름으로 맞춤
+            key = value.get('file', i) if isinstance(value, dict) else i
+            values.update(_flatten(value, f'{prefix}[{key}]'))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        values[prefix] = data
+    return values
+
+
+def _direction(path: str) -> int:
+    """1: 클수록 좋음, -1: 작을수록 좋음, 0: 비교하지 않음 (마지막 키 이름 기준)"""
+    name = path.rsplit('.', 1)[-1]
+    if name.endswith(HIGHER_IS_BETTER):
+        return 1
+    if name.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare_results(base_path: str, new_path: str, threshold: float = 0.1) -> Dict:
+    """두 벤치마크 결과 비교 - threshold(비율)보다 나빠진 지표를 regression으로 표시"""
+    with open(base_path, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    warnings = []
+    base_corpus, new_corpus = base.get('corpus', {}).get('digest'), new.get('corpus', {}).get('digest')
+    if base_corpus != new_corpus:
+        warnings.append('코퍼스가 다릅니다 (corpus.digest 불일치)')
+
+    base_values, new_values = _flatten(base), _flatten(new)
+    regressions, improvements = [], []
+    for path in sorted(set(base_values) & set(new_values)):
+        direction = _direction(path)
+        before, after = base_values[path], new_values[path]
+        if not direction or not before:
+            continue
+        change = (after - before) / abs(before)
+        row = {'metric': path, 'base': before, 'new': after, 'change': round(change, 4)}
+        if change * direction < -threshold:
+            regressions.append(row)
+        elif change * direction > threshold:
+            improvements.append(row)
+
+    return {
+        'base': base_path,
+        'new': new_path,
+        'threshold': threshold,
+        'warnings': warnings,
+        'regressions': regressions,
+        'improvements': improvements,
+        'only_in_base': sorted(set(base.get('runs', {})) - set(new.get('runs', {}))),
+        'only_in_new': sorted(set(new.get('runs', {})) - set(base.get('runs', {}))),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JJablover Note 벤치마크")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    merge = sub.add_parser('merge', help='화자 병합 벤치마크')
+    merge.add_argument('--chunks', type=int, default=10000)
+    merge.add_argument('--segments', type=int, default=10000)
+    merge.add_argument('--repeat', type=int, default=3)
+    merge.add_argument('--baseline', action='store_true', help='기존 O(n*m) 병합도 측정')
+
+    backends = sub.add_parser('backends', help='CPU 추론 백엔드 RTF/WER 비교')
+    backends.add_argument('samples', help='오디오 + 같은 이름의 정답 .txt가 있는 폴더')
+    backends.add_argument('--model', default='openai/whisper-small')
+    backends.add_argument('--backends', default='torch,int8,onnx')
+
+    search = sub.add_parser('search', help='전문 검색 지연 시간')
+    search.add_argument('--notes', type=int, default=1000)
+    search.add_argument('--chunks-per-note', type=int, default=600)
+    search.add_argument('--queries', type=int, default=200)
+
+    notes = sub.add_parser('notes', help='노트 청크 저장 방식 비교')
+    notes.add_argument('--chunks', type=int, default=3000)
+    notes.add_argument('--window', type=float, default=300.0, help='시간 범위 조회 길이 (초)')
+
+    sse = sub.add_parser('sse', help='SSE 동시 구독 부하 테스트 (serve.py로 실행한 서버 대상)')
+    sse.add_argument('--url', default='http://127.0.0.1:5000')
+    sse.add_argument('--jobs-db', default=os.getenv('JOBS_DB', os.path.join('cache', 'jobs.sqlite3')))
+    sse.add_argument('--clients', type=int, default=500)
+    sse.add_argument('--jobs', type=int, default=10)
+    sse.add_argument('--events', type=int, default=50)
+    sse.add_argument('--interval', type=float, default=0.2)
+    sse.add_argument('--server-pid', type=int, help='메모리 측정용 gunicorn master PID')
+
+    summarize = sub.add_parser('summarize', help='구간별 요약 캐시 효과 (LLM 대역 서버 또는 로컬 OpenAI 호환 서버)')
+    summarize.add_argument('--minutes', type=int, default=120, help='합성 녹취록 길이 (분)')
+    summarize.add_argument('--latency', type=float, default=0.5, help='대역 서버 응답 지연 (초)')
+    summarize.add_argument('--connections', type=int, default=4)
+    summarize.add_argument('--url', help='OpenAI 호환 서버 (예: http://127.0.0.1:8080/v1, 없으면 대역 서버)')
+    summarize.add_argument('--model', default='stub')
+
+    stream = sub.add_parser('stream', help='실시간 변환 partial/final 지연 시간 (오디오 파일을 마이크처럼 재생)')
+    stream.add_argument('file')
+    stream.add_argument('--model', default='openai/whisper-base')
+    stream.add_argument('--device', default='auto')
+    stream.add_argument('--speed', type=float, default=1.0, help='재생 배속 (0이면 기다리지 않음)')
+    stream.add_argument('--step', type=float, default=1.0, help='다시 디코딩하는 간격 (초)')
+
+    pipeline = sub.add_parser('pipeline', help='전체 파이프라인 모델/장치별 RTF, 지연 시간, 최대 메모리')
+    pipeline.add_argument('--corpus', default=os.path.join('cache', 'bench_corpus'), help='오디오 폴더 (비어 있으면 합성 코퍼스 생성)')
+    pipeline.add_argument('--models', default='openai/whisper-tiny,openai/whisper-base')
+    pipeline.add_argument('--devices', default='cpu,cuda')
+    pipeline.add_argument('--backend', default='torch', choices=CPU_BACKENDS, help='CPU 추론 백엔드')
+    pipeline.add_argument('--gpu-backend', default='torch', choices=GPU_BACKENDS, help='GPU 추론 백엔드')
+    pipeline.add_argument('--repeat', type=int, default=3)
+    pipeline.add_argument('--diarization', action='store_true', help='화자 분리 + 병합도 측정 (HF_TOKEN 필요)')
+
+    startup = sub.add_parser('startup', help='서버 시작 시간 (import 시간, 최대 RSS, 불러온 ML 라이브러리)')
+    startup.add_argument('--modules', default='app', help='새 프로세스에서 import할 모듈 (쉼표 구분)')
+    startup.add_argument('--repeat', type=int, default=5)
+    startup.add_argument('--warmup', action='store_true', help='마지막 실행에서 app.warm_up()까지 측정 (MODEL_WARMUP=full 권장)')
+
+    compare = sub.add_parser('compare', help='두 결과 파일 비교 (regression이 있으면 종료 코드 1)')
+    compare.add_argument('base')
+    compare.add_argument('new')
+    compare.add_argument('--threshold', type=float, default=0.1, help='허용 변화 비율')
+
+    for command in sub.choices.values():
+        command.add_argument('--output', '-o', help='결과 JSON을 저장할 파일')
+
+    args = parser.parse_args()
+
+    if args.command == 'merge':
+        result = bench_merge(args.chunks, args.segments, args.repeat, args.baseline)
+    elif args.command == 'backends':
+        result = bench_backends(args.samples, args.model, args.backends.split(','))
+    elif args.command == 'search':
+        result = bench_search(args.notes, args.chunks_per_note, args.queries)
+    elif args.command == 'notes':
+        result = bench_notes(args.chunks, window=args.window)
+    elif args.command == 'sse':
+        result = bench_sse(args.url, args.jobs_db, args.clients, args.jobs, args.events, args.interval, args.server_pid)
+    elif args.command == 'summarize':
+        result = bench_summarize(args.minutes, args.latency, args.connections, args.url, args.model)
+    elif args.command == 'stream':
+        result = bench_stream(args.file, args.model, args.device, args.speed, step_seconds=args.step)
+    elif args.command == 'pipeline':
+        result = bench_pipeline(
+            args.corpus, args.models.split(','), args.devices.split(','), args.backend, args.gpu_backend,
+            repeat=args.repeat, diarization=args.diarization
+        )
+    elif args.command == 'startup':
+        result = bench_startup(args.modules.split(','), args.repeat, args.warmup)
+    elif args.command == 'compare':
+        result = compare_results(args.base, args.new, args.threshold)
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+
+    if args.command == 'compare' and result['regressions']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
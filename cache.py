@@ -0,0 +1,255 @@
+"""변환 결과 캐시 모듈 (오디오 내용 해시 기반, 용량 제한 LRU)"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# 해시 계산 시 한 번에 읽는 크기
+HASH_BLOCK = 1 << 20
+
+
+def hash_stream(stream, out=None) -> str:
+    """스트림을 읽으며 sha256 계산 (out이 있으면 동시에 기록)"""
+    digest = hashlib.sha256()
+    while True:
+        block = stream.read(HASH_BLOCK)
+        if not block:
+            break
+        digest.update(block)
+        if out is not None:
+            out.write(block)
+    return digest.hexdigest()
+
+
+def make_cache_key(**parts) -> str:
+    """(오디오 해시, 모델, dtype, 언어, 화자 분리 여부 등)으로 캐시 키 생성"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    디스크에 저장되는 변환 결과 캐시
+
+    - 키별 JSON 파일 하나, 크기와 최근 사용 시각은 같은 폴더의 SQLite 색인(results.sqlite3)에 저장
+      (웹 프로세스와 추론 워커가 함께 쓰므로 다른 프로세스가 저장한 결과도 바로 보임, 재시작 후에도 LRU)
+    - 전체 크기가 max_bytes를 넘으면 가장 오래 안 쓴 결과부터 삭제
+    - 색인이 없던 폴더의 결과 파일은 처음 열 때 mtime 순서로 가져옴
+    """
+
+    def __init__(self, folder: str, max_bytes: int):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # 조회/삭제 횟수는 이 프로세스 기준 (메트릭은 프로세스별로 모음)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(folder, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(folder, 'results.sqlite3'), check_same_thread=False, timeout=30)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                used_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS results_used ON results (used_at);
+        """)
+        self._import_files()
+
+    def _import_files(self):
+        files = []
+        for filename in os.listdir(self.folder):
+            if filename.endswith('.json') and len(filename) == 69:
+                path = os.path.join(self.folder, filename)
+                try:
+                    files.append((filename[:-5], os.path.getsize(path), os.path.getmtime(path)))
+                except OSError:
+                    # 다른 프로세스가 방금 삭제
+                    pass
+        with self._lock:
+            self._db.executemany("INSERT OR IGNORE INTO results (key, size, used_at) VALUES (?, ?, ?)", files)
+            self._db.commit()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, f'{key}.json')
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM results WHERE key = ?", (key,)).fetchone() is None:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), 'r', encoding='utf-8') as f:
+                    result = json.load(f)
+            except (OSError, ValueError):
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._db.commit()
+                self.misses += 1
+                return None
+
+            self._db.execute("UPDATE results SET used_at = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+            return result
+
+    def put(self, key: str, result: Dict):
+        data = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        path = self._path(key)
+        # 같은 키를 여러 프로세스가 동시에 저장해도 임시 파일이 겹치지 않게
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+        with self._lock:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            self._db.execute("INSERT OR REPLACE INTO results (key, size, used_at) VALUES (?, ?, ?)", (key, len(data), time.time()))
+            self._db.commit()
+            self._evict()
+
+    def _evict(self):
+        """가장 오래 안 쓴 결과부터 삭제 (마지막 하나는 남김)"""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            total, count = self._db.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM results").fetchone()
+            evicted = []
+            for key, size in self._db.execute("SELECT key, size FROM results ORDER BY used_at").fetchall():
+                if total <= self.max_bytes or count - len(evicted) <= 1:
+                    break
+                evicted.append(key)
+                total -= size
+            self._db.executemany("DELETE FROM results WHERE key = ?", [(key,) for key in evicted])
+            self._db.commit()
+        except Exception:
+            self._db.rollback()
+            raise
+
+        self.evictions += len(evicted)
+        for key in evicted:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'bytes': size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+
+class UploadIndex:
+    """
+    업로드 파일 내용 해시 → 저장된 파일명 (같은 파일은 uploads/에 한 번만 저장)
+
+    웹 프로세스, 추론 워커, batch.py가 함께 쓰므로 SQLite에 저장 (항상 최신 색인을 읽고, 동시에 추가해도 서로의 항목을 덮어쓰지 않음)
+    이전 형식(같은 이름의 .json)이 있으면 처음 열 때 가져옴
+    """
+
+    def __init__(self, path: str, folder: str):
+        self.path = path
+        self.folder = folder
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS uploads (
+                digest TEXT PRIMARY KEY,
+                filename TEXT NOT NULL
+            ) WITHOUT ROWID;
+        """)
+        self._import_json(os.path.splitext(path)[0] + '.json')
+
+    def _import_json(self, legacy_path: str):
+        if not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            self._db.executemany("INSERT OR IGNORE INTO uploads (digest, filename) VALUES (?, ?)", list(index.items()))
+            self._db.commit()
+        try:
+            os.replace(legacy_path, f'{legacy_path}.imported')
+        except OSError:
+            # 다른 프로세스가 먼저 가져감
+            pass
+
+    def _exists(self, filename: Optional[str]) -> bool:
+        return bool(filename) and os.path.exists(os.path.join(self.folder, filename))
+
+    def lookup(self, digest: str) -> Optional[str]:
+        """해시에 해당하는 기존 파일명 (파일이 지워졌으면 None)"""
+        with self._lock:
+            row = self._db.execute("SELECT filename FROM uploads WHERE digest = ?", (digest,)).fetchone()
+        filename = row[0] if row else None
+        return filename if self._exists(filename) else None
+
+    def _reserve(self, filename: str) -> str:
+        """파일명(1), 파일명(2) 형식으로 비어 있는 이름을 빈 파일로 선점 (다른 프로세스와 이름이 겹치지 않게)"""
+        base, ext = os.path.splitext(filename)
+        counter = 0
+        while True:
+            candidate = f"{base}({counter}){ext}" if counter else filename
+            try:
+                os.close(os.open(os.path.join(self.folder, candidate), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return candidate
+            except FileExistsError:
+                counter += 1
+
+    def store(self, source: str, filename: str, digest: str, move: bool = True) -> Tuple[str, bool]:
+        """
+        파일을 업로드 폴더에 저장 (같은 내용이 이미 있으면 재사용) - (최종 파일명, 재사용 여부)
+
+        move=True면 source를 옮기고 (재사용하면 삭제), False면 복사
+        """
+        existing = self.lookup(digest)
+        if existing is None:
+            filename = self._reserve(filename)
+            target = os.path.join(self.folder, filename)
+            if move:
+                os.replace(source, target)
+            else:
+                shutil.copyfile(source, target)
+
+            # 같은 내용을 다른 프로세스가 먼저 저장했으면 그쪽을 사용
+            with self._lock:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self._db.execute("SELECT filename FROM uploads WHERE digest = ?", (digest,)).fetchone()
+                    if row and row[0] != filename and self._exists(row[0]):
+                        existing = row[0]
+                    else:
+                        self._db.execute("INSERT OR REPLACE INTO uploads (digest, filename) VALUES (?, ?)", (digest, filename))
+                    self._db.commit()
+                except Exception:
+                    self._db.rollback()
+                    raise
+            if existing is None:
+                return filename, False
+            os.remove(target)
+            return existing, True
+
+        if move:
+            os.remove(source)
+        return existing, True
@@ -0,0 +1,163 @@
+"""노트 청크 압축 저장 포맷 (열 단위 배열 + 블록 압축 텍스트)
+
+파일 구조 (little endian):
+    header   magic(4) version(u8) flags(u8) reserved(u16) n(u32) block_chunks(u32) n_blocks(u32) speakers_len(u32)
+    speakers 화자 이름 목록 (JSON, utf-8)
+    start    f8[n]   시작 시간 (없으면 NaN)
+    end      f8[n]   끝 시간 (없으면 NaN)
+    speaker  i4[n]   화자 번호 (없으면 -1)
+    text_len u4[n]   청크 텍스트 길이 (utf-8 bytes)
+    offsets  u8[n_blocks + 1]  텍스트 블록 위치 (블록 영역 시작 기준)
+    blocks   block_chunks개 청크씩 이어 붙인 텍스트 (flags에 따라 zlib 압축)
+
+시간 범위를 읽을 때는 배열만 읽고 필요한 텍스트 블록만 풀어서 반환
+"""
+
+import json
+import math
+import os
+import struct
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b'JJCH'
+VERSION = 1
+FLAG_ZLIB = 1
+HEADER = struct.Struct('<4sBBHIIII')
+BLOCK_CHUNKS = 256
+
+# 이 포맷으로 저장할 수 있는 청크 필드 (다른 필드가 있으면 JSON으로 저장)
+FIELDS = {'text', 'timestamp', 'speaker'}
+
+
+def can_encode(chunks: List[Dict]) -> bool:
+    return all(
+        {'text', 'timestamp'} <= set(chunk) <= FIELDS
+        and isinstance(chunk['timestamp'], (list, tuple)) and len(chunk['timestamp']) == 2
+        for chunk in chunks
+    )
+
+
+def encode_chunks(chunks: List[Dict], compress: bool = True, block_chunks: int = BLOCK_CHUNKS) -> bytes:
+    n = len(chunks)
+    speakers: List[str] = []
+    speaker_ids: Dict[str, int] = {}
+
+    starts = np.full(n, np.nan, dtype='<f8')
+    ends = np.full(n, np.nan, dtype='<f8')
+    speaker_col = np.full(n, -1, dtype='<i4')
+    texts = []
+
+    for i, chunk in enumerate(chunks):
+        timestamp = chunk['timestamp']
+        if timestamp[0] is not None:
+            starts[i] = timestamp[0]
+        if timestamp[1] is not None:
+            ends[i] = timestamp[1]
+        if 'speaker' in chunk:
+            speaker = chunk['speaker']
+            if speaker not in speaker_ids:
+                speaker_ids[speaker] = len(speakers)
+                speakers.append(speaker)
+            speaker_col[i] = speaker_ids[speaker]
+        texts.append((chunk['text'] or '').encode('utf-8'))
+
+    text_len = np.array([len(text) for text in texts], dtype='<u4')
+
+    blocks = []
+    for i in range(0, n, block_chunks):
+        block = b''.join(texts[i:i + block_chunks])
+        blocks.append(zlib.compress(block, 6) if compress else block)
+    offsets = np.zeros(len(blocks) + 1, dtype='<u8')
+    offsets[1:] = np.cumsum([len(block) for block in blocks])
+
+    # speaker가 None인 청크도 있으므로 화자 목록은 JSON으로
+    speaker_json = json.dumps(speakers, ensure_ascii=False).encode('utf-8')
+    header = HEADER.pack(MAGIC, VERSION, FLAG_ZLIB if compress else 0, 0, n, block_chunks, len(blocks), len(speaker_json))
+
+    return b''.join([
+        header, speaker_json,
+        starts.tobytes(), ends.tobytes(), speaker_col.tobytes(), text_len.tobytes(), offsets.tobytes(),
+        *blocks
+    ])
+
+
+def write_chunks(path: str, chunks: List[Dict], compress: bool = True) -> int:
+    """청크 파일 원자적 저장 - 쓴 bytes 반환"""
+    payload = encode_chunks(chunks, compress)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(payload)
+
+
+def read_chunks(path: str, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[List[int], List[Dict]]:
+    """
+    청크 읽기 (start/end를 주면 그 시간 범위와 겹치는 청크만)
+
+    Returns:
+        (원래 청크 index 목록, 청크 목록)
+    """
+    with open(path, 'rb') as f:
+        magic, version, flags, _, n, block_chunks, n_blocks, speakers_len = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'지원하지 않는 청크 파일: {path}')
+
+        speakers = json.loads(f.read(speakers_len).decode('utf-8'))
+        starts = np.fromfile(f, dtype='<f8', count=n)
+        ends = np.fromfile(f, dtype='<f8', count=n)
+        speaker_col = np.fromfile(f, dtype='<i4', count=n)
+        text_len = np.fromfile(f, dtype='<u4', count=n)
+        offsets = np.fromfile(f, dtype='<u8', count=n_blocks + 1)
+        blocks_at = f.tell()
+
+        if start is None and end is None:
+            indices = np.arange(n)
+        else:
+            # 끝 시간이 없는 청크(마지막 청크 등)는 시작 시간으로 판단
+            chunk_end = np.where(np.isnan(ends), starts, ends)
+            mask = ~np.isnan(starts)
+            if start is not None:
+                mask &= ~(chunk_end < start)
+            if end is not None:
+                mask &= ~(starts > end)
+            indices = np.flatnonzero(mask)
+
+        # 블록 안에서의 텍스트 위치
+        text_end = np.cumsum(text_len, dtype=np.int64)
+        block_first = (np.arange(n) // block_chunks) * block_chunks
+        block_base = np.concatenate(([0], text_end))[block_first]
+        local_end = text_end - block_base
+        local_start = local_end - text_len
+
+        # 원소 단위 접근은 파이썬 리스트가 빠름
+        starts, ends = starts.tolist(), ends.tolist()
+        speaker_col, local_start, local_end = speaker_col.tolist(), local_start.tolist(), local_end.tolist()
+        indices = indices.tolist()
+
+        decoded: Dict[int, bytes] = {}
+        chunks = []
+        for i in indices:
+            block = i // block_chunks
+            if block not in decoded:
+                f.seek(blocks_at + int(offsets[block]))
+                data = f.read(int(offsets[block + 1] - offsets[block]))
+                decoded[block] = zlib.decompress(data) if flags & FLAG_ZLIB else data
+
+            chunk = {
+                'text': decoded[block][local_start[i]:local_end[i]].decode('utf-8'),
+                'timestamp': [
+                    None if math.isnan(starts[i]) else starts[i],
+                    None if math.isnan(ends[i]) else ends[i]
+                ]
+            }
+            if speaker_col[i] >= 0:
+                chunk['speaker'] = speakers[speaker_col[i]]
+            chunks.append(chunk)
+
+    return indices, chunks
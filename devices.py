@@ -0,0 +1,83 @@
+"""장치 선택 (torch를 불러오지 않고 CUDA 사용 가능 여부 확인)
+
+웹 프로세스는 추론하지 않지만 작업을 배정할 장치 큐, 캐시 키, 설정 검증에 CUDA 여부가 필요함
+- 이미 torch를 불러온 프로세스면 torch 결과를 그대로 사용
+- 아니면 CUDA 드라이버(libcuda)에 GPU 수만 물어봄 (torch import 수 초 + 수백 MB를 피함)
+"""
+
+import ctypes
+import os
+import sys
+import threading
+
+# CPU 추론 백엔드
+#   torch: 기본 float32
+#   int8: nn.Linear 동적 int8 양자화 (추가 의존성 없음)
+#   onnx: ONNX Runtime으로 export한 그래프 (optimum[onnxruntime] 필요)
+CPU_BACKENDS = ["torch", "int8", "onnx"]
+
+# GPU 추론 백엔드 (선택해야 적용 - 기본 torch)
+#   torch: 기본 float16
+#   sdpa: scaled dot-product attention (지원하는 GPU에서는 flash attention 커널 사용)
+#   compiled: sdpa + static KV cache + torch.compile (로드할 때 워밍업)
+#   speculative: sdpa + 작은 Whisper 모델이 토큰을 먼저 제안하고 큰 모델이 한 번에 검증 (배치 1)
+GPU_BACKENDS = ["torch", "sdpa", "compiled", "speculative"]
+
+_driver_cuda = None
+_driver_lock = threading.Lock()
+
+
+def _probe_cuda_driver() -> bool:
+    """CUDA 드라이버 API로 GPU 수 확인 (CUDA_VISIBLE_DEVICES 반영)"""
+    names = ['nvcuda.dll'] if os.name == 'nt' else ['libcuda.so.1', 'libcuda.so']
+    for name in names:
+        try:
+            lib = ctypes.CDLL(name)
+        except OSError:
+            continue
+        count = ctypes.c_int(0)
+        try:
+            return lib.cuInit(0) == 0 and lib.cuDeviceGetCount(ctypes.byref(count)) == 0 and count.value > 0
+        except AttributeError:
+            return False
+    return False
+
+
+def cuda_available() -> bool:
+    """
+    CUDA 사용 가능 여부
+
+    드라이버만 확인하므로 CPU 전용 torch가 설치된 GPU 서버에서는 torch를 불러오기 전까지 True일 수 있음
+    (추론 프로세스는 모델을 로드하면서 torch를 불러오므로 실제 장치 선택은 항상 torch 기준)
+    """
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        return torch.cuda.is_available()
+
+    global _driver_cuda
+    with _driver_lock:
+        if _driver_cuda is None:
+            _driver_cuda = _probe_cuda_driver()
+        return _driver_cuda
+
+
+def get_device(device_mode="auto") -> str:
+    """GPU/CPU 선택 (auto, cuda, cpu) - 'cuda:0' 또는 'cpu'"""
+    if device_mode == "cuda":
+        if not cuda_available():
+            raise ValueError("CUDA를 사용할 수 없습니다. GPU가 없거나 CUDA가 설치되지 않았습니다.")
+        return "cuda:0"
+    elif device_mode == "cpu":
+        return "cpu"
+    else:  # auto
+        return "cuda:0" if cuda_available() else "cpu"
+
+
+def dtype_name(device: str) -> str:
+    """장치별 연산 dtype 이름 (torch 속성 이름 - GPU float16, CPU float32)"""
+    return "float16" if device.startswith("cuda") else "float32"
+
+
+def effective_backend(device_mode="auto", cpu_backend="torch", gpu_backend="torch"):
+    """실제로 적용될 백엔드 - CPU 백엔드는 CPU에서만, GPU 백엔드는 GPU에서만 사용 (GPU가 없으면 CPU 백엔드로 대체)"""
+    return cpu_backend if get_device(device_mode) == "cpu" else gpu_backend
@@ -1,90 +1,93 @@
 """화자 분리 모듈 (pyannote.audio 사용)"""
 
+from contextlib import contextmanager
 from typing import List, Dict, Optional
-import torch
-
-# PyTorch 2.6+ weights_only 문제 해결 (pyannote.audio 호환성)
-_original_torch_load = torch.load
-def _patched_torch_load(*args, **kwargs):
-    kwargs['weights_only'] = False
-    return _original_torch_load(*args, **kwargs)
-torch.load = _patched_torch_load
-
-# lightning_fabric도 patch
-import lightning_fabric.utilities.cloud_io as cloud_io
-cloud_io.torch.load = _patched_torch_load
+import bisect
+import heapq
+import threading
+import numpy as np
 
 # 캐시된 파이프라인
 _diarization_pipeline = None
+_pipeline_lock = threading.Lock()  # 병렬 작업에서 중복 로드 방지
+
+
+@contextmanager
+def _full_checkpoint_load():
+    """
+    pyannote 체크포인트를 읽는 동안만 torch.load의 weights_only를 끔
+
+    PyTorch 2.6+는 weights_only=True가 기본이라 pyannote.audio 3.x 체크포인트(lightning 설정 객체 포함)를 읽지 못함
+    - 전역으로 바꿔 두면 같은 프로세스의 다른 torch.load(Whisper 등)까지 안전하지 않은 로드가 되므로 로드하는 동안만 적용
+    - lightning_fabric(cloud_io)은 torch.load를 모듈 속성으로 찾으므로 함께 적용됨
+    """
+    import torch
+
+    original = torch.load
+
+    def load(*args, **kwargs):
+        kwargs['weights_only'] = False
+        return original(*args, **kwargs)
+
+    torch.load = load
+    try:
+        yield
+    finally:
+        torch.load = original
 
 
 def load_diarization_pipeline(hf_token: str):
     """화자 분리 파이프라인 로드"""
     global _diarization_pipeline
 
-    if _diarization_pipeline is None:
-        from pyannote.audio import Pipeline
+    with _pipeline_lock:
+        if _diarization_pipeline is None:
+            import torch
+            from pyannote.audio import Pipeline
 
-        _diarization_pipeline = Pipeline.from_pretrained(
-            "pyannote/speaker-diarization-3.1",
-            use_auth_token=hf_token
-        )
+            with _full_checkpoint_load():
+                _diarization_pipeline = Pipeline.from_pretrained(
+                    "pyannote/speaker-diarization-3.1",
+                    use_auth_token=hf_token
+                )
 
-        # GPU 사용 가능하면 GPU로 이동
-        import torch
-        if torch.cuda.is_available():
-            _diarization_pipeline.to(torch.device("cuda"))
+            # GPU 사용 가능하면 GPU로 이동
+            if torch.cuda.is_available():
+                _diarization_pipeline.to(torch.device("cuda"))
 
     return _diarization_pipeline
 
 
-def convert_to_wav_if_needed(audio_path: str) -> str:
-    """m4a 등 지원되지 않는 형식을 wav로 변환"""
-    import os
-    import tempfile
-    import subprocess
-
-    # wav는 그대로 반환
-    if audio_path.lower().endswith('.wav'):
-        return audio_path
-
-    # ffmpeg으로 wav 변환
-    wav_path = tempfile.mktemp(suffix='.wav')
-    try:
-        subprocess.run([
-            'ffmpeg', '-i', audio_path,
-            '-ar', '16000',  # 16kHz로 리샘플링
-            '-ac', '1',  # 모노
-            '-y',  # 덮어쓰기
-            wav_path
-        ], check=True, capture_output=True)
-        return wav_path
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"ffmpeg 변환 실패: {e.stderr.decode()}")
-
-
-def perform_diarization(audio_path: str, hf_token: str) -> List[Dict]:
+def perform_diarization(audio, hf_token: str, return_embeddings: bool = False):
     """
-    오디오 파일에서 화자 분리 수행
+    오디오에서 화자 분리 수행
+
+    Args:
+        audio: 파일 경로 또는 16kHz float32 배열 (audio.load_audio 결과)
+        return_embeddings: 화자별 음성 벡터도 반환 (화자 분리 중에 계산한 값 - 모델을 다시 돌리지 않음)
 
     Returns:
         List[Dict]: 각 세그먼트의 정보
             - start: 시작 시간 (초)
             - end: 종료 시간 (초)
             - speaker: 화자 ID
+        return_embeddings면 (세그먼트 목록, {화자 ID: 음성 벡터})
     """
+    import torch
+    from audio import SAMPLE_RATE, load_audio
+
     pipeline = load_diarization_pipeline(hf_token)
 
-    # 지원되지 않는 형식은 wav로 변환
-    wav_path = convert_to_wav_if_needed(audio_path)
+    # 이미 디코딩된 배열을 메모리에서 바로 전달 (임시 wav 없음)
+    if isinstance(audio, str):
+        audio = load_audio(audio)
+    waveform = torch.from_numpy(audio).unsqueeze(0)
 
     # 화자 분리 수행
-    diarization = pipeline(wav_path)
-
-    # 임시 파일이면 삭제
-    if wav_path != audio_path:
-        import os
-        os.remove(wav_path)
+    if return_embeddings:
+        diarization, embeddings = pipeline({"waveform": waveform, "sample_rate": SAMPLE_RATE}, return_embeddings=True)
+    else:
+        diarization = pipeline({"waveform": waveform, "sample_rate": SAMPLE_RATE})
 
     segments = []
     for turn, _, speaker in diarization.itertracks(yield_label=True):
@@ -94,19 +97,137 @@ def perform_diarization(audio_path: str, hf_token: str) -> List[Dict]:
             "speaker": speaker
         })
 
-    return segments
+    if not return_embeddings:
+        return segments
+
+    # embeddings[i]는 diarization.labels()[i] 화자의 벡터 (겹친 발화만 있는 화자는 NaN)
+    vectors = {}
+    if embeddings is not None:
+        for speaker, vector in zip(diarization.labels(), embeddings):
+            vector = np.asarray(vector, dtype=np.float32)
+            if np.all(np.isfinite(vector)):
+                vectors[speaker] = vector
+    return segments, vectors
+
+
+def _chunk_span(chunk: Dict):
+    """청크의 (start, end) - end가 없으면 start로 취급"""
+    start, end = chunk['timestamp'][0], chunk['timestamp'][1]
+    if start is None:
+        start = end or 0.0
+    if end is None:
+        end = start
+    return start, end
+
+
+def _assign_speakers(spans: List, diarization_segments: List[Dict]) -> List[Dict]:
+    """
+    sweep-line으로 각 청크와 겹치는 화자별 시간 계산 - O((n + m) log m)
+
+    Returns:
+        청크별 {speaker: 겹친 시간} 및 clip된 구간 목록
+    """
+    segments = sorted(diarization_segments, key=lambda seg: seg['start'])
+    order = sorted(range(len(spans)), key=lambda i: spans[i][0])
+
+    overlaps = [None] * len(spans)
+    active = []  # (end, index) 힙 - 현재 청크 시작 이후에 끝나는 세그먼트
+    next_seg = 0
+
+    for i in order:
+        chunk_start, chunk_end = spans[i]
+
+        # 청크가 끝나기 전에 시작하는 세그먼트를 활성화
+        while next_seg < len(segments) and segments[next_seg]['start'] <= chunk_end:
+            heapq.heappush(active, (segments[next_seg]['end'], next_seg))
+            next_seg += 1
+
+        # 청크 시작 전에 끝난 세그먼트 제거 (이후 청크도 시작이 같거나 늦으므로 안전)
+        while active and active[0][0] < chunk_start:
+            heapq.heappop(active)
+
+        weights = {}
+        clipped = []
+        for _, index in active:
+            seg = segments[index]
+            if chunk_end > chunk_start:
+                overlap = min(chunk_end, seg['end']) - max(chunk_start, seg['start'])
+                if overlap <= 0:
+                    continue
+            elif not (seg['start'] <= chunk_start <= seg['end']):
+                continue
+            else:
+                overlap = 0.0
+            weights[seg['speaker']] = weights.get(seg['speaker'], 0.0) + overlap
+            clipped.append((max(chunk_start, seg['start']), min(chunk_end, seg['end']), seg['speaker']))
+
+        overlaps[i] = {'weights': weights, 'clipped': sorted(clipped)}
+
+    return overlaps
+
+
+def _nearest_speaker(mids: List[float], speakers: List[str], point: float) -> Optional[str]:
+    """세그먼트 중간 지점이 가장 가까운 화자 (이진 탐색)"""
+    pos = bisect.bisect_left(mids, point)
+    candidates = [j for j in (pos - 1, pos) if 0 <= j < len(mids)]
+    if not candidates:
+        return None
+    best = min(candidates, key=lambda j: abs(mids[j] - point))
+    return speakers[best]
+
+
+def _speaker_pieces(chunk_start: float, chunk_end: float, clipped: List, min_duration: float) -> List:
+    """청크 구간을 화자가 바뀌는 지점에서 나눈 (start, end, speaker) 목록"""
+    pieces = []
+    for seg_start, _, speaker in clipped:
+        if not pieces:
+            pieces.append([chunk_start, chunk_end, speaker])
+        elif speaker != pieces[-1][2] and seg_start - pieces[-1][0] >= min_duration:
+            pieces[-1][1] = seg_start
+            pieces.append([seg_start, chunk_end, speaker])
+
+    # 너무 짧은 마지막 조각은 앞 조각에 합침
+    if len(pieces) > 1 and pieces[-1][1] - pieces[-1][0] < min_duration:
+        pieces[-2][1] = pieces[-1][1]
+        pieces.pop()
+
+    return pieces
+
+
+def _split_text(text: str, pieces: List) -> List[str]:
+    """조각 길이에 비례해 단어 단위로 텍스트 분배"""
+    words = text.split()
+    total = sum(end - start for start, end, _ in pieces) or 1.0
+    parts = []
+    taken = 0
+    elapsed = 0.0
+    for start, end, _ in pieces:
+        elapsed += end - start
+        until = len(words) if len(parts) == len(pieces) - 1 else round(len(words) * elapsed / total)
+        parts.append(' ' + ' '.join(words[taken:until]) if until > taken else '')
+        taken = max(taken, until)
+    return parts
 
 
 def merge_transcription_with_diarization(
     chunks: List[Dict],
-    diarization_segments: List[Dict]
+    diarization_segments: List[Dict],
+    split_on_speaker_change: bool = False,
+    min_split_duration: float = 1.0,
+    speaker_map: Optional[Dict[str, str]] = None
 ) -> List[Dict]:
     """
     음성 인식 결과와 화자 분리 결과 병합
 
+    청크와 가장 많이 겹치는 화자를 배정하고, 겹치는 화자가 없으면
+    중간 지점이 가장 가까운 세그먼트의 화자를 사용
+
     Args:
         chunks: Whisper의 변환 결과 (text, timestamp)
         diarization_segments: 화자 분리 결과 (start, end, speaker)
+        split_on_speaker_change: 청크 안에서 화자가 바뀌면 청크를 나눔
+        min_split_duration: 나눈 조각의 최소 길이 (초)
+        speaker_map: 화자 ID → 표시 이름 (미리 넣은 이름은 그대로 쓰고, 나머지 화자는 등장 순서대로 화자1, 화자2...로 채워 넣음)
 
     Returns:
         화자 정보가 추가된 청크 리스트
@@ -114,45 +235,58 @@ def merge_transcription_with_diarization(
     if not diarization_segments:
         return chunks
 
+    timed = [i for i, chunk in enumerate(chunks) if chunk.get('timestamp')]
+    spans = [_chunk_span(chunks[i]) for i in timed]
+    overlaps = dict(zip(timed, _assign_speakers(spans, diarization_segments)))
+    spans = dict(zip(timed, spans))
+
+    by_mid = sorted(diarization_segments, key=lambda seg: (seg['start'] + seg['end']) / 2)
+    mids = [(seg['start'] + seg['end']) / 2 for seg in by_mid]
+    mid_speakers = [seg['speaker'] for seg in by_mid]
+
     # 화자 ID를 보기 좋은 이름으로 변환
-    speaker_map = {}
+    if speaker_map is None:
+        speaker_map = {}
     speaker_count = 0
 
+    def label(speaker):
+        nonlocal speaker_count
+        if speaker and speaker not in speaker_map:
+            speaker_count += 1
+            speaker_map[speaker] = format_speaker_label(speaker, speaker_count)
+        return speaker_map.get(speaker, '화자')
+
     merged_chunks = []
 
-    for chunk in chunks:
-        if not chunk.get('timestamp'):
+    for i, chunk in enumerate(chunks):
+        if i not in overlaps:
             merged_chunks.append(chunk)
             continue
 
-        chunk_start = chunk['timestamp'][0]
-        chunk_end = chunk['timestamp'][1]
-        chunk_mid = (chunk_start + chunk_end) / 2
-
-        # 청크의 중간 지점이 속한 화자 찾기
-        speaker = None
-        for seg in diarization_segments:
-            if seg['start'] <= chunk_mid <= seg['end']:
-                speaker = seg['speaker']
-                break
-
-        # 화자를 찾지 못한 경우 가장 가까운 세그먼트의 화자 사용
-        if speaker is None:
-            min_distance = float('inf')
-            for seg in diarization_segments:
-                seg_mid = (seg['start'] + seg['end']) / 2
-                distance = abs(chunk_mid - seg_mid)
-                if distance < min_distance:
-                    min_distance = distance
-                    speaker = seg['speaker']
-
-        # 화자 이름 매핑
-        if speaker and speaker not in speaker_map:
-            speaker_count += 1
-            speaker_map[speaker] = format_speaker_label(speaker, speaker_count)
+        chunk_start, chunk_end = spans[i]
+        weights = overlaps[i]['weights']
+
+        if weights:
+            speaker = max(weights, key=weights.get)
+        else:
+            # 겹치는 세그먼트가 없으면 가장 가까운 세그먼트의 화자 사용
+            speaker = _nearest_speaker(mids, mid_speakers, (chunk_start + chunk_end) / 2)
+
+        if split_on_speaker_change and len(weights) > 1:
+            pieces = _speaker_pieces(chunk_start, chunk_end, overlaps[i]['clipped'], min_split_duration)
+            if len(pieces) > 1:
+                for (start, end, piece_speaker), text in zip(pieces, _split_text(chunk.get('text', ''), pieces)):
+                    if not text.strip():
+                        continue
+                    piece = chunk.copy()
+                    piece['text'] = text
+                    piece['timestamp'] = (start, end)
+                    piece['speaker'] = label(piece_speaker)
+                    merged_chunks.append(piece)
+                continue
 
         merged_chunk = chunk.copy()
-        merged_chunk['speaker'] = speaker_map.get(speaker, '화자')
+        merged_chunk['speaker'] = label(speaker)
         merged_chunks.append(merged_chunk)
 
     return merged_chunks
@@ -0,0 +1,418 @@
+"""백그라운드 작업 큐 모듈 (장치별 워커 풀 + 우선순위 FIFO, SQLite 작업 저장소)"""
+
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class JobQueue:
+    """
+    장치(cuda/cpu)별로 분리된 우선순위 큐와 워커 풀
+
+    - priority가 클수록 먼저 처리, 같은 priority는 FIFO
+    - 장치별 동시 실행 수 제한 (예: GPU 1, CPU N)
+    - 대기 시간/큐 길이 통계 제공
+    """
+
+    def __init__(self, handler: Callable[[str], None], concurrency: Dict[str, int]):
+        self.handler = handler
+        self.concurrency = dict(concurrency)
+        self._queues: Dict[str, List] = {device: [] for device in self.concurrency}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._workers: List[threading.Thread] = []
+        self._started = False
+
+        # 통계
+        self._running = {device: 0 for device in self.concurrency}
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def start(self):
+        """워커 스레드 시작 (여러 번 호출해도 한 번만 시작)"""
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+
+        for device, count in self.concurrency.items():
+            for i in range(count):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    args=(device,),
+                    name=f"job-worker-{device}-{i}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+        print(f"[Queue] Workers started: {self.concurrency}")
+
+    def submit(self, job_id: str, device: str = "cpu", priority: int = 0) -> int:
+        """
+        작업 등록
+
+        Returns:
+            int: 등록 시점의 해당 장치 대기열 위치 (0부터)
+        """
+        if device not in self._queues:
+            device = "cpu" if "cpu" in self._queues else next(iter(self._queues))
+
+        with self._cond:
+            heapq.heappush(self._queues[device], (-priority, next(self._seq), time.time(), job_id))
+            self._submitted += 1
+            position = len(self._queues[device]) - 1
+            self._cond.notify_all()
+
+        return position
+
+    def stats(self) -> Dict:
+        """큐 길이, 실행 중 작업 수, 대기 시간 통계"""
+        with self._cond:
+            now = time.time()
+            devices = {}
+            for device, queue in self._queues.items():
+                oldest = min((item[2] for item in queue), default=None)
+                devices[device] = {
+                    "concurrency": self.concurrency[device],
+                    "queued": len(queue),
+                    "running": self._running[device],
+                    "oldest_wait": (now - oldest) if oldest else 0.0,
+                }
+
+            started = self._completed + self._failed + sum(self._running.values())
+            return {
+                "devices": devices,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "wait_avg": (self._wait_total / started) if started else 0.0,
+                "wait_max": self._wait_max,
+            }
+
+    def _worker_loop(self, device: str):
+        queue = self._queues[device]
+
+        while True:
+            with self._cond:
+                while not queue:
+                    self._cond.wait()
+                _, _, enqueued_at, job_id = heapq.heappop(queue)
+                waited = time.time() - enqueued_at
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                self._running[device] += 1
+
+            print(f"[Queue] {device} worker picked job {job_id} (waited {waited:.1f}s)")
+
+            failed = False
+            try:
+                self.handler(job_id)
+            except Exception as e:
+                failed = True
+                print(f"[Queue] Job {job_id} failed: {e}")
+            finally:
+                with self._cond:
+                    self._running[device] -= 1
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+
+
+# 작업 행 외에 JSON으로 함께 저장하는 상태 컬럼
+_JOB_COLUMNS = ('status', 'progress', 'message')
+_FINISHED = ('complete', 'error')
+
+
+class JobStore:
+    """
+    작업 상태 + 진행 이벤트 저장소 (SQLite)
+
+    - 서버를 재시작해도 작업과 이벤트가 남음 (SSE 재연결 시 Last-Event-ID로 이어서 전송)
+    - 같은 파일을 여러 웹 프로세스가 함께 읽음 (WAL 모드)
+    - 메모리에는 작업을 두지 않고, 끝난 작업은 TTL / 최대 개수 기준으로 삭제
+    - SSE 구독자는 작업별 Condition에서 대기하고, 다른 프로세스가 발행한 이벤트는
+      프로세스당 하나의 poller가 확인해서 해당 작업의 구독자만 깨움 (구독자 수와 무관한 DB 부하)
+    - 설정 화면에서 바꾼 설정도 함께 저장 (웹/추론 워커 프로세스가 같은 설정 사용)
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 24 * 3600, max_jobs: int = 1000, poll_interval: float = 0.5):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+        self.poll_interval = poll_interval
+        self._lock = threading.RLock()
+        self._conds: Dict[str, threading.Condition] = {}  # 구독 중인 작업별 Condition
+        self._watchers: Dict[str, int] = {}
+        self._seen: Dict[str, int] = {}  # 작업별로 알고 있는 마지막 이벤트 seq
+        self._poller: Optional[threading.Thread] = None
+        self._last_purge = 0.0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                progress INTEGER NOT NULL DEFAULT 0,
+                message TEXT,
+                data TEXT NOT NULL,
+                result TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (status, updated_at);
+            CREATE TABLE IF NOT EXISTS events (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                event TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            ) WITHOUT ROWID;
+        """)
+
+    def create(self, job_id: str, job: Dict):
+        """작업 등록 (status/progress/message 외 필드는 data로 저장)"""
+        now = time.time()
+        data = {k: v for k, v in job.items() if k not in _JOB_COLUMNS and k != 'result'}
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, progress, message, data, result, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, job.get('status', 'queued'), job.get('progress', 0), job.get('message'),
+                 json.dumps(data, ensure_ascii=False), None, now, now)
+            )
+            self._db.commit()
+        self._maybe_purge()
+
+    def exists(self, job_id: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is not None
+
+    def get(self, job_id: str, with_result: bool = True) -> Optional[Dict]:
+        """작업 상태 (없으면 None)"""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT status, progress, message, data, {'result' if with_result else 'NULL'} FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        status, progress, message, data, result = row
+        job = json.loads(data)
+        job.update(status=status, progress=progress, message=message, result=json.loads(result) if result else None)
+        return job
+
+    def update(self, job_id: str, **fields):
+        """작업 상태 일부 갱신 (result는 별도 컬럼, 나머지 필드는 data에 병합)"""
+        with self._lock:
+            self._update(job_id, fields)
+            self._db.commit()
+
+    def _update(self, job_id: str, fields: Dict):
+        columns = {k: v for k, v in fields.items() if k in _JOB_COLUMNS}
+        extra = {k: v for k, v in fields.items() if k not in _JOB_COLUMNS and k != 'result'}
+
+        assignments = [f"{k} = ?" for k in columns] + ["updated_at = ?"]
+        params = list(columns.values()) + [time.time()]
+        if 'result' in fields:
+            assignments.append("result = ?")
+            params.append(json.dumps(fields['result'], ensure_ascii=False) if fields['result'] is not None else None)
+        if extra:
+            row = self._db.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            data = json.loads(row[0]) if row else {}
+            data.update(extra)
+            assignments.append("data = ?")
+            params.append(json.dumps(data, ensure_ascii=False))
+
+        self._db.execute(f"UPDATE jobs SET {', '.join(assignments)} WHERE id = ?", params + [job_id])
+
+    def publish(self, job_id: str, event: Dict, **fields):
+        """진행 이벤트 추가 - 이벤트의 progress/message와 fields로 작업 상태도 함께 갱신"""
+        if 'progress' in event:
+            fields.setdefault('progress', event['progress'])
+        if 'message' in event:
+            fields.setdefault('message', event['message'])
+
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO events (job_id, seq, event) "
+                "SELECT ?, COALESCE(MAX(seq), -1) + 1, ? FROM events WHERE job_id = ?",
+                (job_id, json.dumps(event, ensure_ascii=False), job_id)
+            )
+            self._update(job_id, fields)
+            self._db.commit()
+            if job_id in self._conds:
+                self._conds[job_id].notify_all()
+
+    def read(self, job_id: str, start: int, timeout: float = 15.0) -> List[Dict]:
+        """
+        start 이후의 이벤트 반환, 없으면 timeout까지 대기 (빈 리스트는 keep-alive 신호)
+
+        같은 프로세스의 publish는 바로 깨어나고, 다른 프로세스의 publish는 poller가 poll_interval마다 확인
+        """
+        deadline = time.time() + timeout
+        with self._lock:
+            cond = self._conds.setdefault(job_id, threading.Condition(self._lock))
+            self._watchers[job_id] = self._watchers.get(job_id, 0) + 1
+            self._start_poller()
+            try:
+                while True:
+                    rows = self._db.execute(
+                        "SELECT seq, event FROM events WHERE job_id = ? AND seq >= ? ORDER BY seq",
+                        (job_id, start)
+                    ).fetchall()
+                    remaining = deadline - time.time()
+                    if rows or remaining <= 0:
+                        if rows:
+                            self._seen[job_id] = max(self._seen.get(job_id, -1), rows[-1][0])
+                        return [json.loads(row[1]) for row in rows]
+                    cond.wait(remaining)
+            finally:
+                self._watchers[job_id] -= 1
+                if not self._watchers[job_id]:
+                    del self._watchers[job_id]
+                    del self._conds[job_id]
+                    self._seen.pop(job_id, None)
+
+    def _start_poller(self):
+        if self._poller is None:
+            self._poller = threading.Thread(target=self._poll_loop, name='job-events-poller', daemon=True)
+            self._poller.start()
+
+    def _poll_loop(self):
+        """구독 중인 작업의 새 이벤트를 한 번의 쿼리로 확인 (다른 프로세스가 발행한 이벤트용)"""
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                if not self._watchers:
+                    continue
+                job_ids = list(self._watchers)
+                placeholders = ','.join('?' * len(job_ids))
+                rows = self._db.execute(
+                    f"SELECT job_id, MAX(seq) FROM events WHERE job_id IN ({placeholders}) GROUP BY job_id",
+                    job_ids
+                ).fetchall()
+                for job_id, seq in rows:
+                    if seq > self._seen.get(job_id, -1) and job_id in self._conds:
+                        self._seen[job_id] = seq
+                        self._conds[job_id].notify_all()
+
+    def queued_count(self, device: Optional[str] = None) -> int:
+        """대기 중인 작업 수 (device를 주면 그 장치 작업만)"""
+        query = "SELECT COUNT(*) FROM jobs WHERE status = 'queued'"
+        params = []
+        if device is not None:
+            query += " AND json_extract(data, '$.device') = ?"
+            params.append(device)
+        with self._lock:
+            return self._db.execute(query, params).fetchone()[0]
+
+    def claim(self, device: str, limit: int) -> List[Dict]:
+        """
+        대기 중인 작업을 priority 높은 순, 같으면 먼저 들어온 순으로 가져감 (추론 워커 프로세스용)
+
+        여러 워커가 같은 작업을 가져가지 않도록 status가 queued일 때만 assigned로 바꿈
+        """
+        if limit <= 0:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' AND json_extract(data, '$.device') = ? "
+                "ORDER BY json_extract(data, '$.priority') DESC, created_at LIMIT ?",
+                (device, limit)
+            ).fetchall()
+            claimed = []
+            for (job_id,) in rows:
+                cursor = self._db.execute(
+                    "UPDATE jobs SET status = 'assigned', updated_at = ? WHERE id = ? AND status = 'queued'",
+                    (time.time(), job_id)
+                )
+                if cursor.rowcount:
+                    claimed.append(job_id)
+            self._db.commit()
+
+        jobs = []
+        for job_id in claimed:
+            job = self.get(job_id, with_result=False)
+            job['id'] = job_id
+            jobs.append(job)
+        return jobs
+
+    def settings(self) -> Dict:
+        """저장된 설정 (웹/추론 워커 프로세스가 함께 사용, 바꾼 적 없는 항목은 없음)"""
+        with self._lock:
+            return {key: json.loads(value) for key, value in self._db.execute("SELECT key, value FROM settings")}
+
+    def save_settings(self, values: Dict):
+        """설정 일부 저장 (항목별로 덮어씀)"""
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in values.items()]
+            )
+            self._db.commit()
+
+    def recover(self) -> List[Dict]:
+        """
+        재시작 전에 끝나지 않은 작업을 다시 대기 상태로 (다시 큐에 넣을 작업 목록 반환)
+        """
+        with self._lock:
+            ids = [row[0] for row in self._db.execute(
+                "SELECT id FROM jobs WHERE status NOT IN (?, ?) ORDER BY created_at", _FINISHED
+            )]
+        jobs = []
+        for job_id in ids:
+            self.publish(job_id, {'stage': 'queued', 'progress': 0, 'message': '서버 재시작 - 다시 대기 중...'}, status='queued')
+            job = self.get(job_id, with_result=False)
+            job['id'] = job_id
+            jobs.append(job)
+        if jobs:
+            print(f"[Jobs] Recovered {len(jobs)} unfinished jobs")
+        return jobs
+
+    def _maybe_purge(self):
+        """끝난 지 TTL이 지난 작업, 최대 개수를 넘는 오래된 작업 삭제 (1분에 한 번)"""
+        now = time.time()
+        if now - self._last_purge < 60:
+            return
+        self._last_purge = now
+
+        with self._lock:
+            expired = [row[0] for row in self._db.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                _FINISHED + (now - self.ttl_seconds,)
+            )]
+            overflow = self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] - len(expired) - self.max_jobs
+            if overflow > 0:
+                expired += [row[0] for row in self._db.execute(
+                    "SELECT id FROM jobs WHERE status IN (?, ?) AND updated_at >= ? ORDER BY updated_at LIMIT ?",
+                    _FINISHED + (now - self.ttl_seconds, overflow)
+                )]
+            if not expired:
+                return
+
+            self._db.executemany("DELETE FROM events WHERE job_id = ?", [(job_id,) for job_id in expired])
+            self._db.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in expired])
+            self._db.commit()
+        print(f"[Jobs] Purged {len(expired)} finished jobs")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            by_status = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+            events = self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        return {'jobs': by_status, 'events': events, 'ttl_seconds': self.ttl_seconds, 'max_jobs': self.max_jobs}
@@ -0,0 +1,252 @@
+"""Prometheus 텍스트 형식 메트릭 모듈 (카운터, 게이지, 히스토그램)
+
+- 프로세스마다 Registry 하나에 값을 누적
+- 운영 모드처럼 웹/추론 워커 프로세스가 나뉘면 MetricsSpool이 각 프로세스의 스냅샷을
+  공유 폴더에 주기적으로 기록하고, /metrics를 받은 프로세스가 모두 합쳐서 응답
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 단계별 소요 시간 기본 구간 (초)
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+class Metric:
+    type = ''
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labels):
+            raise ValueError(f'{self.name}: 레이블이 맞지 않습니다 ({sorted(labels)} != {sorted(self.labels)})')
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            values = [[list(key), value] for key, value in self._values.items()]
+        return {'type': self.type, 'help': self.help, 'labels': list(self.labels), 'values': values}
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value: float, **labels):
+        """다른 객체가 이미 누적한 값 반영 (캐시 적중 수 등)"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """누적 구간 카운트 + 합계 + 개수 (값은 [구간별 개수..., 합계, 개수])"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> Dict:
+        snapshot = super().snapshot()
+        snapshot['values'] = [[key, list(counts)] for key, counts in snapshot['values']]
+        snapshot['buckets'] = list(self.buckets)
+        return snapshot
+
+
+class Registry:
+    """메트릭 등록 + 스냅샷 (스냅샷 직전에 수집 함수로 게이지 등 현재 값 갱신)"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f'이미 등록된 메트릭: {metric.name}')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def on_collect(self, collector: Callable[[], None]):
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"[Metrics] Collector error: {e}")
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+
+def merge(snapshots: Iterable[Dict[str, Dict]]) -> Dict[str, Dict]:
+    """여러 프로세스의 스냅샷 합치기 (같은 레이블 값끼리 더함)"""
+    merged: Dict[str, Dict] = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            target = merged.setdefault(name, dict(family, values={}))
+            for key, value in family['values']:
+                key = tuple(key)
+                if key not in target['values']:
+                    target['values'][key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    target['values'][key] = [a + b for a, b in zip(target['values'][key], value)]
+                else:
+                    target['values'][key] += value
+    return merged
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], le: Optional[str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if math.isnan(value):
+            return 'NaN'
+        return repr(value)
+    return str(value)
+
+
+def render(snapshots: Iterable[Dict[str, Dict]]) -> str:
+    """Prometheus 텍스트 형식 (version 0.0.4)"""
+    lines = []
+    for name, family in sorted(merge(snapshots).items()):
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for key, value in sorted(family['values'].items()):
+            if family['type'] == 'histogram':
+                labels = family['labels']
+                for bound, count in zip(family['buckets'], value):
+                    lines.append(f"{name}_bucket{_format_labels(labels, key, _format_value(float(bound)))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels, key, '+Inf')} {value[-1]}")
+                lines.append(f"{name}_sum{_format_labels(labels, key)} {_format_value(float(value[-2]))}")
+                lines.append(f"{name}_count{_format_labels(labels, key)} {value[-1]}")
+            else:
+                lines.append(f"{name}{_format_labels(family['labels'], key)} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsSpool:
+    """
+    프로세스별 스냅샷을 공유 폴더에 주기적으로 기록 (<폴더>/<pid>.json)
+
+    interval의 3배 넘게 갱신되지 않은 파일은 끝난 프로세스로 보고 합치지 않음 (1시간 지나면 삭제)
+    """
+
+    def __init__(self, folder: str, registry: Registry, interval: float = 5.0):
+        self.folder = folder
+        self.registry = registry
+        self.interval = interval
+        self._started = False
+        self._lock = threading.Lock()
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.folder, f'{pid}.json')
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        os.makedirs(self.folder, exist_ok=True)
+        threading.Thread(target=self._loop, name='metrics-spool', daemon=True).start()
+
+    def _loop(self):
+        while True:
+            self.write()
+            time.sleep(self.interval)
+
+    def write(self):
+        path = self._path(os.getpid())
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def read_others(self) -> List[Dict[str, Dict]]:
+        """다른 살아 있는 프로세스의 최근 스냅샷 (시작하지 않았으면 빈 목록)"""
+        if not self._started:
+            return []
+
+        now = time.time()
+        own = f'{os.getpid()}.json'
+        snapshots = []
+        for name in os.listdir(self.folder):
+            if not name.endswith('.json') or name == own:
+                continue
+            path = os.path.join(self.folder, name)
+            try:
+                age = now - os.path.getmtime(path)
+                if age > 3600:
+                    os.remove(path)
+                    continue
+                if age > self.interval * 3:
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
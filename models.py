@@ -0,0 +1,219 @@
+"""Whisper 모델 레지스트리 (여러 모델 상주 + 메모리 예산 기반 LRU 해제)"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Tuple, Union
+
+
+def model_bytes(pipe) -> int:
+    """파이프라인 모델의 파라미터 + 버퍼 메모리 (bytes)"""
+    model = pipe.model
+
+    # ONNX Runtime 모델은 파라미터가 없으므로 export된 파일 크기로 추정
+    if not hasattr(model, "parameters"):
+        folder = getattr(model, "model_save_dir", None)
+        if not folder or not os.path.isdir(folder):
+            return 0
+        return sum(
+            os.path.getsize(os.path.join(folder, name))
+            for name in os.listdir(folder)
+            if os.path.isfile(os.path.join(folder, name))
+        )
+
+    total = 0
+    # speculative decoding 보조 모델도 같은 장치에 상주
+    optimization = getattr(pipe, "optimization", None)
+    for module in (model, getattr(optimization, "assistant", None)):
+        if module is None:
+            continue
+        total += sum(p.numel() * p.element_size() for p in module.parameters())
+        total += sum(b.numel() * b.element_size() for b in module.buffers())
+    return total
+
+
+class ModelEntry:
+    def __init__(self, key: Tuple[str, str, str], pipe, batcher):
+        self.key = key
+        self.pipe = pipe
+        self.batcher = batcher
+        import torch
+
+        self.device = torch.device(pipe.model.device).type  # cuda / cpu
+        self.bytes = model_bytes(pipe)
+        optimization = getattr(pipe, "optimization", None)
+        self.optimization = optimization.stats() if optimization is not None else None
+        self.in_use = 0
+        self.retiring = False  # 레지스트리에서 빠졌지만 사용 중이라 마지막 사용이 끝나면 해제
+        self.loaded_at = time.time()
+        self.last_used = time.time()
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+        self.pipe = None
+        self.batcher = None
+
+
+class ModelRegistry:
+    """
+    (model_id, device_mode, backend)별 Whisper 파이프라인을 상주시키는 레지스트리
+
+    - 작업마다 원하는 모델을 사용 (전역 모델 교체로 다른 작업이 멈추지 않음)
+    - 장치별 메모리 예산을 넘으면 사용 중이 아닌 모델부터 LRU로 해제
+    """
+
+    def __init__(self, loader: Callable[[str, str, str], Tuple], budgets: Union[Dict[str, int], Callable[[], Dict[str, int]]]):
+        """budgets: 장치별 메모리 예산, 또는 첫 모델을 로드할 때 계산하는 함수 (웹 프로세스에서 torch/CUDA를 건드리지 않도록)"""
+        self.loader = loader
+        self._budgets_factory = budgets if callable(budgets) else None
+        self.budgets = {} if callable(budgets) else dict(budgets)
+        self._entries: "OrderedDict[Tuple[str, str, str], ModelEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        self.loads = 0
+        self.evictions = 0
+
+    def _load_lock(self, key):
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def get(self, model_id: str, device_mode: str, backend: str = "torch") -> ModelEntry:
+        """모델 반환 (없으면 로드) - 같은 모델은 동시에 한 번만 로드"""
+        key = (model_id, device_mode, backend)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.last_used = time.time()
+                return entry
+
+        with self._load_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    return entry
+
+            import torch
+
+            if self._budgets_factory is not None:
+                self.budgets, self._budgets_factory = dict(self._budgets_factory()), None
+
+            print(f"Whisper 모델 로딩 중... ({model_id}, device={device_mode}, backend={backend})")
+            try:
+                pipe, batcher = self.loader(model_id, device_mode, backend)
+            except torch.cuda.OutOfMemoryError:
+                # GPU 메모리 부족 시 쉬고 있는 모델을 모두 내리고 한 번 더 시도
+                print("[Models] GPU 메모리 부족 - 사용하지 않는 모델 해제 후 재시도")
+                self._evict("cuda", everything=True)
+                pipe, batcher = self.loader(model_id, device_mode, backend)
+
+            entry = ModelEntry(key, pipe, batcher)
+            with self._lock:
+                self._entries[key] = entry
+                self.loads += 1
+            print(f"모델 로딩 완료! ({entry.bytes / 1024 / 1024:.0f}MB, {entry.device})")
+
+            self._evict(entry.device, keep=key)
+            return entry
+
+    @contextmanager
+    def use(self, model_id: str, device_mode: str, backend: str = "torch"):
+        """작업 동안 모델이 해제되지 않도록 사용 중 표시"""
+        while True:
+            entry = self.get(model_id, device_mode, backend)
+            with self._lock:
+                # get 직후 다른 스레드가 해제했으면 다시 로드
+                if self._entries.get(entry.key) is entry:
+                    entry.in_use += 1
+                    break
+        try:
+            yield entry
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.time()
+                release = entry.retiring and entry.in_use == 0
+            if release:
+                print(f"[Models] 사용이 끝난 이전 모델 해제: {entry.key[0]} ({entry.device})")
+                self._release(entry)
+
+    def reload(self, model_id: str, device_mode: str, backend: str = "torch") -> ModelEntry:
+        """모델 강제 리로드 - 진행 중인 작업은 이전 모델로 끝까지 실행"""
+        self.unload(model_id, device_mode, backend)
+        return self.get(model_id, device_mode, backend)
+
+    def unload(self, model_id: str, device_mode: str, backend: str = "torch"):
+        """모델 해제 - 사용 중이면 레지스트리에서만 빼고 마지막 use()가 끝날 때 해제"""
+        with self._lock:
+            entry = self._entries.pop((model_id, device_mode, backend), None)
+            if entry is not None and entry.in_use:
+                entry.retiring = True
+                print(f"기존 모델은 진행 중인 작업 {entry.in_use}개가 끝나면 해제 ({model_id})")
+                return
+        if entry is not None:
+            print(f"기존 모델 해제 중... ({model_id})")
+            self._release(entry)
+
+    def _used_bytes(self, device: str) -> int:
+        return sum(e.bytes for e in self._entries.values() if e.device == device)
+
+    def _evict(self, device: str, keep=None, everything: bool = False):
+        """예산 초과분만큼 LRU 순으로 해제 (everything=True면 쉬는 모델 전부)"""
+        budget = self.budgets.get(device)
+        released = []
+
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if not everything and (budget is None or self._used_bytes(device) <= budget):
+                    break
+                if entry.device != device or entry.in_use or key == keep:
+                    continue
+                del self._entries[key]
+                released.append(entry)
+                self.evictions += 1
+
+        for entry in released:
+            print(f"[Models] 메모리 예산 초과로 해제: {entry.key[0]} ({entry.device})")
+            self._release(entry)
+
+    def _release(self, entry: ModelEntry):
+        entry.close()
+        if entry.device == "cuda":
+            import torch
+
+            torch.cuda.empty_cache()
+            print("GPU 메모리 정리 완료")
+
+    def batcher_stats(self) -> Dict:
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            f"{e.key[0]}@{e.key[1]}/{e.key[2]}": e.batcher.stats()
+            for e in entries if e.batcher is not None
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "models": [
+                    {
+                        "model_id": e.key[0],
+                        "device_mode": e.key[1],
+                        "backend": e.key[2],
+                        "device": e.device,
+                        "bytes": e.bytes,
+                        "optimization": e.optimization,
+                        "in_use": e.in_use,
+                        "idle_seconds": round(time.time() - e.last_used, 1),
+                    }
+                    for e in self._entries.values()
+                ],
+                "budgets": self.budgets,
+                "used": {device: self._used_bytes(device) for device in ("cuda", "cpu")},
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,71 @@
+"""파일 하나의 변환 단계 (웹 서버 작업과 batch.py가 같은 기준으로 처리)
+
+- 무음 구간 제거 여부 판단 (VAD)
+- 화자 분리 + 등록된 화자 이름 붙이기
+- 업로드 파일명 정리 (같은 내용 파일 재사용은 cache.UploadIndex.store)
+"""
+
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from werkzeug.utils import secure_filename
+
+from audio import SAMPLE_RATE
+from speakers import identify_speakers
+from vad import detect_speech_regions, pack_speech
+
+# 무음 비율이 이보다 작으면 VAD 결과를 쓰지 않고 원본 그대로 변환
+VAD_MIN_SKIPPED_RATIO = 0.05
+
+
+def skip_silence(audio, duration: Optional[float]) -> Tuple:
+    """
+    무음 구간 제거 - (변환할 오디오, 음성 구간 오프셋, 통계)
+
+    건너뛸 비율이 작으면 원본을 그대로 반환하고 오프셋은 None (타임스탬프 복원 불필요)
+    """
+    regions = detect_speech_regions(audio)
+    speech_seconds = sum(end - start for start, end in regions) / SAMPLE_RATE
+    skipped_ratio = 1.0 - speech_seconds / duration if duration else 0.0
+
+    speech_audio, offsets = audio, None
+    if regions and skipped_ratio >= VAD_MIN_SKIPPED_RATIO:
+        speech_audio, offsets = pack_speech(audio, regions)
+    return speech_audio, offsets, {'speech_seconds': round(speech_seconds, 1), 'skipped_ratio': round(skipped_ratio, 3)}
+
+
+def diarize(audio, hf_token: str, timings: Optional[Dict] = None) -> Optional[Tuple[List[Dict], Dict]]:
+    """화자 분리 실행 - (세그먼트, 화자별 음성 벡터) 반환 (실패 시 None), 소요 시간은 timings['diarization']에 기록"""
+    started = time.time()
+    try:
+        from diarization import perform_diarization
+
+        segments, embeddings = perform_diarization(audio, hf_token, return_embeddings=True)
+        print(f"[Diarization] Completed: {len(segments)} segments, {len(embeddings)} speakers")
+        return segments, embeddings
+    except ImportError:
+        print("[Diarization] pyannote.audio가 설치되지 않았습니다")
+    except Exception as e:
+        print(f"[Diarization] Error: {e}")
+    finally:
+        if timings is not None:
+            timings['diarization'] = round(time.time() - started, 2)
+    return None
+
+
+def assign_speakers(chunks: List[Dict], diarization, speaker_index, split_on_speaker_change: bool = False) -> Tuple[List[Dict], Dict]:
+    """화자 분리 결과 병합 + 등록된 화자 이름 붙이기 - (청크, 노트의 speakers 필드), 화자 분리가 없거나 실패했으면 그대로"""
+    if diarization is None:
+        return chunks, {}
+    segments, embeddings = diarization
+    return identify_speakers(chunks, segments, embeddings, speaker_index, split_on_speaker_change=split_on_speaker_change)
+
+
+def safe_upload_name(original_filename: str) -> str:
+    """저장용 파일명 (한글 등으로 secure_filename 결과가 비면 임의 이름)"""
+    filename = secure_filename(original_filename)
+    if not filename:
+        ext = original_filename.rsplit('.', 1)[1].lower()
+        filename = f"{uuid.uuid4().hex}.{ext}"
+    return filename
@@ -0,0 +1,202 @@
+"""녹취록 전문 검색 모듈 (글자 bigram 역색인, SQLite 저장)"""
+
+import re
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set
+
+# 한 번에 교집합을 구할 최대 gram 수 (희귀한 순)
+MAX_INTERSECT_GRAMS = 4
+
+
+def normalize(text: str) -> str:
+    """검색용 정규화 - 소문자, NFC, 공백/문장부호 제거 (한국어 띄어쓰기 차이 무시)"""
+    return re.sub(r'\W+', '', unicodedata.normalize('NFC', text or '').lower())
+
+
+def char_grams(text: str) -> Set[str]:
+    """정규화된 문자열의 글자 bigram"""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class SearchIndex:
+    """
+    노트 청크 단위 역색인
+
+    - 청크 텍스트를 정규화 후 글자 bigram으로 색인 (형태소 분석기 없이 한국어 부분 일치)
+    - 검색은 가장 희귀한 gram들의 posting 교집합으로 후보를 좁힌 뒤 부분 문자열로 확인
+    - 노트 저장/삭제 시 해당 노트만 다시 색인
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                note_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                start REAL,
+                end REAL,
+                speaker TEXT,
+                text TEXT,
+                norm TEXT
+            );
+            CREATE INDEX IF NOT EXISTS chunks_note ON chunks (note_id);
+            CREATE TABLE IF NOT EXISTS postings (
+                gram TEXT NOT NULL,
+                chunk_id INTEGER NOT NULL,
+                PRIMARY KEY (gram, chunk_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_chunk ON postings (chunk_id);
+            CREATE TABLE IF NOT EXISTS grams (gram TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def is_built(self) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM meta WHERE key = 'built'").fetchone() is not None
+
+    def build(self, notes: Iterable[Dict]):
+        """전체 노트로 색인 생성 (최초 1회)"""
+        count = 0
+        with self._lock:
+            for note in notes:
+                self._index_note(note)
+                count += 1
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', '1')")
+            self._db.commit()
+        if count:
+            print(f"[Search] Indexed {count} notes")
+
+    def index_note(self, note: Dict):
+        """노트 하나를 다시 색인 (저장 시 호출)"""
+        with self._lock:
+            self._index_note(note)
+            self._db.commit()
+
+    def remove_note(self, note_id: str):
+        with self._lock:
+            self._remove(note_id)
+            self._db.commit()
+
+    def index_chunks(self, note_id: str, chunks: Dict[int, Dict]):
+        """편집된 청크만 다시 색인 (index → 청크)"""
+        with self._lock:
+            for idx in chunks:
+                self._remove(note_id, idx)
+            df = {}
+            for idx, chunk in chunks.items():
+                self._insert_chunk(note_id, idx, chunk, df)
+            self._update_df(df)
+            self._db.commit()
+
+    def _remove(self, note_id: str, idx: Optional[int] = None):
+        """노트 전체 또는 청크 하나의 색인 삭제"""
+        where, params = "note_id = ?", [note_id]
+        if idx is not None:
+            where += " AND idx = ?"
+            params.append(idx)
+        chunk_ids = f"SELECT id FROM chunks WHERE {where}"
+
+        rows = self._db.execute(
+            f"SELECT gram, COUNT(*) FROM postings WHERE chunk_id IN ({chunk_ids}) GROUP BY gram",
+            params
+        ).fetchall()
+        self._db.executemany("UPDATE grams SET df = df - ? WHERE gram = ?", [(n, gram) for gram, n in rows])
+        self._db.execute(f"DELETE FROM postings WHERE chunk_id IN ({chunk_ids})", params)
+        self._db.execute(f"DELETE FROM chunks WHERE {where}", params)
+
+    def _insert_chunk(self, note_id: str, idx: int, chunk: Dict, df: Dict[str, int]):
+        norm = normalize(chunk.get('text', ''))
+        if not norm:
+            return
+        timestamp = chunk.get('timestamp') or (None, None)
+        cursor = self._db.execute(
+            "INSERT INTO chunks (note_id, idx, start, end, speaker, text, norm) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (note_id, idx, timestamp[0], timestamp[1], chunk.get('speaker'), chunk.get('text'), norm)
+        )
+        grams = char_grams(norm)
+        self._db.executemany(
+            "INSERT INTO postings (gram, chunk_id) VALUES (?, ?)",
+            [(gram, cursor.lastrowid) for gram in grams]
+        )
+        for gram in grams:
+            df[gram] = df.get(gram, 0) + 1
+
+    def _update_df(self, df: Dict[str, int]):
+        self._db.executemany(
+            "INSERT INTO grams (gram, df) VALUES (?, ?) ON CONFLICT(gram) DO UPDATE SET df = df + excluded.df",
+            list(df.items())
+        )
+
+    def _index_note(self, note: Dict):
+        self._remove(note['id'])
+
+        chunks = note.get('chunks') or []
+        if not chunks and note.get('text'):
+            # 청크가 없는 노트는 전체 텍스트를 하나의 청크로
+            chunks = [{'text': note['text'], 'timestamp': None}]
+
+        df = {}
+        for idx, chunk in enumerate(chunks):
+            self._insert_chunk(note['id'], idx, chunk, df)
+        self._update_df(df)
+
+    def search(self, query: str, limit: int = 20, matches_per_note: int = 5) -> List[Dict]:
+        """
+        검색어의 모든 단어를 포함하는 청크를 찾아 노트 단위로 순위화
+
+        Returns:
+            [{note_id, score, matches: [{index, timestamp, speaker, text}]}] - 점수 내림차순
+        """
+        terms = [normalize(term) for term in query.split()]
+        terms = [term for term in terms if term]
+        if not terms:
+            return []
+
+        # 한 글자 검색어는 gram 후보 선정에 쓰지 않고 부분 문자열 확인에만 사용
+        grams = set()
+        for term in terms:
+            if len(term) > 1:
+                grams |= char_grams(term)
+
+        columns = "id, note_id, idx, start, end, speaker, text, norm"
+        with self._lock:
+            if not grams:
+                rows = self._db.execute(
+                    f"SELECT {columns} FROM chunks WHERE norm LIKE ? ORDER BY note_id, idx",
+                    (f"%{terms[0]}%",)
+                ).fetchall()
+            else:
+                placeholders = ','.join('?' * len(grams))
+                df = dict(self._db.execute(f"SELECT gram, df FROM grams WHERE gram IN ({placeholders})", list(grams)))
+                if len(df) < len(grams) or not all(df.values()):
+                    return []  # 한 번도 나오지 않은 gram이 있으면 결과 없음
+
+                rarest = sorted(grams, key=lambda gram: df[gram])[:MAX_INTERSECT_GRAMS]
+                candidates = " INTERSECT ".join("SELECT chunk_id FROM postings WHERE gram = ?" for _ in rarest)
+                rows = self._db.execute(
+                    f"SELECT {columns} FROM chunks WHERE id IN ({candidates}) ORDER BY note_id, idx",
+                    rarest
+                ).fetchall()
+
+        notes: Dict[str, Dict] = {}
+        for _, note_id, idx, start, end, speaker, text, norm in rows:
+            if not all(term in norm for term in terms):
+                continue
+            hits = sum(norm.count(term) for term in terms)
+            entry = notes.setdefault(note_id, {'note_id': note_id, 'score': 0, 'matches': []})
+            entry['score'] += hits
+            if len(entry['matches']) < matches_per_note:
+                entry['matches'].append({
+                    'index': idx,
+                    'timestamp': [start, end] if start is not None else None,
+                    'speaker': speaker,
+                    'text': text
+                })
+
+        ranked = sorted(notes.values(), key=lambda entry: entry['score'], reverse=True)
+        return ranked[:limit]
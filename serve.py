@@ -0,0 +1,53 @@
+"""운영 서버 - gunicorn + gevent 워커로 Flask 앱 실행
+
+- SSE 연결은 OS 스레드가 아닌 greenlet이므로 수백 개의 진행률 구독을 적은 메모리로 유지
+- 웹 프로세스는 추론하지 않고 작업을 저장소에 등록만 함 (추론은 worker.py 프로세스)
+- 실시간 변환(/ws/transcribe)은 --stream으로 띄운 전용 프로세스 하나에서만 추론 (웹 워커마다 모델이 올라가지 않도록)
+"""
+
+import argparse
+import os
+
+from dotenv import load_dotenv
+from gunicorn.app.base import BaseApplication
+
+
+class StandaloneApplication(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # 워커 프로세스에서 gevent 패치 후에 import
+        from app import app
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='운영 서버 (gunicorn + gevent)')
+    parser.add_argument('--stream', action='store_true', help='실시간 변환 전용 프로세스로 실행 (STREAM_PORT, 워커 1개)')
+    args = parser.parse_args()
+
+    load_dotenv()
+    os.environ.setdefault('JOB_RUNNER', 'worker')
+    if args.stream:
+        os.environ['STREAM_SERVING'] = '1'
+
+    port = os.getenv('STREAM_PORT', '5001') if args.stream else os.getenv('FLASK_PORT', '5000')
+    StandaloneApplication({
+        'bind': f"{os.getenv('HOST', '0.0.0.0')}:{port}",
+        'workers': 1 if args.stream else int(os.getenv('WEB_WORKERS', '2')),
+        'worker_class': 'gevent',
+        'worker_connections': int(os.getenv('WEB_WORKER_CONNECTIONS', '1000')),
+        'timeout': 60,
+        'graceful_timeout': 10,
+        'accesslog': '-',
+    }).run()
+
+
+if __name__ == '__main__':
+    main()
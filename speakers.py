@@ -0,0 +1,246 @@
+"""화자 식별 모듈 (회의가 달라도 같은 사람은 같은 이름으로)
+
+- 화자 분리(pyannote) 때 함께 나오는 화자별 음성 벡터(embedding)를 노트에 저장
+- 등록된 화자 색인과 코사인 유사도로 비교해 아는 사람이면 이름을, 아니면 화자1, 화자2...를 붙임
+- 노트의 화자를 이름으로 등록하면 이후 회의부터 자동으로 이름이 붙음
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 이 값 이상 비슷해야 같은 사람으로 판단 (코사인 유사도)
+DEFAULT_THRESHOLD = 0.5
+
+# 노트에 저장하는 벡터 소수점 자릿수 (JSON 크기 절약)
+EMBEDDING_DECIMALS = 5
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def embedding_to_list(vector) -> List[float]:
+    return [round(float(v), EMBEDDING_DECIMALS) for v in vector]
+
+
+class SpeakerIndex:
+    """
+    등록된 화자 음성 벡터 색인
+
+    - 화자마다 정규화된 평균 벡터 한 줄 (N x D float32 행렬, .npy) + 이름/등록 수 (.json)
+    - 회의 하나의 화자 여러 명을 행렬 곱 한 번으로 비교 (수천 명이어도 수 ms)
+    - 같은 이름으로 다시 등록하면 평균 벡터를 갱신 (여러 회의의 목소리가 쌓일수록 정확해짐)
+    - 웹/추론 워커 프로세스가 같은 파일을 공유 - 파일이 바뀌었으면 비교 전에 다시 읽음
+    """
+
+    def __init__(self, folder: str, threshold: float = DEFAULT_THRESHOLD):
+        self.folder = folder
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._speakers: List[Dict] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._loaded_mtime = None
+        os.makedirs(folder, exist_ok=True)
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.folder, 'index.json')
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.folder, 'index.npy')
+
+    def _refresh(self):
+        """다른 프로세스가 색인을 바꿨으면 다시 읽음 (lock을 잡은 상태에서 호출)"""
+        try:
+            mtime = os.path.getmtime(self._meta_path)
+        except FileNotFoundError:
+            self._speakers, self._matrix, self._loaded_mtime = [], np.zeros((0, 0), dtype=np.float32), None
+            return
+        if mtime == self._loaded_mtime:
+            return
+
+        with open(self._meta_path, 'r', encoding='utf-8') as f:
+            speakers = json.load(f)
+        matrix = np.load(self._matrix_path) if speakers else np.zeros((0, 0), dtype=np.float32)
+        if len(matrix) != len(speakers):
+            raise ValueError(f'화자 색인이 손상되었습니다 ({self.folder})')
+        self._speakers, self._matrix, self._loaded_mtime = speakers, matrix, mtime
+
+    def _save(self):
+        """행렬을 먼저 바꾼 뒤 메타데이터 교체 (메타데이터 mtime이 다시 읽는 기준)"""
+        tmp_matrix = f'{self._matrix_path}.tmp.npy'
+        np.save(tmp_matrix, self._matrix)
+        os.replace(tmp_matrix, self._matrix_path)
+
+        tmp_meta = f'{self._meta_path}.tmp'
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(self._speakers, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_meta, self._meta_path)
+        self._loaded_mtime = os.path.getmtime(self._meta_path)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            self._refresh()
+            return [dict(speaker) for speaker in self._speakers]
+
+    def enroll(self, name: str, embedding) -> Dict:
+        """
+        화자 등록 (같은 이름이 있으면 평균 벡터에 더함)
+
+        Raises:
+            ValueError: 이름이 없거나 벡터 차원이 색인과 다름
+        """
+        name = (name or '').strip()
+        if not name:
+            raise ValueError('화자 이름이 없습니다')
+        vector = _normalize(np.asarray(embedding, dtype=np.float32))
+
+        with self._lock:
+            self._refresh()
+            if len(self._matrix) and self._matrix.shape[1] != len(vector):
+                raise ValueError(f'음성 벡터 차원이 다릅니다 ({len(vector)} != {self._matrix.shape[1]})')
+
+            # identify는 잠금 밖에서 목록/행렬을 읽으므로 제자리에서 바꾸지 않고 새로 만들어 교체
+            index = next((i for i, speaker in enumerate(self._speakers) if speaker['name'] == name), None)
+            now = time.strftime('%Y-%m-%d %H:%M:%S')
+            if index is None:
+                speaker = {'id': uuid.uuid4().hex[:12], 'name': name, 'enrollments': 1, 'created_at': now, 'updated_at': now}
+                self._speakers = self._speakers + [speaker]
+                self._matrix = vector[None, :] if not len(self._matrix) else np.vstack([self._matrix, vector])
+            else:
+                # 등록 수로 가중 평균 후 다시 정규화
+                count = self._speakers[index]['enrollments']
+                speaker = dict(self._speakers[index], enrollments=count + 1, updated_at=now)
+                matrix = self._matrix.copy()
+                matrix[index] = _normalize(matrix[index] * count + vector)
+                self._speakers = self._speakers[:index] + [speaker] + self._speakers[index + 1:]
+                self._matrix = matrix
+
+            self._save()
+            print(f"[Speakers] Enrolled {name} ({speaker['enrollments']} samples, {len(self._speakers)} speakers)")
+            return dict(speaker)
+
+    def remove(self, speaker_id: str) -> bool:
+        with self._lock:
+            self._refresh()
+            index = next((i for i, speaker in enumerate(self._speakers) if speaker['id'] == speaker_id), None)
+            if index is None:
+                return False
+            self._speakers = self._speakers[:index] + self._speakers[index + 1:]
+            self._matrix = np.delete(self._matrix, index, axis=0)
+            self._save()
+            return True
+
+    def identify(self, embeddings: Dict[str, np.ndarray]) -> Dict[str, Dict]:
+        """
+        회의 화자별 벡터를 등록된 화자와 비교
+
+        한 회의에서 두 화자가 같은 사람으로 배정되지 않도록 유사도가 높은 쌍부터 1:1 배정
+
+        Returns:
+            {회의 화자: {'id', 'name', 'similarity'}} - threshold 이상인 화자만
+        """
+        if not embeddings:
+            return {}
+
+        with self._lock:
+            self._refresh()
+            speakers, matrix = self._speakers, self._matrix
+        if not len(matrix):
+            return {}
+
+        labels = [label for label, vector in embeddings.items() if len(vector) == matrix.shape[1]]
+        if not labels:
+            return {}
+        queries = _normalize(np.asarray([embeddings[label] for label in labels], dtype=np.float32))
+        similarity = queries @ matrix.T  # (회의 화자 수, 등록 화자 수)
+
+        matches = {}
+        used = set()
+        for flat in np.argsort(similarity, axis=None)[::-1]:
+            row, column = divmod(int(flat), similarity.shape[1])
+            score = float(similarity[row, column])
+            if score < self.threshold:
+                break
+            if labels[row] in matches or column in used:
+                continue
+            matches[labels[row]] = {'id': speakers[column]['id'], 'name': speakers[column]['name'], 'similarity': round(score, 3)}
+            used.add(column)
+            if len(matches) == len(labels):
+                break
+        return matches
+
+
+def identify_speakers(chunks: List[Dict], segments: List[Dict], embeddings: Dict[str, np.ndarray], index: Optional[SpeakerIndex],
+                      split_on_speaker_change: bool = False) -> Tuple[List[Dict], Dict[str, Dict]]:
+    """
+    화자 분리 결과 병합 + 등록된 화자 이름 붙이기
+
+    Returns:
+        (화자가 붙은 청크, 노트에 저장할 화자 정보 {표시 이름: {'embedding', 'speaker_id', 'similarity'}})
+    """
+    from diarization import merge_transcription_with_diarization
+
+    matches = index.identify(embeddings) if index is not None else {}
+    speaker_map = {speaker: match['name'] for speaker, match in matches.items()}
+    if matches:
+        found = ', '.join(f"{match['name']} ({match['similarity']})" for match in matches.values())
+        print(f"[Speakers] Identified {found}")
+
+    chunks = merge_transcription_with_diarization(chunks, segments, split_on_speaker_change=split_on_speaker_change, speaker_map=speaker_map)
+
+    speakers = {}
+    for speaker, vector in embeddings.items():
+        if speaker not in speaker_map:
+            continue  # 청크에 한 번도 배정되지 않은 화자
+        match = matches.get(speaker)
+        speakers[speaker_map[speaker]] = {
+            'embedding': embedding_to_list(vector),
+            'speaker_id': match['id'] if match else None,
+            'similarity': match['similarity'] if match else None
+        }
+    return chunks, speakers
+
+
+def relabel(result: Dict, index: SpeakerIndex) -> Dict:
+    """
+    저장된 화자 벡터로 이름만 다시 붙임 (캐시된 결과 등 - 화자 분리를 다시 하지 않음)
+
+    등록된 화자로 확인되면 그 이름, 아니면 기존 라벨 유지 (이름이 붙어 있었는데 더 이상 맞지 않으면 화자N)
+    """
+    speakers = result.get('speakers') or {}
+    if not speakers:
+        return result
+
+    matches = index.identify({label: np.asarray(info['embedding'], dtype=np.float32) for label, info in speakers.items()})
+    taken = {match['name'] for match in matches.values()}
+    names, relabeled = {}, {}
+    next_number = 1
+    for label, info in speakers.items():
+        match = matches.get(label)
+        if match:
+            name = match['name']
+        elif info.get('speaker_id') is None and label not in taken:
+            name = label
+        else:
+            while f'화자{next_number}' in taken or f'화자{next_number}' in speakers:
+                next_number += 1
+            name = f'화자{next_number}'
+        taken.add(name)
+        names[label] = name
+        relabeled[name] = dict(info, speaker_id=match['id'] if match else None, similarity=match['similarity'] if match else None)
+
+    changed = any(label != name or relabeled[name]['speaker_id'] != speakers[label].get('speaker_id') for label, name in names.items())
+    if not changed:
+        return result
+
+    chunks = [dict(chunk, speaker=names.get(chunk.get('speaker'), chunk.get('speaker'))) if 'speaker' in chunk else chunk for chunk in result.get('chunks', [])]
+    return dict(result, chunks=chunks, speakers=relabeled)
@@ -1,5 +1,6 @@
 const audioInput = document.getElementById('audioInput');
 const uploadBtn = document.getElementById('uploadBtn');
+const liveBtn = document.getElementById('liveBtn');
 const loading = document.getElementById('loading');
 const playerSection = document.getElementById('player-section');
 const audioPlayer = document.getElementById('audioPlayer');
@@ -151,13 +152,10 @@ async function saveNoteTitle() {
     }
 
     try {
-        const response = await fetch('/api/notes', {
-            method: 'POST',
+        const response = await fetch(`/api/notes/${currentNoteId}`, {
+            method: 'PATCH',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                id: currentNoteId,
-                title: newTitle
-            })
+            body: JSON.stringify({ title: newTitle })
         });
 
         const data = await response.json();
@@ -287,6 +285,31 @@ copySummaryBtn.addEventListener('click', copySummary);
 // 프리셋 목록 로드
 loadPresets();
 
+// 서버에 요약/검증 요청 (API Key는 저장하지 않고 LLM 호출에만 사용)
+async function requestSummary(path, body) {
+    const model = getSelectedModel();
+    const response = await fetch(path, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            ...body,
+            chunks: chunks,
+            llm: {
+                api_url: llmApiUrl.value.trim(),
+                api_key: llmApiKey.value.trim(),
+                model: model.startsWith('claude') ? getClaudeModelId(model) : model
+            }
+        })
+    });
+
+    const data = await response.json();
+    if (!data.success) {
+        throw new Error(data.error || '서버 오류');
+    }
+    log(`${path} stats: ${JSON.stringify(data.stats)}`, 'info');
+    return data;
+}
+
 // LLM 요약 생성
 async function generateSummary() {
     if (chunks.length === 0) {
@@ -295,12 +318,12 @@ async function generateSummary() {
     }
 
     const apiUrl = llmApiUrl.value.trim();
-    const apiKey = llmApiKey.value.trim();
     const model = getSelectedModel();
     const template = summaryTemplate.value.trim();
 
-    if (!apiUrl || !apiKey) {
-        summaryResult.innerHTML = '<span class="placeholder-text">API URL과 API Key를 입력하세요.</span>';
+    // 로컬 OpenAI 호환 서버는 API Key 없이도 사용 가능
+    if (!apiUrl) {
+        summaryResult.innerHTML = '<span class="placeholder-text">API URL을 입력하세요.</span>';
         return;
     }
 
@@ -309,13 +332,6 @@ async function generateSummary() {
         return;
     }
 
-    // 타임스탬프와 함께 전체 텍스트 추출
-    const fullText = chunks.map(c => {
-        const time = formatTime(c.timestamp[0]);
-        const speaker = c.speaker ? `${c.speaker}` : '';
-        return `[${time}] ${speaker ? speaker + ': ' : ''}${c.text}`;
-    }).join('\n');
-
     // 로딩 UI 표시
     summaryResult.innerHTML = `
         <div class="summary-loading">
@@ -334,135 +350,13 @@ async function generateSummary() {
     summarizeBtn.textContent = '생성 중...';
     verifyBtn.disabled = true;
 
-    // 시스템 프롬프트 구성
-    let systemPrompt = `당신은 공식 사업 회의록을 작성하는 전문가입니다.
-
-## 중요 공지
-이 회의록은 공식 문서로 사용되며, 완성 후 사용자가 직접 출처와 녹취록을 교차로 들으며 검증할 것입니다.
-**누락된 내용이 있으면 안 됩니다.**
-
-## 필수 규칙
-1. 녹취록에 언급된 주요 사항들에 대하여 모두 요약하세요.
-2. 모든 내용에 출처 시간을 [MM:SS] 형식으로 표기하세요.
-3. 여러 시간대를 종합한 경우 [MM:SS], [MM:SS] 형식으로 모든 시간을 표기하세요.
-4. 녹취록이기에 전사가 잘못된 부분이 있을 수 있습니다.
-5. 한국어로 작성하세요.`;
-
-    if (template) {
-        systemPrompt += `\n\n## 출력 형식\n다음 템플릿에 맞춰 작성하세요:\n\n${template}`;
-    }
-
-    const userPrompt = `[공식 회의 녹취록]
-${fullText}
-
----
-위 녹취록을 바탕으로 회의록을 작성하세요.
-- 모든 내용을 빠짐없이 포함
-- 각 항목에 출처 시간 [MM:SS] 표기 필수`;
-
     try {
-        let response;
-        let summary;
-
-        log(`Calling LLM API: model=${model}, url=${apiUrl}`, 'info');
-
-        if (model.startsWith('gpt')) {
-            // OpenAI API
-            log('Using OpenAI API...', 'info');
-            response = await fetch(`${apiUrl}/chat/completions`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Authorization': `Bearer ${apiKey}`
-                },
-                body: JSON.stringify({
-                    model: model,
-                    messages: [
-                        { role: 'system', content: systemPrompt },
-                        { role: 'user', content: userPrompt }
-                    ],
-                    max_completion_tokens: 16000
-                })
-            });
-
-            log(`OpenAI response status: ${response.status}`, 'info');
-            const data = await response.json();
-            log(`OpenAI response data: ${JSON.stringify(data).substring(0, 500)}...`, 'info');
-            if (data.error) {
-                throw new Error(data.error.message);
-            }
-            // 콘텐츠 필터 확인
-            const finishReason = data.choices?.[0]?.finish_reason;
-            if (finishReason === 'content_filter') {
-                throw new Error('OpenAI 콘텐츠 필터에 의해 차단되었습니다. 다른 모델(Claude 등)을 사용하거나, 민감한 내용이 포함되어 있는지 확인하세요.');
-            }
-            summary = data.choices[0].message.content;
-            if (!summary || summary.trim() === '') {
-                throw new Error('API가 빈 응답을 반환했습니다. 다시 시도하거나 다른 모델을 사용해 보세요.');
-            }
-
-        } else if (model.startsWith('claude')) {
-            // Anthropic API
-            log('Using Anthropic API...', 'info');
-            response = await fetch(`${apiUrl}/messages`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'x-api-key': apiKey,
-                    'anthropic-version': '2023-06-01',
-                    'anthropic-dangerous-direct-browser-access': 'true'
-                },
-                body: JSON.stringify({
-                    model: getClaudeModelId(model),
-                    max_tokens: 16000,
-                    system: systemPrompt,
-                    messages: [
-                        { role: 'user', content: userPrompt }
-                    ]
-                })
-            });
-
-            log(`Anthropic response status: ${response.status}`, 'info');
-            const data = await response.json();
-            log(`Anthropic response data: ${JSON.stringify(data).substring(0, 200)}...`, 'info');
-            if (data.error) {
-                throw new Error(data.error.message);
-            }
-            summary = data.content[0].text;
-
-        } else {
-            // Custom API (OpenAI 호환 형식 가정)
-            log('Using Custom API...', 'info');
-            response = await fetch(`${apiUrl}/chat/completions`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Authorization': `Bearer ${apiKey}`
-                },
-                body: JSON.stringify({
-                    model: model,
-                    messages: [
-                        { role: 'system', content: systemPrompt },
-                        { role: 'user', content: userPrompt }
-                    ],
-                    max_completion_tokens: 16000
-                })
-            });
-
-            const data = await response.json();
-            log(`Custom API response: ${JSON.stringify(data).substring(0, 500)}...`, 'info');
-            if (data.error) {
-                throw new Error(data.error.message || 'API 오류');
-            }
-            // 콘텐츠 필터 확인
-            const finishReason = data.choices?.[0]?.finish_reason;
-            if (finishReason === 'content_filter') {
-                throw new Error('콘텐츠 필터에 의해 차단되었습니다. 다른 모델을 사용해 보세요.');
-            }
-            summary = data.choices[0].message.content;
-            if (!summary || summary.trim() === '') {
-                throw new Error('API가 빈 응답을 반환했습니다.');
-            }
+        // 서버에서 구간별 요약 후 합침 (바뀌지 않은 구간은 서버 캐시 사용)
+        log(`Requesting summary: model=${model}, url=${apiUrl}`, 'info');
+        const data = await requestSummary('/api/summarize', { template: template });
+        const summary = data.summary;
+        if (data.stats.invalid_citations.length > 0) {
+            log(`Citations not in transcript: ${data.stats.invalid_citations.join(', ')}`, 'warning');
         }
 
         // 타임스탬프를 클릭 가능한 링크로 변환
@@ -490,8 +384,8 @@ ${fullText}
 
 // 요약 텍스트에서 타임스탬프를 클릭 가능한 링크로 변환
 function formatSummaryWithTimestamps(text) {
-    // [MM:SS] 또는 [M:SS] 형식의 타임스탬프를 찾아서 링크로 변환
-    const timestampRegex = /\[(\d{1,2}:\d{2})\]/g;
+    // [MM:SS] 또는 [M:SS] 형식의 타임스탬프를 찾아서 링크로 변환 (2시간 넘는 회의는 분이 세 자리)
+    const timestampRegex = /\[(\d{1,3}:\d{2})\]/g;
 
     return text.replace(timestampRegex, (match, time) => {
         const seconds = parseTimeToSeconds(time);
@@ -646,11 +540,9 @@ async function verifySummary() {
     }
 
     const apiUrl = llmApiUrl.value.trim();
-    const apiKey = llmApiKey.value.trim();
-    const model = getSelectedModel();
 
-    if (!apiUrl || !apiKey) {
-        alert('API URL과 API Key를 입력하세요.');
+    if (!apiUrl) {
+        alert('API URL을 입력하세요.');
         return;
     }
 
@@ -659,13 +551,6 @@ async function verifySummary() {
         return;
     }
 
-    // 원본 녹취록
-    const fullText = chunks.map(c => {
-        const time = formatTime(c.timestamp[0]);
-        const speaker = c.speaker ? `${c.speaker}` : '';
-        return `[${time}] ${speaker ? speaker + ': ' : ''}${c.text}`;
-    }).join('\n');
-
     // 로딩 UI 표시
     summaryResult.innerHTML = `
         <div class="summary-loading">
@@ -681,109 +566,10 @@ async function verifySummary() {
     verifyBtn.textContent = '검증 중...';
     summarizeBtn.disabled = true;
 
-    const systemPrompt = `당신은 회의록 검증 전문가입니다.
-
-## 역할
-원본 녹취록과 작성된 요약본을 비교하여 누락된 내용을 찾아내세요.
-
-## 검증 기준
-1. 녹취록에 있지만 요약에 없는 내용
-2. 요약에서 잘못 해석되거나 왜곡된 내용
-3. 시간 표기가 누락되거나 잘못된 항목
-
-## 출력 형식
-### 검증 결과
-
-**누락된 내용:**
-- (내용) [MM:SS] - 누락됨
-
-**수정 필요:**
-- (내용) [MM:SS] - (수정 사항)
-
-**검증 완료:**
-누락 없음 / X건의 누락 발견
-
----
-누락이 없으면 "누락 없음. 요약이 정확합니다."라고 표시하세요.`;
-
-    const userPrompt = `[원본 녹취록]
-${fullText}
-
----
-
-[작성된 요약본]
-${currentSummary}
-
----
-위 녹취록과 요약본을 비교하여 누락되거나 잘못된 내용이 있는지 검증하세요.`;
-
     try {
-        let response;
-        let result;
-
-        if (model.startsWith('gpt')) {
-            response = await fetch(`${apiUrl}/chat/completions`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Authorization': `Bearer ${apiKey}`
-                },
-                body: JSON.stringify({
-                    model: model,
-                    messages: [
-                        { role: 'system', content: systemPrompt },
-                        { role: 'user', content: userPrompt }
-                    ],
-                    max_completion_tokens: 16000
-                })
-            });
-
-            const data = await response.json();
-            if (data.error) throw new Error(data.error.message);
-            result = data.choices[0].message.content;
-
-        } else if (model.startsWith('claude')) {
-            response = await fetch(`${apiUrl}/messages`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'x-api-key': apiKey,
-                    'anthropic-version': '2023-06-01',
-                    'anthropic-dangerous-direct-browser-access': 'true'
-                },
-                body: JSON.stringify({
-                    model: getClaudeModelId(model),
-                    max_tokens: 16000,
-                    system: systemPrompt,
-                    messages: [{ role: 'user', content: userPrompt }]
-                })
-            });
-
-            const data = await response.json();
-            if (data.error) throw new Error(data.error.message);
-            result = data.content[0].text;
-
-        } else {
-            response = await fetch(`${apiUrl}/chat/completions`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Authorization': `Bearer ${apiKey}`
-                },
-                body: JSON.stringify({
-                    model: model,
-                    messages: [
-                        { role: 'system', content: systemPrompt },
-                        { role: 'user', content: userPrompt }
-                    ],
-                    max_completion_tokens: 16000
-                })
-            });
-
-            const data = await response.json();
-            if (data.error) throw new Error(data.error.message || 'API 오류');
-            result = data.choices[0].message.content;
-        }
+        // 구간마다 그 구간을 인용한 요약 항목과만 비교 (고친 항목이 인용한 구간만 다시 검증)
+        const data = await requestSummary('/api/summarize/verify', { summary: currentSummary });
+        const result = data.result;
 
         const formattedResult = formatSummaryWithTimestamps(result);
         summaryResult.innerHTML = `<div class="summary-text verification-result">${formattedResult}</div>`;
@@ -1019,7 +805,7 @@ async function loadNote(noteId) {
 }
 
 // 노트 저장
-async function saveNote(title, audioFilename, text, chunks, duration) {
+async function saveNote(title, audioFilename, text, chunks, duration, speakers) {
     try {
         const noteData = {
             id: currentNoteId || undefined,
@@ -1027,7 +813,8 @@ async function saveNote(title, audioFilename, text, chunks, duration) {
             audio_filename: audioFilename,
             duration: duration,
             text: text,
-            chunks: chunks
+            chunks: chunks,
+            speakers: speakers || {}
         };
 
         const response = await fetch('/api/notes', {
@@ -1077,6 +864,10 @@ async function loadConfig() {
             // 장치 선택
             deviceSelect.value = data.config.device_mode;
 
+            // 실시간 녹음 (서버에 flask-sock이 있을 때만, 운영 모드는 전용 프로세스 주소)
+            liveBtn.classList.toggle('hidden', !data.streaming_available);
+            streamUrl = data.stream_url || '';
+
             // CUDA 상태 표시
             if (data.cuda_available) {
                 deviceStatus.textContent = 'GPU 사용 가능';
@@ -1144,6 +935,196 @@ function hideSettingsStatus() {
     settingsStatus.classList.add('hidden');
 }
 
+// 실시간 녹음 - 마이크 오디오를 16kHz PCM으로 WebSocket에 전송하고 부분/확정 결과 표시
+const LIVE_SAMPLE_RATE = 16000;
+let liveSession = null;
+let streamUrl = '';
+
+liveBtn.addEventListener('click', () => {
+    if (liveSession) {
+        stopLiveTranscription();
+    } else {
+        startLiveTranscription();
+    }
+});
+
+// 브라우저 샘플레이트(보통 48kHz)를 16kHz로 줄여 16bit PCM으로 변환 (구간 평균)
+function toLivePcm(input, inputRate) {
+    const ratio = inputRate / LIVE_SAMPLE_RATE;
+    const length = Math.floor(input.length / ratio);
+    const output = new Int16Array(length);
+    for (let i = 0; i < length; i++) {
+        const begin = Math.floor(i * ratio);
+        const end = Math.max(begin + 1, Math.floor((i + 1) * ratio));
+        let sum = 0;
+        for (let j = begin; j < end; j++) {
+            sum += input[j];
+        }
+        const sample = Math.max(-1, Math.min(1, sum / (end - begin)));
+        output[i] = sample < 0 ? sample * 0x8000 : sample * 0x7fff;
+    }
+    return output;
+}
+
+function renderLiveTranscript() {
+    displayTranscript(liveSession.chunks);
+    if (!liveSession.chunks.length) {
+        transcript.innerHTML = '';
+    }
+    if (liveSession.partial) {
+        const line = document.createElement('div');
+        line.className = 'chunk-line partial';
+        line.innerHTML = `<span class="timestamp">[${formatTime(liveSession.partialStart)}]</span> <span class="chunk-text">${liveSession.partial}</span>`;
+        transcript.appendChild(line);
+    }
+    transcript.parentElement.scrollTop = transcript.parentElement.scrollHeight;
+}
+
+async function startLiveTranscription() {
+    let stream;
+    try {
+        stream = await navigator.mediaDevices.getUserMedia({
+            audio: { channelCount: 1, echoCancellation: true, noiseSuppression: true }
+        });
+    } catch (error) {
+        log(`Microphone error: ${error.message}`, 'error');
+        return;
+    }
+
+    const protocol = location.protocol === 'https:' ? 'wss' : 'ws';
+    const ws = new WebSocket(streamUrl || `${protocol}://${location.host}/ws/transcribe`);
+    ws.binaryType = 'arraybuffer';
+
+    const context = new AudioContext();
+    const source = context.createMediaStreamSource(stream);
+    const processor = context.createScriptProcessor(4096, 1, 1);
+    liveSession = { ws, stream, context, source, processor, chunks: [], partial: '', partialStart: 0, ready: false, stopping: false };
+
+    // 새 노트로 시작
+    currentNoteId = null;
+    chunks = [];
+    const title = `실시간 ${new Date().toLocaleString('ko-KR')}`;
+    noteTitle.textContent = title;
+    infoFilename.textContent = '-';
+    infoDate.textContent = new Date().toLocaleDateString('ko-KR');
+    infoDuration.textContent = '-';
+    playerSection.classList.add('hidden');
+    transcript.innerHTML = '<p class="placeholder">말씀하시면 텍스트가 여기에 표시됩니다.</p>';
+    liveBtn.textContent = '녹음 중지';
+    liveBtn.classList.add('recording');
+    uploadBtn.disabled = true;
+
+    processor.onaudioprocess = (event) => {
+        if (!liveSession || !liveSession.ready || liveSession.stopping || ws.readyState !== WebSocket.OPEN) return;
+        ws.send(toLivePcm(event.inputBuffer.getChannelData(0), context.sampleRate).buffer);
+    };
+
+    ws.onopen = () => {
+        ws.send(JSON.stringify({ type: 'start', format: 's16le', sample_rate: LIVE_SAMPLE_RATE, title: title }));
+        source.connect(processor);
+        processor.connect(context.destination);
+        log('Live transcription connected', 'info');
+    };
+
+    ws.onmessage = (event) => {
+        if (!liveSession) return;
+        const message = JSON.parse(event.data);
+        switch (message.type) {
+            case 'status':
+                log(message.message, 'info');
+                break;
+            case 'ready':
+                liveSession.ready = true;
+                log(`Live session started: ${message.session_id}`, 'success');
+                break;
+            case 'partial':
+                liveSession.partial = message.text;
+                liveSession.partialStart = message.start;
+                renderLiveTranscript();
+                break;
+            case 'final':
+                liveSession.chunks.push(...message.chunks);
+                renderLiveTranscript();
+                break;
+            case 'done':
+                finishLiveTranscription(message);
+                break;
+            case 'error':
+                log(`Live error: ${message.message}`, 'error');
+                if (!liveSession.ready || message.filename) {
+                    cleanupLiveSession();
+                }
+                break;
+        }
+    };
+
+    ws.onerror = () => {
+        log('실시간 변환 서버에 연결할 수 없습니다', 'error');
+    };
+
+    ws.onclose = () => {
+        if (liveSession && liveSession.ws === ws) {
+            cleanupLiveSession();
+        }
+    };
+}
+
+function stopLiveTranscription() {
+    if (!liveSession || liveSession.stopping) return;
+    liveSession.stopping = true;
+    releaseLiveAudio();
+    liveBtn.textContent = '마무리 중...';
+    liveBtn.disabled = true;
+    if (liveSession.ws.readyState === WebSocket.OPEN) {
+        liveSession.ws.send(JSON.stringify({ type: 'stop' }));
+    } else {
+        cleanupLiveSession();
+    }
+}
+
+function releaseLiveAudio() {
+    const { stream, context, source, processor } = liveSession;
+    processor.onaudioprocess = null;
+    source.disconnect();
+    processor.disconnect();
+    stream.getTracks().forEach(track => track.stop());
+    context.close();
+}
+
+function cleanupLiveSession() {
+    if (!liveSession) return;
+    if (!liveSession.stopping) {
+        releaseLiveAudio();
+    }
+    if (liveSession.ws.readyState === WebSocket.OPEN) {
+        liveSession.ws.close();
+    }
+    liveSession = null;
+    liveBtn.textContent = '실시간 녹음';
+    liveBtn.classList.remove('recording');
+    liveBtn.disabled = false;
+    uploadBtn.disabled = false;
+}
+
+function finishLiveTranscription(message) {
+    const stats = message.stats || {};
+    log(`Live transcription saved: ${message.chunks.length} chunks (final latency avg ${stats.final_latency?.avg ?? '-'}s)`, 'success');
+
+    currentNoteId = message.note.id;
+    currentFilename = message.filename;
+    chunks = message.chunks;
+    noteTitle.textContent = message.note.title;
+    infoFilename.textContent = message.filename;
+    infoDuration.textContent = formatTime(message.duration);
+    audioPlayer.src = `/uploads/${message.filename}`;
+    playerSection.classList.remove('hidden');
+    deleteNoteBtn.style.display = 'flex';
+    displayTranscript(chunks);
+
+    cleanupLiveSession();
+    loadNoteList();
+}
+
 // 업로드 버튼 클릭 시 파일 선택 창 열기
 uploadBtn.addEventListener('click', () => {
     audioInput.click();
@@ -1181,7 +1162,7 @@ audioInput.addEventListener('change', async () => {
         } else {
             // 1단계: 파일 업로드
             log('Starting file upload...', 'info');
-            const uploadResult = await uploadWithProgress(file);
+            const uploadResult = await uploadChunked(file);
 
             if (!uploadResult.success) {
                 log(`Upload failed: ${uploadResult.error}`, 'error');
@@ -1213,7 +1194,7 @@ audioInput.addEventListener('change', async () => {
                 infoDuration.textContent = formatTime(duration);
 
                 // 자동 저장
-                saveNote(title, data.filename, data.text, chunks, duration);
+                saveNote(title, data.filename, data.text, chunks, duration, data.speakers);
             }, { once: true });
         } else {
             log(`Error: ${data.error}`, 'error');
@@ -1264,37 +1245,93 @@ function formatDuration(seconds) {
     return `${secs}초`;
 }
 
-function uploadWithProgress(file) {
-    return new Promise((resolve, reject) => {
-        const xhr = new XMLHttpRequest();
-        const formData = new FormData();
-        formData.append('audio', file);
-
-        xhr.upload.addEventListener('progress', (e) => {
-            if (e.lengthComputable) {
-                const percent = Math.round((e.loaded / e.total) * 100);
-                currentProgress = percent * 0.3;
-                showProgress(currentProgress, `파일 업로드 중... ${percent}%`);
-            }
+// 분할 업로드 설정
+const UPLOAD_PARALLEL = 4;
+const UPLOAD_RETRIES = 3;
+
+// 청크 단위로 업로드 (끊기면 같은 파일을 다시 선택했을 때 받지 못한 청크부터 이어서)
+async function uploadChunked(file) {
+    const resumeKey = `upload:${file.name}:${file.size}:${file.lastModified}`;
+    let session = null;
+
+    // 이전에 끊긴 업로드가 있으면 서버에 받은 청크 확인
+    const savedId = localStorage.getItem(resumeKey);
+    if (savedId) {
+        const response = await fetch(`/upload/${savedId}`);
+        if (response.ok) {
+            session = await response.json();
+            log(`Resuming upload ${savedId} (${session.received.length}/${session.chunks} chunks)`, 'info');
+        } else {
+            localStorage.removeItem(resumeKey);
+        }
+    }
+
+    if (!session) {
+        const response = await fetch('/upload/init', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size })
         });
+        session = await response.json();
+        if (!session.success) return session;
+        session.received = [];
+        localStorage.setItem(resumeKey, session.upload_id);
+    }
 
-        xhr.addEventListener('load', () => {
-            if (xhr.status === 200) {
-                resolve(JSON.parse(xhr.responseText));
-            } else {
-                try {
-                    const err = JSON.parse(xhr.responseText);
-                    resolve(err);
-                } catch {
-                    reject(new Error('서버 오류'));
+    const uploadId = session.upload_id;
+    const received = new Set(session.received);
+    const pending = [];
+    for (let i = 0; i < session.chunks; i++) {
+        if (!received.has(i)) pending.push(i);
+    }
+
+    let done = received.size;
+    const updateProgress = () => {
+        const percent = Math.round((done / session.chunks) * 100);
+        currentProgress = percent * 0.3;
+        showProgress(currentProgress, `파일 업로드 중... ${percent}%`);
+    };
+    updateProgress();
+
+    const sendChunk = async (index) => {
+        const start = index * session.chunk_size;
+        const blob = file.slice(start, Math.min(start + session.chunk_size, file.size));
+        for (let attempt = 1; ; attempt++) {
+            // 네트워크 오류와 5xx만 재시도 (4xx는 다시 보내도 같은 결과)
+            let response = null;
+            try {
+                response = await fetch(`/upload/${uploadId}/chunks/${index}`, { method: 'PUT', body: blob });
+            } catch (error) {
+                if (attempt >= UPLOAD_RETRIES) throw error;
+            }
+            if (response) {
+                if (response.ok) return;
+                const err = await response.json().catch(() => ({}));
+                if (response.status < 500 || attempt >= UPLOAD_RETRIES) {
+                    throw new Error(err.error || '서버 오류');
                 }
             }
-        });
+            log(`Retrying chunk ${index} (attempt ${attempt + 1})`, 'warning');
+            await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+        }
+    };
 
-        xhr.addEventListener('error', () => reject(new Error('네트워크 오류')));
-        xhr.open('POST', '/upload');
-        xhr.send(formData);
+    // 여러 청크를 동시에 전송
+    const workers = Array.from({ length: UPLOAD_PARALLEL }, async () => {
+        while (pending.length > 0) {
+            await sendChunk(pending.shift());
+            done++;
+            updateProgress();
+        }
     });
+    await Promise.all(workers);
+
+    const response = await fetch(`/upload/${uploadId}/finalize`, { method: 'POST' });
+    const result = await response.json();
+    if (result.success) {
+        localStorage.removeItem(resumeKey);
+    }
+    return result;
 }
 
 function transcribeWithSSE(jobId, filename) {
@@ -1322,6 +1359,11 @@ function transcribeWithSSE(jobId, filename) {
                 log('Using fallback estimated time: 60s', 'warning');
             }
 
+            // 서버가 윈도우 단위로 계산한 남은 시간이 있으면 예상 시간 보정
+            if (data.eta !== undefined && data.eta !== null && startTime) {
+                estimatedTotalTime = (Date.now() - startTime) / 1000 + data.eta;
+            }
+
             currentMessage = data.message;
 
             // 서버에서 보내는 진행률이 현재보다 높으면 업데이트
@@ -1344,7 +1386,8 @@ function transcribeWithSSE(jobId, filename) {
                         success: true,
                         filename: filename,
                         text: data.result.text,
-                        chunks: data.result.chunks
+                        chunks: data.result.chunks,
+                        speakers: data.result.speakers
                     });
                 }, 500);
             } else if (data.stage === 'error') {
@@ -1459,6 +1502,8 @@ function displayTranscript(chunks) {
                 const label = document.createElement('span');
                 label.className = 'speaker-label';
                 label.textContent = speaker;
+                label.title = '클릭하여 화자 등록';
+                label.addEventListener('click', () => enrollSpeaker(speaker));
                 currentBlock.appendChild(label);
 
                 const content = document.createElement('div');
@@ -1505,6 +1550,35 @@ function displayTranscript(chunks) {
     }
 }
 
+// 노트의 화자를 이름으로 등록 - 이후 회의에서 같은 목소리에 자동으로 이름이 붙음
+async function enrollSpeaker(speaker) {
+    if (!currentNoteId) {
+        log('Save the note before enrolling speakers', 'warning');
+        return;
+    }
+
+    const name = prompt(`'${speaker}'의 이름을 입력하세요`, /^화자\d+$/.test(speaker) ? '' : speaker);
+    if (!name || !name.trim()) return;
+
+    try {
+        const response = await fetch('/api/speakers', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ note_id: currentNoteId, speaker: speaker, name: name.trim() })
+        });
+        const data = await response.json();
+
+        if (data.success) {
+            log(`Speaker enrolled: ${speaker} → ${data.speaker.name} (${data.speaker.enrollments} samples)`, 'success');
+            loadNote(currentNoteId);
+        } else {
+            log(`Speaker enroll failed: ${data.error}`, 'error');
+        }
+    } catch (error) {
+        log(`Speaker enroll failed: ${error.message}`, 'error');
+    }
+}
+
 // 화자 인덱스 추출 (색상 구분용)
 function getSpeakerIndex(speaker) {
     const match = speaker.match(/\d+/);
@@ -0,0 +1,272 @@
+"""실시간 스트리밍 변환 모듈 (마이크 PCM 프레임 → 부분/확정 청크)
+
+- 아직 확정되지 않은 오디오만 버퍼에 두고, 새 오디오가 step초 쌓일 때마다 버퍼 전체를 다시 디코딩
+- 연속된 두 번의 디코딩 결과에서 앞에서부터 같은 청크만 확정 (stable prefix) - 확정된 만큼 버퍼에서 잘라냄
+- 확정되지 않은 뒷부분은 partial로 보내고 다음 디코딩에서 다시 고침
+- 받은 오디오는 WAV로 그대로 기록해 끝난 뒤 노트의 재생 파일 + 화자 분리 입력으로 사용
+"""
+
+import bisect
+import time
+import wave
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from audio import SAMPLE_RATE, audio_duration
+from vad import detect_speech_regions, estimate_noise_floor
+
+# 받을 수 있는 PCM 형식 (모노, little-endian)
+PCM_FORMATS = {'s16le': '<i2', 'f32le': '<f4'}
+
+# 세션 배경 소음 추정의 상한 (dB) - 버퍼 전체에 고르게 소리가 있어도(하위 10%가 높아도) 무음으로 판단하지 않도록
+NOISE_FLOOR_MAX_DB = -45.0
+
+
+def pcm_to_float(data: bytes, fmt: str) -> np.ndarray:
+    """
+    PCM 프레임을 float32 배열로 변환
+
+    Raises:
+        ValueError: 지원하지 않는 형식 또는 샘플 크기에 맞지 않는 길이
+    """
+    if fmt not in PCM_FORMATS:
+        raise ValueError(f'지원하지 않는 PCM 형식: {fmt}')
+    dtype = np.dtype(PCM_FORMATS[fmt])
+    if len(data) % dtype.itemsize:
+        raise ValueError('PCM 프레임 길이가 샘플 크기와 맞지 않습니다')
+
+    samples = np.frombuffer(data, dtype=dtype)
+    if fmt == 's16le':
+        return samples.astype(np.float32) / 32768.0
+    return samples.astype(np.float32)
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.split())
+
+
+class WavRecorder:
+    """받은 오디오를 16bit 모노 WAV로 이어서 기록 (세션 길이와 무관하게 메모리 사용 일정)"""
+
+    def __init__(self, path: str, sampling_rate: int = SAMPLE_RATE):
+        self.path = path
+        self.samples = 0
+        self._wav = wave.open(path, 'wb')
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sampling_rate)
+
+    def write(self, samples: np.ndarray):
+        self._wav.writeframes((np.clip(samples, -1.0, 1.0) * 32767).astype('<i2').tobytes())
+        self.samples += len(samples)
+
+    def close(self):
+        self._wav.close()
+
+
+class StreamingTranscriber:
+    """
+    스트리밍 세션 하나의 디코딩 상태
+
+    decode(audio)는 버퍼 시작 기준 타임스탬프를 가진 청크 목록을 반환 (pipe 결과의 chunks 형식)
+
+    - step_seconds: 새 오디오가 이만큼 쌓이면 다시 디코딩 (partial 갱신 주기)
+    - tail_guard_seconds: 버퍼 끝에서 이 안쪽에서 끝나는 청크는 아직 말하는 중일 수 있으므로 확정하지 않음
+    - max_buffer_seconds: 확정되지 않은 버퍼가 이보다 길어지면 마지막 청크만 남기고 확정 (Whisper 30초 윈도우 이내 유지)
+    """
+
+    def __init__(self, decode: Callable[[np.ndarray], List[Dict]], sampling_rate: int = SAMPLE_RATE,
+                 step_seconds: float = 1.0, tail_guard_seconds: float = 1.0, max_buffer_seconds: float = 20.0):
+        self.decode = decode
+        self.sampling_rate = sampling_rate
+        self.step = int(step_seconds * sampling_rate)
+        self.tail_guard = tail_guard_seconds
+        self.max_buffer_seconds = max_buffer_seconds
+
+        self.chunks: List[Dict] = []  # 확정된 청크 (세션 시작 기준 타임스탬프)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_start = 0  # 버퍼 첫 샘플의 세션 내 위치
+        self._received = 0
+        self._since_decode = 0
+        self._previous: List[Dict] = []  # 지난 디코딩의 확정되지 않은 청크
+        self._partial = ''
+        self._noise_floor = NOISE_FLOOR_MAX_DB  # 세션에서 본 가장 조용한 배경 소음
+
+        # 프레임별 (끝 샘플, 받은 시각) - 확정/부분 결과 지연 시간 계산용
+        self._arrivals: List[int] = []
+        self._arrival_times: List[float] = []
+
+        # 통계
+        self.decodes = 0
+        self.decode_seconds = 0.0
+        self.skipped_silence = 0
+        self.forced_commits = 0
+        self._final_latencies: List[float] = []
+        self._partial_latencies: List[float] = []
+
+    @property
+    def duration(self) -> float:
+        return self._received / float(self.sampling_rate)
+
+    def feed(self, samples: np.ndarray) -> List[Dict]:
+        """오디오 프레임 추가 - step만큼 쌓였으면 디코딩하고 partial/final 이벤트 반환"""
+        if not len(samples):
+            return []
+
+        self._buffer = np.concatenate([self._buffer, samples]) if len(self._buffer) else samples.astype(np.float32)
+        self._received += len(samples)
+        self._since_decode += len(samples)
+        self._arrivals.append(self._received)
+        self._arrival_times.append(time.time())
+
+        if self._since_decode < self.step:
+            return []
+        return self._decode(final=False)
+
+    def finish(self) -> List[Dict]:
+        """남은 버퍼를 모두 확정"""
+        return self._decode(final=True)
+
+    def _arrival_time(self, sample: int) -> float:
+        """해당 샘플이 들어 있던 프레임을 받은 시각"""
+        index = min(bisect.bisect_left(self._arrivals, sample), len(self._arrivals) - 1)
+        return self._arrival_times[index]
+
+    def _drop(self, sample: int):
+        """sample 앞쪽 버퍼 잘라냄"""
+        sample = min(max(sample, self._buffer_start), self._received)
+        self._buffer = self._buffer[sample - self._buffer_start:]
+        self._buffer_start = sample
+
+        # 잘라낸 구간의 도착 시각은 더 이상 필요 없음
+        keep = bisect.bisect_left(self._arrivals, sample)
+        if keep:
+            del self._arrivals[:keep]
+            del self._arrival_times[:keep]
+
+    def _decode(self, final: bool) -> List[Dict]:
+        self._since_decode = 0
+        if not len(self._buffer):
+            return []
+
+        events = []
+        start = self._buffer_start / float(self.sampling_rate)
+        length = audio_duration(self._buffer, self.sampling_rate)
+
+        # 무음만 있으면 디코딩하지 않음 (Whisper가 무음에서 문장을 만들어내는 것 방지)
+        # 무음 판단은 버퍼가 아니라 세션 기준 배경 소음으로 (짧은 버퍼 안에서는 계속 말하는 소리도 배경처럼 보임)
+        noise_floor = estimate_noise_floor(self._buffer, self.sampling_rate)
+        if noise_floor is not None:
+            self._noise_floor = min(self._noise_floor, noise_floor)
+        if not detect_speech_regions(self._buffer, self.sampling_rate, noise_floor_db=self._noise_floor):
+            self.skipped_silence += 1
+            # 끝부분은 말이 막 시작됐을 수 있으므로 (아직 최소 음성 길이가 안 됨) tail_guard만큼 남김
+            self._drop(self._received if final else self._received - int(self.tail_guard * self.sampling_rate))
+            self._previous = []
+            if self._partial:
+                self._partial = ''
+                events.append({'type': 'partial', 'text': '', 'start': round(start + length, 2)})
+            return events
+
+        started = time.time()
+        hypothesis = []
+        for chunk in self.decode(self._buffer):
+            text = (chunk.get('text') or '').strip()
+            if not text:
+                continue
+            begin, end = chunk.get('timestamp') or (None, None)
+            begin = min(float(begin or 0.0), length)
+            end = min(float(end) if end is not None else length, length)
+            hypothesis.append({'text': text, 'timestamp': [round(start + begin, 2), round(start + max(begin, end), 2)]})
+        now = time.time()
+        self.decodes += 1
+        self.decode_seconds += now - started
+
+        buffer_end = start + length
+        if final:
+            commit = len(hypothesis)
+        else:
+            # 지난 결과와 앞에서부터 같고, 버퍼 끝에서 충분히 떨어진 청크만 확정
+            commit = 0
+            for previous, current in zip(self._previous, hypothesis):
+                if _normalize(previous['text']) != _normalize(current['text']) or current['timestamp'][1] > buffer_end - self.tail_guard:
+                    break
+                commit += 1
+
+            if commit == 0 and length >= self.max_buffer_seconds:
+                # 결과가 계속 바뀌어 확정하지 못한 채 버퍼가 길어지면 마지막 청크만 남기고 확정
+                commit = max(len(hypothesis) - 1, 1) if hypothesis else 0
+                self.forced_commits += 1
+                if not hypothesis:
+                    self._drop(self._received)
+
+        committed, self._previous = hypothesis[:commit], hypothesis[commit:]
+        if committed:
+            for chunk in committed:
+                self._final_latencies.append(now - self._arrival_time(int(chunk['timestamp'][1] * self.sampling_rate)))
+            self.chunks.extend(committed)
+            events.append({'type': 'final', 'chunks': committed, 'latency': round(now - self._arrival_time(int(committed[-1]['timestamp'][1] * self.sampling_rate)), 2)})
+            self._drop(int(round(committed[-1]['timestamp'][1] * self.sampling_rate)))
+
+        partial = ' '.join(chunk['text'] for chunk in self._previous)
+        if partial or self._partial:
+            latency = now - self._arrival_time(self._received)
+            if partial:
+                self._partial_latencies.append(latency)
+            events.append({
+                'type': 'partial',
+                'text': partial,
+                'start': self._previous[0]['timestamp'][0] if self._previous else round(buffer_end, 2),
+                'latency': round(latency, 2)
+            })
+        self._partial = partial
+
+        if final:
+            self._drop(self._received)
+        return events
+
+    def stats(self) -> Dict:
+        def summary(values):
+            if not values:
+                return None
+            ordered = sorted(values)
+            return {
+                'avg': round(sum(ordered) / len(ordered), 2),
+                'p95': round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)], 2),
+                'max': round(ordered[-1], 2)
+            }
+
+        return {
+            'audio_seconds': round(self.duration, 2),
+            'chunks': len(self.chunks),
+            'decodes': self.decodes,
+            'decode_seconds': round(self.decode_seconds, 2),
+            'realtime_factor': round(self.decode_seconds / self.duration, 3) if self.duration else None,
+            'skipped_silence': self.skipped_silence,
+            'forced_commits': self.forced_commits,
+            'final_latency': summary(self._final_latencies),
+            'partial_latency': summary(self._partial_latencies)
+        }
+
+
+def in_gevent_worker() -> bool:
+    """gevent로 threading이 패치된 프로세스인지 (serve.py 웹 워커)"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+
+def run_blocking(fn, *args):
+    """
+    추론처럼 오래 걸리는 함수 실행
+
+    gevent 웹 워커에서는 네이티브 스레드 풀에서 실행해 다른 연결(SSE 등)의 이벤트 루프를 막지 않음
+    """
+    if not in_gevent_worker():
+        return fn(*args)
+
+    import gevent
+    return gevent.get_hub().threadpool.apply(fn, args)
@@ -0,0 +1,406 @@
+"""회의록 요약 모듈 (구간별 요약 → 합치기, 구간 단위 캐시)
+
+긴 녹취록을 한 번에 LLM에 보내지 않고
+- 시간/화자 기준으로 구간을 나눠 동시에 요약 (map)
+- 구간 요약을 모아 최종 회의록 작성, 너무 길면 단계적으로 합침 (reduce)
+- 구간 요약은 내용 해시로 캐시하므로 다시 요약하거나 검증할 때 바뀐 구간만 LLM 호출
+
+LLM은 OpenAI 호환 /chat/completions 또는 Anthropic /messages (로컬 OpenAI 호환 서버도 사용 가능)
+"""
+
+import http.client
+import json
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from cache import ResultCache, make_cache_key
+
+# 프롬프트를 바꾸면 올려서 이전 캐시를 쓰지 않도록 함
+PROMPT_VERSION = 1
+
+# 녹취록/요약의 [M:SS] 시간 표기 (2시간 넘는 회의는 분이 세 자리)
+CITATION_RE = re.compile(r'\[(\d{1,3}):(\d{2})\]')
+
+SUMMARY_SYSTEM_PROMPT = """당신은 공식 사업 회의록을 작성하는 전문가입니다.
+
+## 중요 공지
+이 회의록은 공식 문서로 사용되며, 완성 후 사용자가 직접 출처와 녹취록을 교차로 들으며 검증할 것입니다.
+**누락된 내용이 있으면 안 됩니다.**
+
+## 필수 규칙
+1. 녹취록에 언급된 주요 사항들에 대하여 모두 요약하세요.
+2. 모든 내용에 출처 시간을 [MM:SS] 형식으로 표기하세요.
+3. 여러 시간대를 종합한 경우 [MM:SS], [MM:SS] 형식으로 모든 시간을 표기하세요.
+4. 녹취록이기에 전사가 잘못된 부분이 있을 수 있습니다.
+5. 한국어로 작성하세요."""
+
+MAP_SYSTEM_PROMPT = """당신은 회의 녹취록의 한 구간을 정리하는 전문가입니다.
+
+## 필수 규칙
+1. 이 구간에서 언급된 안건, 결정 사항, 액션 아이템(담당자 포함), 수치, 일정을 빠짐없이 항목으로 정리하세요.
+2. 각 항목 끝에 근거가 된 줄의 시간을 녹취록 표기 그대로 [M:SS] 형식으로 붙이세요.
+3. 녹취록에 없는 내용은 추가하지 마세요.
+4. 한국어로 작성하세요."""
+
+COMBINE_SYSTEM_PROMPT = """당신은 회의록 초안을 정리하는 전문가입니다.
+
+## 필수 규칙
+1. 여러 구간 요약을 하나로 합치되, 항목을 빠뜨리지 마세요 (같은 내용만 합치기).
+2. 각 항목의 [M:SS] 시간 표기는 그대로 유지하세요. 합친 항목은 모든 시간을 [M:SS], [M:SS] 형식으로 표기하세요.
+3. 한국어로 작성하세요."""
+
+VERIFY_SYSTEM_PROMPT = """당신은 회의록 검증 전문가입니다.
+
+## 역할
+녹취록의 한 구간과, 작성된 요약본 중 그 구간을 인용한 항목을 비교하여 누락되거나 잘못된 내용을 찾아내세요.
+
+## 검증 기준
+1. 녹취록에 있지만 요약에 없는 내용
+2. 요약에서 잘못 해석되거나 왜곡된 내용
+3. 시간 표기가 누락되거나 잘못된 항목
+
+## 출력 형식
+**누락된 내용:**
+- (내용) [MM:SS] - 누락됨
+
+**수정 필요:**
+- (내용) [MM:SS] - (수정 사항)
+
+문제가 없으면 "누락 없음"이라고만 답하세요."""
+
+
+# 호출자에게 돌려주는 LLM API 오류 메시지 최대 길이
+ERROR_MESSAGE_CHARS = 200
+
+
+class LLMError(Exception):
+    """LLM API 호출 실패"""
+
+
+def format_time(seconds: Optional[float]) -> str:
+    """[M:SS] 표기용 시간 (프론트엔드 formatTime과 같은 형식)"""
+    if seconds is None:
+        return '--:--'
+    seconds = int(seconds)
+    return f'{seconds // 60}:{seconds % 60:02d}'
+
+
+def transcript_line(chunk: Dict) -> str:
+    speaker = chunk.get('speaker')
+    return f"[{format_time(chunk['timestamp'][0])}] {speaker + ': ' if speaker else ''}{chunk.get('text', '').strip()}"
+
+
+def split_segments(chunks: List[Dict], max_chars: int = 6000, max_seconds: float = 600) -> List[Dict]:
+    """
+    녹취록을 요약 구간으로 나눔 - 글자 수나 길이를 넘으면 자르되, 구간 뒤쪽 절반에
+    화자가 바뀌는 지점이 있으면 그곳에서 자름 (발언 중간에서 끊기지 않도록)
+
+    Returns:
+        [{'start', 'end', 'text'}] - text는 "[M:SS] 화자: 내용" 줄 목록
+    """
+    segments = []
+    current: List[Tuple[Dict, str]] = []
+    size = 0
+
+    def flush(items):
+        if items:
+            segments.append({
+                'start': items[0][0]['timestamp'][0] or 0.0,
+                'end': items[-1][0]['timestamp'][1] or items[-1][0]['timestamp'][0] or 0.0,
+                'text': '\n'.join(line for _, line in items)
+            })
+
+    for chunk in chunks:
+        line = transcript_line(chunk)
+        start = chunk['timestamp'][0] or 0.0
+
+        if current and (size + len(line) > max_chars or start - (current[0][0]['timestamp'][0] or 0.0) > max_seconds):
+            cut = next(
+                (i for i in range(len(current) - 1, len(current) // 2 - 1, -1)
+                 if i > 0 and current[i][0].get('speaker') != current[i - 1][0].get('speaker')),
+                len(current)
+            )
+            flush(current[:cut])
+            current = current[cut:]
+            size = sum(len(l) + 1 for _, l in current)
+
+        current.append((chunk, line))
+        size += len(line) + 1
+
+    flush(current)
+    return segments
+
+
+def citations(text: str) -> List[int]:
+    """본문의 [M:SS] 표기 (초 단위)"""
+    return [int(m) * 60 + int(s) for m, s in CITATION_RE.findall(text)]
+
+
+def invalid_citations(summary: str, chunks: List[Dict]) -> List[str]:
+    """녹취록의 어떤 줄 시간과도 맞지 않는 [M:SS] 표기 (LLM이 만들어낸 시간)"""
+    valid = {int(chunk['timestamp'][0]) for chunk in chunks if chunk['timestamp'][0] is not None}
+    return [format_time(t) for t in sorted(set(citations(summary)) - valid)]
+
+
+class ConnectionPool:
+    """호스트 하나의 keep-alive 연결 풀 (동시에 최대 size개 연결, 요청마다 새로 연결하지 않음)"""
+
+    def __init__(self, scheme: str, host: str, size: int, timeout: float):
+        self.scheme = scheme
+        self.host = host
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.Queue" = queue.Queue()
+        for _ in range(size):
+            self._idle.put(None)  # 처음 사용할 때 연결
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, timeout=self.timeout)
+
+    def post(self, path: str, payload: bytes, headers: Dict) -> Tuple[int, bytes]:
+        """연결 하나를 빌려 POST (쉬는 동안 서버가 닫은 연결이면 새로 연결해서 한 번 더)"""
+        conn = self._idle.get()
+        try:
+            for attempt in range(2):
+                if conn is None:
+                    conn = self._connect()
+                try:
+                    conn.request('POST', path, payload, headers)
+                    response = conn.getresponse()
+                    return response.status, response.read()
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                    conn.close()
+                    conn = None
+                    if attempt:
+                        raise LLMError(f'LLM API 연결 실패: {e}')
+                except (http.client.HTTPException, OSError) as e:
+                    conn.close()
+                    conn = None
+                    raise LLMError(f'LLM API 연결 실패: {e}')
+        finally:
+            self._idle.put(conn)
+
+
+# (scheme, host)별 공유 연결 풀 - 요청마다 만드는 LLMClient가 같은 풀을 사용
+_pools: Dict[Tuple[str, str], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(scheme: str, host: str, size: int, timeout: float) -> ConnectionPool:
+    with _pools_lock:
+        pool = _pools.get((scheme, host))
+        if pool is None:
+            pool = _pools[(scheme, host)] = ConnectionPool(scheme, host, size, timeout)
+        return pool
+
+
+class LLMClient:
+    """
+    LLM API 클라이언트
+
+    model이 claude로 시작하면 Anthropic /messages, 나머지는 OpenAI 호환 /chat/completions
+    """
+
+    def __init__(self, api_url: str, api_key: str, model: str, max_connections: int = 4, timeout: float = 300):
+        parts = urlsplit(api_url.rstrip('/'))
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
+            raise ValueError(f'잘못된 API URL: {api_url}')
+
+        self.api_key = api_key
+        self.model = model
+        self.provider = 'anthropic' if model.startswith('claude') else 'openai'
+        self.pool = get_pool(parts.scheme, parts.netloc, max_connections, timeout)
+        self._base_path = parts.path
+
+    def _request(self, path: str, body: Dict, headers: Dict) -> Dict:
+        payload = json.dumps(body).encode('utf-8')
+        status, data = self.pool.post(self._base_path + path, payload, dict(headers, **{'Content-Type': 'application/json'}))
+
+        try:
+            result = json.loads(data)
+        except ValueError:
+            raise LLMError(f'LLM API 응답을 해석할 수 없습니다 (HTTP {status})')
+
+        if status >= 400 or 'error' in result:
+            error = result.get('error')
+            message = error.get('message') if isinstance(error, dict) else error
+            # 상대 서버의 오류 본문은 짧게 잘라서만 전달
+            raise LLMError(str(message)[:ERROR_MESSAGE_CHARS] if message else f'LLM API 오류 (HTTP {status})')
+        return result
+
+    def complete(self, system: str, user: str, max_tokens: int = 16000) -> str:
+        if self.provider == 'anthropic':
+            result = self._request('/messages', {
+                'model': self.model,
+                'max_tokens': max_tokens,
+                'system': system,
+                'messages': [{'role': 'user', 'content': user}]
+            }, {'x-api-key': self.api_key, 'anthropic-version': '2023-06-01'})
+            text = ''.join(block.get('text', '') for block in result.get('content', []))
+        else:
+            headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
+            result = self._request('/chat/completions', {
+                'model': self.model,
+                'messages': [
+                    {'role': 'system', 'content': system},
+                    {'role': 'user', 'content': user}
+                ],
+                'max_completion_tokens': max_tokens
+            }, headers)
+            choice = (result.get('choices') or [{}])[0]
+            if choice.get('finish_reason') == 'content_filter':
+                raise LLMError('콘텐츠 필터에 의해 차단되었습니다. 다른 모델을 사용해 보세요.')
+            text = (choice.get('message') or {}).get('content') or ''
+
+        if not text.strip():
+            raise LLMError('API가 빈 응답을 반환했습니다. 다시 시도하거나 다른 모델을 사용해 보세요.')
+        return text
+
+
+class Summarizer:
+    """
+    구간별 요약 + 합치기 파이프라인
+
+    - 구간 요약/중간 합치기/최종 회의록/구간 검증 결과를 모두 (모델, 프롬프트, 입력) 해시로 캐시
+    - 같은 녹취록을 다시 요약하면 LLM 호출 없이 캐시에서, 일부 청크만 고쳤으면 그 구간만 다시 호출
+    """
+
+    def __init__(self, cache: ResultCache, segment_chars: int = 6000, segment_seconds: float = 600, reduce_chars: int = 24000):
+        self.cache = cache
+        self.segment_chars = segment_chars
+        self.segment_seconds = segment_seconds
+        self.reduce_chars = reduce_chars
+
+    def _call(self, client: LLMClient, system: str, user: str) -> Tuple[str, bool]:
+        """캐시 확인 후 LLM 호출 - (응답, 캐시 적중 여부), 통계는 호출한 쪽에서 집계 (여러 스레드에서 실행)"""
+        key = make_cache_key(version=PROMPT_VERSION, provider=client.provider, model=client.model, system=system, user=user)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached['text'], True
+
+        text = client.complete(system, user)
+        self.cache.put(key, {'text': text})
+        return text, False
+
+    @staticmethod
+    def _count(stats: Dict, hit: bool):
+        stats['cache_hits' if hit else 'llm_calls'] += 1
+
+    def _cached_call(self, client: LLMClient, stats: Dict, system: str, user: str) -> str:
+        text, hit = self._call(client, system, user)
+        self._count(stats, hit)
+        return text
+
+    def _map(self, client: LLMClient, stats: Dict, system: str, prompts: List[str]) -> List[str]:
+        """프롬프트 여러 개를 연결 수만큼 동시에 호출 (통계는 이 스레드에서 합산)"""
+        with ThreadPoolExecutor(max_workers=client.pool.size, thread_name_prefix='summarize') as executor:
+            results = list(executor.map(lambda user: self._call(client, system, user), prompts))
+        for _, hit in results:
+            self._count(stats, hit)
+        return [text for text, _ in results]
+
+    def summarize(self, client: LLMClient, chunks: List[Dict], template: str = '') -> Tuple[str, Dict]:
+        """회의록 생성 - (회의록, 통계)"""
+        started = time.time()
+        stats = {'segments': 0, 'llm_calls': 0, 'cache_hits': 0, 'reduce_levels': 0}
+
+        segments = split_segments(chunks, self.segment_chars, self.segment_seconds)
+        stats['segments'] = len(segments)
+
+        partials = self._map(client, stats, MAP_SYSTEM_PROMPT, [
+            f"[녹취록 구간 {format_time(s['start'])} ~ {format_time(s['end'])}]\n{s['text']}\n\n---\n위 구간의 내용을 항목으로 정리하세요."
+            for s in segments
+        ])
+        partials = [
+            f"### 구간 {format_time(s['start'])} ~ {format_time(s['end'])}\n{text.strip()}"
+            for s, text in zip(segments, partials)
+        ]
+
+        # 구간 요약이 한 번에 넣기에 너무 길면 몇 개씩 묶어 합치기를 반복
+        while len(partials) > 1 and sum(len(p) for p in partials) > self.reduce_chars:
+            groups, group, size = [], [], 0
+            for partial in partials:
+                if group and size + len(partial) > self.reduce_chars:
+                    groups.append(group)
+                    group, size = [], 0
+                group.append(partial)
+                size += len(partial)
+            groups.append(group)
+            if len(groups) == len(partials):
+                # 구간 하나가 이미 한도를 넘으면 둘씩 묶음
+                groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+
+            stats['reduce_levels'] += 1
+            partials = self._map(client, stats, COMBINE_SYSTEM_PROMPT, [
+                '[구간별 요약]\n' + '\n\n'.join(group) + '\n\n---\n위 구간별 요약을 하나로 합치세요.'
+                for group in groups
+            ])
+
+        system = SUMMARY_SYSTEM_PROMPT
+        if template:
+            system += f"\n\n## 출력 형식\n다음 템플릿에 맞춰 작성하세요:\n\n{template}"
+        user = (
+            '[구간별 요약]\n' + '\n\n'.join(partials) +
+            '\n\n---\n위 구간별 요약을 바탕으로 회의록을 작성하세요.\n'
+            '- 모든 내용을 빠짐없이 포함\n'
+            '- 각 항목에 구간별 요약의 [M:SS] 시간 표기를 그대로 유지'
+        )
+        summary = self._cached_call(client, stats, system, user)
+
+        stats['invalid_citations'] = invalid_citations(summary, chunks)
+        stats['took_ms'] = round((time.time() - started) * 1000)
+        return summary, stats
+
+    def verify(self, client: LLMClient, chunks: List[Dict], summary: str) -> Tuple[str, Dict]:
+        """
+        구간별 검증 - 각 구간을 그 구간 시간을 인용한 요약 항목과만 비교
+
+        요약의 일부 항목만 고쳤으면 그 항목이 인용한 구간만 다시 검증
+        """
+        started = time.time()
+        stats = {'segments': 0, 'llm_calls': 0, 'cache_hits': 0}
+
+        segments = split_segments(chunks, self.segment_chars, self.segment_seconds)
+        stats['segments'] = len(segments)
+
+        lines = [line for line in summary.splitlines() if line.strip()]
+        cited = [(line, citations(line)) for line in lines]
+        bounds = [s['start'] for s in segments[1:]] + [float('inf')]
+
+        prompts = []
+        for segment, next_start in zip(segments, bounds):
+            relevant = [line for line, times in cited if any(int(segment['start']) <= t < next_start for t in times)]
+            prompts.append(
+                f"[원본 녹취록 구간 {format_time(segment['start'])} ~ {format_time(segment['end'])}]\n{segment['text']}\n\n---\n\n"
+                f"[요약본 중 이 구간을 인용한 항목]\n" + ('\n'.join(relevant) or '(없음)') +
+                "\n\n---\n위 녹취록 구간과 요약 항목을 비교하여 누락되거나 잘못된 내용이 있는지 검증하세요."
+            )
+
+        results = self._map(client, stats, VERIFY_SYSTEM_PROMPT, prompts)
+
+        # 문제가 있는 구간만 모아서 보여줌
+        problems = [
+            f"#### 구간 {format_time(s['start'])} ~ {format_time(s['end'])}\n{text.strip()}"
+            for s, text in zip(segments, results) if not text.strip().startswith('누락 없음')
+        ]
+        uncited = [line for line, times in cited if not times and line.lstrip().startswith(('-', '*'))]
+
+        report = ['### 검증 결과', '']
+        report += problems or ['누락 없음. 요약이 정확합니다.']
+        if uncited:
+            report += ['', '**시간 표기 없음:**'] + [f'{line.strip()} - 출처 시간 누락' for line in uncited]
+        invalid = invalid_citations(summary, chunks)
+        if invalid:
+            report += ['', '**녹취록에 없는 시간:** ' + ', '.join(f'[{t}]' for t in invalid)]
+
+        stats['problem_segments'] = len(problems)
+        stats['took_ms'] = round((time.time() - started) * 1000)
+        return '\n'.join(report), stats
+
@@ -1,62 +1,191 @@
 import torch
-import os
+import contextlib
 import subprocess
-import tempfile
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
 from transformers import AutoModelForSpeechSeq2Seq, AutoProcessor, pipeline
 import json
+from audio import SAMPLE_RATE, stream_audio, load_audio, audio_duration
+from devices import dtype_name, effective_backend, get_device
 
 
-def convert_audio_to_wav(audio_path: str) -> str:
-    """지원되지 않는 오디오 형식을 wav로 변환"""
-    # wav, flac은 대부분 지원되므로 그대로 반환
-    ext = os.path.splitext(audio_path)[1].lower()
-    if ext in ['.wav', '.flac']:
-        return audio_path, False
+def get_device_and_dtype(device_mode="auto"):
+    """GPU/CPU 선택 (auto, cuda, cpu) - (장치, torch dtype)"""
+    device = get_device(device_mode)
+    return device, getattr(torch, dtype_name(device))
+
 
-    # ffmpeg으로 wav 변환
-    wav_path = tempfile.mktemp(suffix='.wav')
+def _load_onnx_model(model_id):
     try:
-        result = subprocess.run([
-            'ffmpeg', '-i', audio_path,
-            '-ar', '16000',  # 16kHz로 리샘플링
-            '-ac', '1',      # 모노
-            '-y',            # 덮어쓰기
-            wav_path
-        ], check=True, capture_output=True)
-        return wav_path, True  # True = 임시 파일 생성됨
-    except subprocess.CalledProcessError as e:
-        print(f"[Transcribe] ffmpeg 변환 실패: {e.stderr.decode() if e.stderr else e}")
-        return audio_path, False
-    except FileNotFoundError:
-        print("[Transcribe] ffmpeg이 설치되지 않았습니다. 원본 파일로 시도합니다.")
-        return audio_path, False
+        from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+    except ImportError:
+        raise ValueError("ONNX 백엔드를 사용하려면 optimum[onnxruntime]을 설치하세요 (uv sync --extra onnx)")
+
+    return ORTModelForSpeechSeq2Seq.from_pretrained(model_id, export=True)
+
+
+# speculative decoding 보조 모델 - 토크나이저(vocab)와 mel 채널 수가 같아야 함
+#   large-v3는 mel 128채널이라 tiny/base(80채널)를 쓸 수 없어 디코더가 4층인 large-v3-turbo 사용
+ASSISTANT_MODELS = {
+    "openai/whisper-medium": "openai/whisper-base",
+    "openai/whisper-large-v3": "openai/whisper-large-v3-turbo",
+}
 
 
-def get_device_and_dtype(device_mode="auto"):
-    """GPU/CPU 선택 (auto, cuda, cpu)"""
-    if device_mode == "cuda":
-        if not torch.cuda.is_available():
-            raise ValueError("CUDA를 사용할 수 없습니다. GPU가 없거나 CUDA가 설치되지 않았습니다.")
-        return "cuda:0", torch.float16
-    elif device_mode == "cpu":
-        return "cpu", torch.float32
-    else:  # auto
-        if torch.cuda.is_available():
-            return "cuda:0", torch.float16
-        return "cpu", torch.float32
-
-
-def load_whisper_model(model_id="openai/whisper-base", device_mode="auto"):
-    """Whisper 모델 로드"""
+class Optimization:
+    """
+    GPU 백엔드 적용 상태 (파이프라인에 pipe.optimization으로 붙여 둠)
+
+    적용하지 못한 최적화는 fallback에 이유를 남기고 기본 동작으로 계속 진행
+    """
+
+    def __init__(self, backend="torch"):
+        self.backend = backend
+        self.attention = None
+        self.static_cache = False
+        self.assistant = None  # speculative decoding 보조 모델
+        self.assistant_id = None
+        self.lock = None  # static KV cache는 모델에 하나 - generate를 한 번에 하나씩
+        self.eager_forward = None  # torch.compile 실패 시 되돌릴 forward
+        self.warmup_seconds = None
+        self.fallback = []
+
+    def generate_kwargs(self):
+        return {"assistant_model": self.assistant} if self.assistant is not None else {}
+
+    def exclusive(self):
+        return self.lock if self.lock is not None else contextlib.nullcontext()
+
+    def stats(self):
+        return {
+            "backend": self.backend,
+            "attention": self.attention,
+            "static_cache": self.static_cache,
+            "assistant": self.assistant_id,
+            "warmup_seconds": self.warmup_seconds,
+            "fallback": list(self.fallback),
+        }
+
+
+def optimization_of(pipe):
+    return getattr(pipe, "optimization", None) or Optimization()
+
+
+def _load_torch_model(model_id, torch_dtype, attention=None):
+    """모델 로드 - attention 구현을 지원하지 않는 환경(transformers/torch 버전)이면 기본 attention으로 로드"""
+    kwargs = dict(torch_dtype=torch_dtype, low_cpu_mem_usage=True, use_safetensors=True)
+    if attention:
+        try:
+            return AutoModelForSpeechSeq2Seq.from_pretrained(model_id, attn_implementation=attention, **kwargs), None
+        except (ValueError, ImportError, TypeError) as e:
+            print(f"[Transcribe] {attention} attention 사용 불가 - 기본 attention으로 로드 ({e})")
+            return AutoModelForSpeechSeq2Seq.from_pretrained(model_id, **kwargs), f"attention: {e}"
+    return AutoModelForSpeechSeq2Seq.from_pretrained(model_id, **kwargs), None
+
+
+def _load_assistant(model_id, model, device, torch_dtype, attention):
+    """speculative decoding 보조 모델 로드 (없거나 호환되지 않으면 ValueError)"""
+    assistant_id = ASSISTANT_MODELS.get(model_id)
+    if assistant_id is None:
+        raise ValueError(f"{model_id}에 맞는 보조 모델이 없습니다")
+
+    assistant, _ = _load_torch_model(assistant_id, torch_dtype, attention)
+    if (assistant.config.num_mel_bins, assistant.config.vocab_size) != (model.config.num_mel_bins, model.config.vocab_size):
+        raise ValueError(f"{assistant_id}는 {model_id}와 mel 채널 수/토크나이저가 달라 보조 모델로 쓸 수 없습니다")
+    assistant.to(device)
+    return assistant_id, assistant
+
+
+def _enable_static_compile(pipe):
+    """static KV cache + torch.compile (디코딩 한 스텝의 텐서 모양이 고정되어 CUDA graph로 재생)"""
+    model = pipe.model
+    optimization = pipe.optimization
+
+    optimization.eager_forward = model.forward
+    model.generation_config.cache_implementation = "static"
+    model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=True)
+    optimization.static_cache = True
+    optimization.lock = threading.Lock()
+
+
+def _disable_static_compile(pipe, reason):
+    model = pipe.model
+    optimization = pipe.optimization
+
+    model.forward = optimization.eager_forward
+    model.generation_config.cache_implementation = None
+    optimization.static_cache = False
+    optimization.lock = None
+    optimization.fallback.append(f"compile: {reason}")
+
+
+def batch_bucket(size, max_batch_size):
+    """static KV cache 배치 크기 (2의 거듭제곱으로 올림 - 컴파일된 그래프 수 제한)"""
+    bucket = 1
+    while bucket < size:
+        bucket *= 2
+    return min(bucket, max(max_batch_size, size))
+
+
+def warm_up_model(pipe, max_batch_size=1, language="korean"):
+    """
+    더미 입력으로 generate 실행 - 첫 작업이 torch.compile 그래프 생성/CUDA graph 기록을 기다리지 않도록
+
+    static KV cache면 배치 크기 버킷마다 두 번씩 (첫 번째 컴파일, 두 번째 CUDA graph 기록)
+    컴파일에 실패하면 static cache/compile 없이 계속 사용
+    """
+    model = pipe.model
+    optimization = optimization_of(pipe)
+    sizes = sorted({batch_bucket(size, max_batch_size) for size in range(1, max_batch_size + 1)}) if optimization.static_cache else [1]
+
+    started = time.time()
+    try:
+        for size in sizes:
+            features = torch.zeros((size, model.config.num_mel_bins, 3000), device=model.device, dtype=getattr(model, "dtype", torch.float32))
+            for _ in range(2 if optimization.static_cache else 1):
+                with torch.inference_mode():
+                    model.generate(features, return_timestamps=True, language=language, task="transcribe", **optimization.generate_kwargs())
+    except Exception as e:
+        if not optimization.static_cache:
+            raise
+        print(f"[Transcribe] torch.compile 워밍업 실패 - static cache 없이 사용 ({e})")
+        _disable_static_compile(pipe, e)
+        return warm_up_model(pipe, max_batch_size, language)
+
+    optimization.warmup_seconds = round(time.time() - started, 2)
+    print(f"[Transcribe] Warm-up done ({optimization.backend}, batch sizes {sizes}, {optimization.warmup_seconds}s)")
+
+
+def load_whisper_model(model_id="openai/whisper-base", device_mode="auto", cpu_backend="torch", gpu_backend="torch", warmup_batch_size=1):
+    """
+    Whisper 모델 로드
+
+    Args:
+        cpu_backend / gpu_backend: 장치에 따라 하나만 적용 (GPU가 없으면 GPU 백엔드는 무시하고 CPU 백엔드 사용)
+        warmup_batch_size: compiled 백엔드에서 미리 컴파일할 최대 배치 크기 (배치 엔진의 max_batch_size)
+    """
     device, torch_dtype = get_device_and_dtype(device_mode)
+    backend = effective_backend(device_mode, cpu_backend, gpu_backend)
+    optimization = Optimization(backend)
+
+    if backend == "onnx":
+        model = _load_onnx_model(model_id)
+    else:
+        attention = "sdpa" if backend in ("sdpa", "compiled", "speculative") else None
+        model, fallback = _load_torch_model(model_id, torch_dtype, attention)
+        if fallback:
+            optimization.fallback.append(fallback)
+        else:
+            optimization.attention = attention
+        model.to(device)
 
-    model = AutoModelForSpeechSeq2Seq.from_pretrained(
-        model_id,
-        torch_dtype=torch_dtype,
-        low_cpu_mem_usage=True,
-        use_safetensors=True
-    )
-    model.to(device)
+        if backend == "int8":
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    if backend != "torch":
+        print(f"[Transcribe] {'GPU' if device.startswith('cuda') else 'CPU'} backend: {backend}")
 
     processor = AutoProcessor.from_pretrained(model_id)
 
@@ -68,26 +197,270 @@ def load_whisper_model(model_id="openai/whisper-base", device_mode="auto"):
         torch_dtype=torch_dtype,
         device=device,
     )
+    pipe.optimization = optimization
+
+    if backend == "speculative":
+        try:
+            optimization.assistant_id, optimization.assistant = _load_assistant(model_id, model, device, torch_dtype, optimization.attention)
+            print(f"[Transcribe] Assistant model: {optimization.assistant_id}")
+        except Exception as e:
+            print(f"[Transcribe] speculative decoding 사용 불가 - 보조 모델 없이 사용 ({e})")
+            optimization.fallback.append(f"assistant: {e}")
+    elif backend == "compiled":
+        _enable_static_compile(pipe)
+        warm_up_model(pipe, warmup_batch_size)
 
     return pipe
 
 
-def transcribe_audio(pipe, audio_path, language="korean"):
-    """음성을 텍스트로 변환 (타임스탬프 포함)"""
-    # 지원되지 않는 형식은 wav로 변환
-    converted_path, is_temp = convert_audio_to_wav(audio_path)
+def pipe_input(audio):
+    """파일 경로 또는 디코딩된 배열을 pipeline 입력으로 변환"""
+    if isinstance(audio, np.ndarray):
+        return {"raw": audio, "sampling_rate": SAMPLE_RATE}
+    return {"raw": load_audio(audio), "sampling_rate": SAMPLE_RATE}
 
-    try:
+
+def transcribe_audio(pipe, audio, language="korean"):
+    """음성을 텍스트로 변환 (타임스탬프 포함) - audio는 파일 경로 또는 16kHz float32 배열"""
+    optimization = optimization_of(pipe)
+    with optimization.exclusive():
         result = pipe(
-            converted_path,
+            pipe_input(audio),
             return_timestamps=True,
-            generate_kwargs={"language": language}
+            generate_kwargs=dict(language=language, **optimization.generate_kwargs())
         )
-        return result
-    finally:
-        # 임시 파일 삭제
-        if is_temp and os.path.exists(converted_path):
-            os.remove(converted_path)
+    return result
+
+
+# 긴 오디오는 겹치는 30초 윈도우로 나눠 변환 후 이어 붙임
+WINDOW_SECONDS = 30
+OVERLAP_SECONDS = 4
+
+# 윈도우 디코딩 반복 방지 설정 (배치 엔진과 순차 처리에 같은 값 사용)
+REPETITION_GUARD = {
+    "condition_on_prev_tokens": False,  # 반복 방지
+    "compression_ratio_threshold": 1.35,  # 반복 감지 임계값
+    "no_speech_threshold": 0.6,
+}
+
+
+def iter_windows(blocks, sampling_rate=SAMPLE_RATE, window_seconds=WINDOW_SECONDS, overlap_seconds=OVERLAP_SECONDS):
+    """
+    오디오 블록 스트림을 겹치는 윈도우로 변환
+
+    Yields:
+        (시작 샘플, 윈도우 배열)
+    """
+    window = int(window_seconds * sampling_rate)
+    step = window - int(overlap_seconds * sampling_rate)
+    buffer = None
+    offset = 0
+    emitted = False
+
+    for block in blocks:
+        buffer = block if buffer is None or not len(buffer) else np.concatenate([buffer, block])
+        while len(buffer) >= window:
+            yield offset, buffer[:window]
+            emitted = True
+            buffer = buffer[step:]
+            offset += step
+
+    # 마지막 윈도우 - 이전 윈도우와 겹치는 부분만 남았으면 생략
+    if buffer is not None and len(buffer) and (not emitted or len(buffer) > window - step):
+        yield offset, buffer
+
+
+def stitch_windows(windows, overlap_seconds=OVERLAP_SECONDS):
+    """
+    윈도우별 결과를 원본 타임라인으로 이어 붙임
+
+    겹치는 구간은 윈도우 경계에서 반씩 나눠, 청크 중간 지점이 속한 윈도우의 결과만 사용
+
+    Args:
+        windows: [(시작 초, 길이 초, 윈도우 기준 청크 목록)]
+    """
+    chunks = []
+    half = overlap_seconds / 2
+
+    for index, (start, length, window_chunks) in enumerate(windows):
+        low = start + half if index > 0 else float("-inf")
+        high = start + length - half if index < len(windows) - 1 else float("inf")
+
+        for chunk in window_chunks:
+            begin, end = chunk["timestamp"]
+            begin = start + (begin or 0.0)
+            end = start + (end if end is not None else length)
+            if low <= (begin + end) / 2 < high:
+                chunks.append({"text": chunk["text"], "timestamp": (begin, end)})
+
+    return {"text": "".join(c["text"] for c in chunks), "chunks": chunks}
+
+
+class WhisperBatcher:
+    """
+    여러 작업의 30초 log-mel 윈도우를 모아 한 번에 추론하는 배치 엔진
+
+    - max_batch_size개가 모이거나 max_wait_ms가 지나면 배치 실행
+    - 디코딩 결과는 각 작업으로 돌려보내고 윈도우 오프셋만큼 타임스탬프 보정
+    - 처리량 통계 (오디오 초 / 실제 추론 초) 제공
+    """
+
+    WINDOW_SECONDS = WINDOW_SECONDS
+
+    def __init__(self, pipe, max_batch_size=8, max_wait_ms=50):
+        self.pipe = pipe
+        self.optimization = optimization_of(pipe)
+        # assisted generation(speculative decoding)은 배치 1만 지원
+        self.max_batch_size = 1 if self.optimization.assistant is not None else max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.sampling_rate = SAMPLE_RATE
+
+        self._pending = []
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # 통계
+        self._batches = 0
+        self._windows = 0
+        self._audio_seconds = 0.0
+        self._busy_seconds = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+        self._thread.start()
+
+    def transcribe(self, audio, language="korean", progress_callback=None):
+        """
+        오디오를 겹치는 윈도우로 나눠 배치 큐에 넣고 결과를 이어 붙여 반환 (pipe 결과와 같은 형식)
+
+        audio가 파일 경로면 디코딩하면서 윈도우를 바로 제출 (전체 버퍼를 만들지 않음)
+        progress_callback(완료 윈도우 수, 전체 윈도우 수) - 파일 경로면 전체 수는 제출이 끝난 뒤에 확정
+        """
+        if isinstance(audio, np.ndarray):
+            windows = list(iter_windows([audio], self.sampling_rate))
+            total = len(windows)
+        else:
+            windows = iter_windows(stream_audio(audio, self.WINDOW_SECONDS, self.sampling_rate), self.sampling_rate)
+            total = None
+
+        progress = {"done": 0, "total": total}
+        progress_lock = threading.Lock()
+
+        def on_done(_):
+            if progress_callback is None:
+                return
+            with progress_lock:
+                progress["done"] += 1
+                done, total_windows = progress["done"], progress["total"]
+            progress_callback(done, total_windows)
+
+        futures = []
+        for offset, segment in windows:
+            length = audio_duration(segment, self.sampling_rate)
+            features = self.pipe.feature_extractor(
+                segment, sampling_rate=self.sampling_rate, return_tensors="np"
+            ).input_features[0]
+            future = Future()
+            future.add_done_callback(on_done)
+            futures.append((offset / self.sampling_rate, length, future))
+            with self._cond:
+                closed = self._closed
+                if not closed:
+                    self._pending.append((language, features, length, future))
+                    self._cond.notify()
+            if closed:
+                future.set_exception(RuntimeError("배치 엔진이 종료되었습니다"))
+
+        with progress_lock:
+            progress["total"] = len(futures)
+
+        return stitch_windows([(start, length, future.result()) for start, length, future in futures])
+
+    def stats(self):
+        with self._cond:
+            return {
+                "batches": self._batches,
+                "windows": self._windows,
+                "avg_batch_size": (self._windows / self._batches) if self._batches else 0.0,
+                "audio_seconds": self._audio_seconds,
+                "busy_seconds": self._busy_seconds,
+                "throughput": (self._audio_seconds / self._busy_seconds) if self._busy_seconds else 0.0,
+            }
+
+    def close(self):
+        """배치 스레드 종료 - 아직 처리되지 않은 윈도우는 오류로 끝내서 기다리는 작업이 멈추지 않게 함"""
+        with self._cond:
+            self._closed = True
+            pending, self._pending = self._pending, []
+            self._cond.notify_all()
+        for item in pending:
+            item[3].set_exception(RuntimeError("배치 엔진이 종료되었습니다"))
+
+    def _next_batch(self):
+        """배치 하나 수집 - 첫 요청 이후 max_wait 동안 같은 언어 요청을 더 기다림"""
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return []
+
+            deadline = time.time() + self.max_wait
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            language = self._pending[0][0]
+            batch = [item for item in self._pending if item[0] == language][:self.max_batch_size]
+            for item in batch:
+                self._pending.remove(item)
+            return batch
+
+    def _run(self):
+        model = self.pipe.model
+        tokenizer = self.pipe.tokenizer
+
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+
+            language = batch[0][0]
+            started = time.time()
+            try:
+                features = np.stack([item[1] for item in batch])
+                if self.optimization.static_cache:
+                    # 워밍업한 배치 크기로 맞춤 (남는 자리는 0으로 채우고 결과는 버림)
+                    padding = batch_bucket(len(batch), self.max_batch_size) - len(batch)
+                    if padding:
+                        features = np.concatenate([features, np.zeros((padding,) + features.shape[1:], dtype=features.dtype)])
+                features = torch.from_numpy(features).to(model.device, dtype=getattr(model, "dtype", torch.float32))
+                with self.optimization.exclusive(), torch.inference_mode():
+                    sequences = model.generate(
+                        features,
+                        return_timestamps=True,
+                        language=language,
+                        task="transcribe",
+                        **REPETITION_GUARD,
+                        **self.optimization.generate_kwargs()
+                    )
+
+                for item, ids in zip(batch, sequences):
+                    decoded = tokenizer.decode(ids, skip_special_tokens=True, output_offsets=True)
+                    offsets = decoded.get("offsets")
+                    if not offsets and decoded["text"].strip():
+                        offsets = [{"text": decoded["text"], "timestamp": (0.0, None)}]
+                    item[3].set_result(offsets or [])
+            except Exception as e:
+                for item in batch:
+                    item[3].set_exception(e)
+
+            elapsed = time.time() - started
+            with self._cond:
+                self._batches += 1
+                self._windows += len(batch)
+                self._audio_seconds += sum(item[2] for item in batch)
+                self._busy_seconds += elapsed
 
 
 def get_audio_duration(audio_path):
@@ -187,97 +560,80 @@ def filter_repeated_text(result):
     return result
 
 
-def transcribe_audio_with_progress(pipe, audio_path, language="korean", progress_callback=None):
-    """진행률 콜백과 함께 음성을 텍스트로 변환"""
+def transcribe_audio_with_progress(pipe, audio, language="korean", progress_callback=None):
+    """
+    진행률 콜백과 함께 음성을 텍스트로 변환 (배치 엔진 없이 윈도우를 순서대로 처리)
 
-    # 원본 오디오 길이 확인 (싱크 보정용)
-    original_duration = get_audio_duration(audio_path)
-    print(f"[Transcribe] Original audio duration: {original_duration:.1f}s" if original_duration else "[Transcribe] Could not get original duration")
+    audio는 파일 경로 또는 16kHz float32 배열, 윈도우마다 progress_callback 호출
+    """
+    original_duration = None
+    if isinstance(audio, str):
+        # 원본 오디오 길이 확인 (싱크 보정용)
+        original_duration = get_audio_duration(audio)
+        print(f"[Transcribe] Original audio duration: {original_duration:.1f}s" if original_duration else "[Transcribe] Could not get original duration")
 
-    # 지원되지 않는 형식은 wav로 변환
-    converted_path, is_temp = convert_audio_to_wav(audio_path)
+        # 16kHz float32로 한 번만 디코딩 (임시 wav 파일 없음)
+        audio = load_audio(audio)
 
-    try:
-        # 변환된 오디오 길이 확인
-        if is_temp:
-            converted_duration = get_audio_duration(converted_path)
-            print(f"[Transcribe] Converted audio duration: {converted_duration:.1f}s" if converted_duration else "")
-        else:
-            converted_duration = original_duration
+    converted_duration = audio_duration(audio)
+    print(f"[Transcribe] Decoded audio duration: {converted_duration:.1f}s")
 
-        duration = original_duration or converted_duration
+    duration = original_duration or converted_duration
 
-        if progress_callback:
-            progress_callback({
-                "stage": "processing",
-                "progress": 0,
-                "message": "음성 분석 시작...",
-                "duration": duration
-            })
+    if progress_callback:
+        progress_callback({
+            "stage": "processing",
+            "progress": 0,
+            "message": "음성 분석 시작...",
+            "duration": duration
+        })
 
-        # Whisper는 30초 단위로 chunk 처리
-        chunk_length = 30  # seconds
-
-        if duration and duration > chunk_length:
-            # 긴 오디오: chunk 단위로 처리하며 진행률 업데이트
-            total_chunks = int(duration / chunk_length) + 1
+    windows = list(iter_windows([audio]))
+    results = []
+    started = time.time()
 
+    optimization = optimization_of(pipe)
+    for index, (offset, segment) in enumerate(windows):
+        with optimization.exclusive():
             result = pipe(
-                converted_path,
+                {"raw": segment, "sampling_rate": SAMPLE_RATE},
                 return_timestamps=True,
                 generate_kwargs={
                     "language": language,
-                    "condition_on_prev_tokens": False,  # 반복 방지
-                    "compression_ratio_threshold": 1.35,  # 반복 감지 임계값
-                    "no_speech_threshold": 0.6,
-                },
-                chunk_length_s=chunk_length,
+                    **REPETITION_GUARD,
+                    **optimization.generate_kwargs()
+                }
             )
+        results.append((offset / SAMPLE_RATE, audio_duration(segment), result.get("chunks", [])))
 
-            if progress_callback:
-                progress_callback({
-                    "stage": "complete",
-                    "progress": 100,
-                    "message": "변환 완료!"
-                })
-        else:
-            # 짧은 오디오: 한 번에 처리
-            if progress_callback:
-                progress_callback({
-                    "stage": "processing",
-                    "progress": 50,
-                    "message": "음성 인식 중..."
-                })
+        if progress_callback:
+            done = index + 1
+            elapsed = time.time() - started
+            progress_callback({
+                "stage": "processing",
+                "progress": int(done / len(windows) * 100),
+                "message": f"음성 인식 중... ({done}/{len(windows)})",
+                "window": done,
+                "windows": len(windows),
+                "eta": elapsed / done * (len(windows) - done)
+            })
 
-            result = pipe(
-                converted_path,
-                return_timestamps=True,
-                generate_kwargs={
-                    "language": language,
-                    "condition_on_prev_tokens": False,  # 반복 방지
-                    "compression_ratio_threshold": 1.35,
-                    "no_speech_threshold": 0.6,
-                }
-            )
+    result = stitch_windows(results)
 
-            if progress_callback:
-                progress_callback({
-                    "stage": "complete",
-                    "progress": 100,
-                    "message": "변환 완료!"
-                })
+    if progress_callback:
+        progress_callback({
+            "stage": "complete",
+            "progress": 100,
+            "message": "변환 완료!"
+        })
 
-        # 반복 텍스트 필터링
-        result = filter_repeated_text(result)
+    # 반복 텍스트 필터링
+    result = filter_repeated_text(result)
 
-        # 타임스탬프 싱크 보정 (원본 오디오와 변환된 오디오의 duration이 다를 경우)
-        if is_temp and original_duration and converted_duration and abs(original_duration - converted_duration) > 0.5:
-            ratio = original_duration / converted_duration
-            print(f"[Transcribe] Applying timestamp correction ratio: {ratio:.4f}")
-            result = adjust_timestamps(result, ratio)
+    # 타임스탬프 싱크 보정 (원본 오디오와 디코딩된 오디오의 duration이 다를 경우)
+    if original_duration and converted_duration and abs(original_duration - converted_duration) > 0.5:
+        ratio = original_duration / converted_duration
+        print(f"[Transcribe] Applying timestamp correction ratio: {ratio:.4f}")
+        result = adjust_timestamps(result, ratio)
 
-        return result
-    finally:
-        # 임시 파일 삭제
-        if is_temp and os.path.exists(converted_path):
-            os.remove(converted_path)
+    return result
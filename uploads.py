@@ -0,0 +1,332 @@
+"""이어받기 가능한 분할 업로드 모듈 (init → 청크 PUT → finalize)"""
+
+import hashlib
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from audio import PipeDecoder, decoded_path
+
+# 요청 본문을 디스크로 옮길 때 한 번에 읽는 크기
+STREAM_BLOCK = 1 << 20
+
+# 소유 프로세스가 받은 청크를 확인하는 간격 (초)
+PUMP_INTERVAL = 0.5
+# 소유 프로세스의 확인 기록이 이보다 오래되면 (재시작 등) finalize를 받은 프로세스가 직접 해시 계산
+OWNER_STALE_SECONDS = 10
+# finalize가 소유 프로세스의 해시/디코딩 결과를 기다리는 최대 시간 (초)
+FINALIZE_WAIT_SECONDS = 30
+
+
+class ChunkedUploads:
+    """
+    분할 업로드 세션 관리
+
+    - 세션 정보(.json), 데이터(.part), 받은 청크 표시(.chunks/<index>)를 모두 디스크에 두므로
+      연결이 끊기거나 서버가 재시작되어도 받은 청크부터 이어서 업로드 가능 (여러 웹 프로세스도 공유)
+    - 청크는 순서와 무관하게 자기 위치에 바로 기록 (병렬 업로드, 어느 웹 프로세스가 받아도 됨)
+    - sha256 계산과 ffmpeg 디코딩은 세션을 만든 프로세스(소유 프로세스)만 맡음 - 백그라운드 스레드가
+      앞에서부터 이어진 청크를 디스크에서 읽어 처리하고, 모든 청크를 받으면 결과(.done, 디코딩 파일)를 기록
+    - finalize를 받은 프로세스는 그 결과를 사용 (소유 프로세스가 없어졌으면 직접 해시 계산, 디코딩은 작업에서)
+    - 세션이 다른 프로세스에서 끝나거나 취소되면 소유 프로세스가 다음 확인 때 ffmpeg과 임시 파일 정리
+    """
+
+    def __init__(self, folder: str, chunk_size: int, max_bytes: int, ttl_seconds: float = 24 * 3600, early_decode: bool = True):
+        self.folder = folder
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.early_decode = early_decode
+        self._lock = threading.Lock()
+        self._session_locks: Dict[str, threading.Lock] = {}
+        self._progress: Dict[str, Dict] = {}  # 이 프로세스가 소유한 세션의 해시/디코딩 진행 상태
+        self._pump: Optional[threading.Thread] = None
+        os.makedirs(folder, exist_ok=True)
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.folder, f'{upload_id}.json')
+
+    def part_path(self, upload_id: str) -> str:
+        return os.path.join(self.folder, f'{upload_id}.part')
+
+    def _marker_dir(self, upload_id: str) -> str:
+        return os.path.join(self.folder, f'{upload_id}.chunks')
+
+    def _owner_path(self, upload_id: str) -> str:
+        """소유 프로세스 표시 (확인할 때마다 mtime 갱신)"""
+        return os.path.join(self.folder, f'{upload_id}.owner')
+
+    def _done_path(self, upload_id: str) -> str:
+        """소유 프로세스의 처리 결과 {sha256, decoded}"""
+        return os.path.join(self.folder, f'{upload_id}.done')
+
+    def _session_lock(self, upload_id: str) -> threading.Lock:
+        with self._lock:
+            return self._session_locks.setdefault(upload_id, threading.Lock())
+
+    def init(self, filename: str, size: int, fields: Dict) -> Dict:
+        """
+        업로드 세션 생성 (파일 크기만큼 미리 할당, 이 프로세스가 해시/디코딩을 맡음)
+
+        Raises:
+            ValueError: 크기가 0이거나 최대 크기 초과
+        """
+        if size <= 0:
+            raise ValueError('파일 크기가 올바르지 않습니다')
+        if size > self.max_bytes:
+            raise ValueError(f'파일이 너무 큽니다 (최대 {self.max_bytes // (1024 * 1024)}MB)')
+
+        self._purge_expired()
+
+        upload_id = uuid.uuid4().hex
+        meta = {
+            'upload_id': upload_id,
+            'filename': filename,
+            'size': size,
+            'chunk_size': self.chunk_size,
+            'chunks': (size + self.chunk_size - 1) // self.chunk_size,
+            'fields': fields,
+            'created_at': time.time()
+        }
+
+        os.makedirs(self._marker_dir(upload_id))
+        with open(self.part_path(upload_id), 'wb') as f:
+            f.truncate(size)
+        with open(self._owner_path(upload_id), 'w', encoding='utf-8') as f:
+            f.write(f'{socket.gethostname()}:{os.getpid()}')
+        with open(self._meta_path(upload_id), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        self._track(upload_id)
+
+        print(f"[Upload] Session {upload_id}: {filename} ({size / 1024 / 1024:.1f}MB, {meta['chunks']} chunks)")
+        return meta
+
+    def get(self, upload_id: str) -> Optional[Dict]:
+        """세션 정보 + 받은 청크 목록 (없으면 None)"""
+        try:
+            with open(self._meta_path(upload_id), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        meta['received'] = self._received(upload_id)
+        return meta
+
+    def _received(self, upload_id: str) -> List[int]:
+        try:
+            return sorted(int(name) for name in os.listdir(self._marker_dir(upload_id)))
+        except FileNotFoundError:
+            return []
+
+    def _has_chunk(self, upload_id: str, index: int) -> bool:
+        return os.path.exists(os.path.join(self._marker_dir(upload_id), str(index)))
+
+    def _chunk_range(self, meta: Dict, index: int) -> Tuple[int, int]:
+        start = index * meta['chunk_size']
+        return start, min(start + meta['chunk_size'], meta['size'])
+
+    def write_chunk(self, upload_id: str, index: int, stream) -> Dict:
+        """
+        청크 하나를 요청 스트림에서 바로 파일의 해당 위치에 기록
+
+        Raises:
+            KeyError: 세션 없음
+            ValueError: 잘못된 index 또는 청크 크기 불일치
+        """
+        meta = self.get(upload_id)
+        if meta is None:
+            raise KeyError(upload_id)
+        if not 0 <= index < meta['chunks']:
+            raise ValueError(f'잘못된 청크 번호: {index}')
+
+        start, end = self._chunk_range(meta, index)
+        expected = end - start
+        written = 0
+        with open(self.part_path(upload_id), 'r+b') as f:
+            f.seek(start)
+            while True:
+                block = stream.read(min(STREAM_BLOCK, expected - written + 1))
+                if not block:
+                    break
+                written += len(block)
+                if written > expected:
+                    break
+                f.write(block)
+
+        if written != expected:
+            raise ValueError(f'청크 크기가 맞지 않습니다 (받음 {written}, 기대 {expected})')
+
+        # 청크를 다 쓴 뒤에만 받은 것으로 표시
+        open(os.path.join(self._marker_dir(upload_id), str(index)), 'w').close()
+
+        # 소유 프로세스면 바로 처리 (다른 프로세스가 받은 청크는 소유 프로세스의 백그라운드 스레드가 처리)
+        self._advance(upload_id, meta)
+        meta['received'] = self._received(upload_id)
+        return meta
+
+    def _track(self, upload_id: str):
+        """이 프로세스가 세션의 해시/디코딩을 맡음"""
+        decoder = PipeDecoder(os.path.join(self.folder, f'{upload_id}.f32')) if self.early_decode else None
+        with self._lock:
+            self._progress[upload_id] = {'sha256': hashlib.sha256(), 'next': 0, 'decoder': decoder}
+            if self._pump is None:
+                self._pump = threading.Thread(target=self._pump_loop, name='upload-pump', daemon=True)
+                self._pump.start()
+
+    def _untrack(self, upload_id: str):
+        with self._session_lock(upload_id):
+            progress = self._progress.pop(upload_id, None)
+        if progress and progress['decoder'] is not None:
+            progress['decoder'].abort()
+
+    def _pump_loop(self):
+        """소유한 세션마다 다른 프로세스가 받은 청크까지 처리, 끝나거나 취소된 세션 정리"""
+        while True:
+            time.sleep(PUMP_INTERVAL)
+            with self._lock:
+                upload_ids = list(self._progress)
+                if not upload_ids:
+                    self._pump = None
+                    return
+
+            for upload_id in upload_ids:
+                meta = self.get(upload_id)
+                if meta is None:
+                    # 다른 프로세스에서 finalize/취소/만료됨
+                    self._untrack(upload_id)
+                    continue
+                try:
+                    os.utime(self._owner_path(upload_id))
+                    self._advance(upload_id, meta)
+                except OSError as e:
+                    print(f"[Upload] Session {upload_id} progress failed: {e}")
+
+    def _advance(self, upload_id: str, meta: Dict):
+        """앞에서부터 이어진 청크만큼 해시 계산 + 디코더에 전달, 모두 받았으면 결과 기록 (소유 프로세스만)"""
+        with self._session_lock(upload_id):
+            progress = self._progress.get(upload_id)
+            if progress is None:
+                return
+
+            with open(self.part_path(upload_id), 'rb') as f:
+                while progress['next'] < meta['chunks'] and self._has_chunk(upload_id, progress['next']):
+                    start, end = self._chunk_range(meta, progress['next'])
+                    f.seek(start)
+                    data = f.read(end - start)
+                    progress['sha256'].update(data)
+                    if progress['decoder'] is not None:
+                        progress['decoder'].feed(data)
+                    progress['next'] += 1
+
+            if progress['next'] < meta['chunks']:
+                return
+            del self._progress[upload_id]
+
+        decoded = progress['decoder'] is not None and progress['decoder'].finish(self.part_path(upload_id))
+        done = {'sha256': progress['sha256'].hexdigest(), 'decoded': decoded}
+        tmp_path = f'{self._done_path(upload_id)}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(done, f)
+        os.replace(tmp_path, self._done_path(upload_id))
+        self._remove_file(self._owner_path(upload_id))
+
+        # 기다리다 포기한 finalize가 세션을 먼저 지웠으면 결과도 정리
+        if not os.path.exists(self._meta_path(upload_id)):
+            self._remove_outputs(upload_id)
+
+    def _wait_done(self, upload_id: str) -> Optional[Dict]:
+        """소유 프로세스의 처리 결과 (소유 프로세스가 없어졌거나 FINALIZE_WAIT_SECONDS가 지나면 None)"""
+        deadline = time.time() + FINALIZE_WAIT_SECONDS
+        while True:
+            # 결과를 먼저 기록하고 소유 표시를 지우므로 소유 표시부터 확인
+            try:
+                stale = time.time() - os.path.getmtime(self._owner_path(upload_id)) > OWNER_STALE_SECONDS
+            except OSError:
+                stale = True
+            try:
+                with open(self._done_path(upload_id), 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+            if stale or time.time() > deadline:
+                return None
+            time.sleep(PUMP_INTERVAL / 2)
+
+    def finalize(self, upload_id: str) -> Tuple[str, Dict, Optional[str]]:
+        """
+        모든 청크를 받았는지 확인하고 내용 해시 반환
+
+        Returns:
+            (sha256, 세션 정보, 업로드 중에 미리 디코딩한 PCM 경로 또는 None)
+
+        Raises:
+            KeyError: 세션 없음
+            ValueError: 빠진 청크가 있음
+        """
+        meta = self.get(upload_id)
+        if meta is None:
+            raise KeyError(upload_id)
+        missing = sorted(set(range(meta['chunks'])) - set(meta['received']))
+        if missing:
+            raise ValueError(f'받지 못한 청크가 있습니다: {missing[:10]}')
+
+        # 이 프로세스가 소유자면 남은 부분을 바로 처리, 아니면 소유 프로세스의 결과를 기다림
+        self._advance(upload_id, meta)
+        done = self._wait_done(upload_id)
+        if done is not None:
+            predecoded = decoded_path(self.part_path(upload_id)) if done['decoded'] else None
+            print(f"[Upload] Session {upload_id} complete")
+            return done['sha256'], meta, predecoded
+
+        print(f"[Upload] Session {upload_id} complete (owner process unavailable, hashing here)")
+        digest = hashlib.sha256()
+        with open(self.part_path(upload_id), 'rb') as f:
+            while True:
+                block = f.read(STREAM_BLOCK)
+                if not block:
+                    break
+                digest.update(block)
+        return digest.hexdigest(), meta, None
+
+    def discard(self, upload_id: str):
+        """세션 파일 삭제 (.part는 finalize 후 옮겨졌으면 없음)"""
+        self._untrack(upload_id)
+
+        # 세션 정보를 먼저 지워야 소유 프로세스가 이후에 기록한 결과도 스스로 정리함
+        self._remove_file(self._meta_path(upload_id))
+        shutil.rmtree(self._marker_dir(upload_id), ignore_errors=True)
+        for path in (self.part_path(upload_id), self._owner_path(upload_id)):
+            self._remove_file(path)
+        self._remove_outputs(upload_id)
+        with self._lock:
+            self._session_locks.pop(upload_id, None)
+
+    def _remove_outputs(self, upload_id: str):
+        """소유 프로세스의 처리 결과 (.done, 쓰지 않은 디코딩 파일)"""
+        for path in (self._done_path(upload_id), decoded_path(self.part_path(upload_id))):
+            self._remove_file(path)
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _purge_expired(self):
+        """TTL이 지난 미완료 세션 삭제 (소유 프로세스의 ffmpeg은 그 프로세스가 다음 확인 때 정리)"""
+        now = time.time()
+        for name in os.listdir(self.folder):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.folder, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl_seconds:
+                    self.discard(name[:-5])
+                    print(f"[Upload] Expired session {name[:-5]}")
+            except FileNotFoundError:
+                continue
@@ -0,0 +1,131 @@
+"""음성 구간 검출 모듈 (에너지 기반 VAD) - 무음 구간을 건너뛰고 Whisper에 전달"""
+
+import bisect
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from audio import SAMPLE_RATE
+
+
+def _frame_energy_db(audio: np.ndarray, frame: int) -> np.ndarray:
+    n_frames = len(audio) // frame
+    frames = audio[:n_frames * frame].reshape(n_frames, frame).astype(np.float64)
+    return 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+
+def estimate_noise_floor(audio: np.ndarray, sampling_rate: int = SAMPLE_RATE, frame_ms: int = 30) -> Optional[float]:
+    """배경 소음 추정 (하위 10% 프레임 에너지, dB) - 프레임 하나보다 짧으면 None"""
+    frame = int(sampling_rate * frame_ms / 1000)
+    if len(audio) < frame:
+        return None
+    return float(np.percentile(_frame_energy_db(audio, frame), 10))
+
+
+def detect_speech_regions(
+    audio: np.ndarray,
+    sampling_rate: int = SAMPLE_RATE,
+    frame_ms: int = 30,
+    margin_db: float = 10.0,
+    min_threshold_db: float = -50.0,
+    min_speech: float = 0.25,
+    min_silence: float = 0.8,
+    padding: float = 0.2,
+    noise_floor_db: Optional[float] = None
+) -> List[Tuple[int, int]]:
+    """
+    프레임 에너지로 음성 구간 검출
+
+    임계값은 배경 소음 + margin_db, 최소 min_threshold_db
+    배경 소음은 noise_floor_db (스트리밍처럼 세션 단위로 추정한 값), 없으면 이 오디오의 하위 10% 프레임 에너지
+
+    Returns:
+        List[Tuple[int, int]]: 음성 구간 (시작 샘플, 끝 샘플)
+    """
+    frame = int(sampling_rate * frame_ms / 1000)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return [(0, len(audio))] if len(audio) else []
+
+    energy_db = _frame_energy_db(audio, frame)
+
+    noise_floor = noise_floor_db if noise_floor_db is not None else float(np.percentile(energy_db, 10))
+    threshold = max(noise_floor + margin_db, min_threshold_db)
+    is_speech = energy_db > threshold
+
+    # 연속된 음성 프레임을 구간으로
+    edges = np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    regions = []
+    silence_frames = int(min_silence * 1000 / frame_ms)
+    for start, end in zip(starts, ends):
+        # 짧은 무음은 앞 구간에 합침
+        if regions and start - regions[-1][1] < silence_frames:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+
+    speech_frames = int(min_speech * 1000 / frame_ms)
+    pad = int(padding * sampling_rate)
+    result = []
+    for start, end in regions:
+        if end - start < speech_frames:
+            continue
+        begin = max(0, int(start) * frame - pad)
+        finish = min(len(audio), int(end) * frame + pad)
+        if result and begin <= result[-1][1]:
+            result[-1] = (result[-1][0], finish)
+        else:
+            result.append((begin, finish))
+
+    return result
+
+
+def pack_speech(
+    audio: np.ndarray,
+    regions: List[Tuple[int, int]],
+    sampling_rate: int = SAMPLE_RATE,
+    gap: float = 0.3
+) -> Tuple[np.ndarray, List[Tuple[float, float, float]]]:
+    """
+    음성 구간만 이어 붙인 오디오 생성 (구간 사이에 짧은 무음 gap 삽입)
+
+    Returns:
+        (이어 붙인 오디오, [(packed 시작 초, 원본 시작 초, 길이 초)])
+    """
+    gap_samples = np.zeros(int(gap * sampling_rate), dtype=audio.dtype)
+    pieces = []
+    offsets = []
+    position = 0
+
+    for start, end in regions:
+        if pieces:
+            pieces.append(gap_samples)
+            position += len(gap_samples)
+        pieces.append(audio[start:end])
+        offsets.append((position / sampling_rate, start / sampling_rate, (end - start) / sampling_rate))
+        position += end - start
+
+    packed = np.concatenate(pieces) if pieces else np.zeros(0, dtype=audio.dtype)
+    return packed, offsets
+
+
+def remap_time(t, offsets: List[Tuple[float, float, float]], packed_starts: List[float]):
+    """packed 오디오의 시간을 원본 시간으로 변환 (gap 안의 시간은 앞 구간 끝으로)"""
+    if t is None or not offsets:
+        return t
+    index = max(bisect.bisect_right(packed_starts, t) - 1, 0)
+    packed_start, original_start, length = offsets[index]
+    return original_start + min(max(t - packed_start, 0.0), length)
+
+
+def remap_timestamps(result: Dict, offsets: List[Tuple[float, float, float]]) -> Dict:
+    """Whisper 결과의 청크 타임스탬프를 원본 타임라인으로 되돌림"""
+    packed_starts = [offset[0] for offset in offsets]
+    for chunk in result.get("chunks", []):
+        if chunk.get("timestamp"):
+            start, end = chunk["timestamp"]
+            chunk["timestamp"] = (remap_time(start, offsets, packed_starts), remap_time(end, offsets, packed_starts))
+    return result
@@ -0,0 +1,31 @@
+"""추론 워커 프로세스 - 작업 저장소에서 대기 중인 작업을 가져와 실행 (웹 서버는 JOB_RUNNER=worker)"""
+
+import os
+import threading
+import time
+
+# 대기 중인 작업을 확인하는 간격 (초)
+POLL_INTERVAL = float(os.getenv('WORKER_POLL_INTERVAL', '0.5'))
+
+
+def main():
+    # 모델 레지스트리, 작업 큐, 작업 저장소는 웹 서버와 같은 설정으로 생성
+    import app
+
+    app.job_store.recover()
+    app.job_queue.start()
+    app.metrics_spool.start()
+    threading.Thread(target=app.warm_up, name='model-warmup', daemon=True).start()
+    print(f"[Worker] Started (jobs: {app.job_store.path}, workers: {app.job_queue.concurrency})")
+
+    while True:
+        # 장치별로 바로 실행할 수 있는 만큼만 가져감 (나머지는 다른 워커가 가져갈 수 있도록 저장소에 둠)
+        for device, stats in app.job_queue.stats()['devices'].items():
+            free = stats['concurrency'] - stats['queued'] - stats['running']
+            for job in app.job_store.claim(device, free):
+                app.job_queue.submit(job['id'], device, job.get('priority', 0))
+        time.sleep(POLL_INTERVAL)
+
+
+if __name__ == '__main__':
+    main()